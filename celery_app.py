@@ -1,10 +1,34 @@
 from celery import Celery
+from kombu import Queue
 import os
 from dotenv import load_dotenv
 
                                            
 load_dotenv()
 
+QUEUE_TRANSLATION_SHORT = 'translation_short'
+QUEUE_TRANSLATION_LONG = 'translation_long'
+QUEUE_IMAGES = 'images'
+QUEUE_MAINTENANCE = 'maintenance'
+
+CELERY_QUEUES = (
+    Queue(QUEUE_TRANSLATION_SHORT),
+    Queue(QUEUE_TRANSLATION_LONG),
+    Queue(QUEUE_IMAGES),
+    Queue(QUEUE_MAINTENANCE),
+)
+
+# With the Redis transport a lower priority number is served first
+CELERY_TASK_ROUTES = {
+    'tasks.translate_novel_title': {'queue': QUEUE_TRANSLATION_SHORT, 'priority': 0},
+    'tasks.translate_chapter_title': {'queue': QUEUE_TRANSLATION_SHORT, 'priority': 0},
+    'tasks.translate_chapter': {'queue': QUEUE_TRANSLATION_LONG, 'priority': 3},
+    'tasks.translate_chapter_group': {'queue': QUEUE_TRANSLATION_LONG, 'priority': 6},
+    'tasks.reclaim_batch_leases': {'queue': QUEUE_MAINTENANCE, 'priority': 0},
+    'tasks.webtoon_tasks.process_webtoon_job': {'queue': QUEUE_MAINTENANCE, 'priority': 0},
+    'tasks.webtoon_tasks.process_webtoon_image': {'queue': QUEUE_IMAGES, 'priority': 5},
+}
+
 def make_celery():
 
                                                                              
@@ -25,6 +49,21 @@ def make_celery():
         task_time_limit=300,                 
         task_soft_time_limit=240,                        
         broker_connection_retry_on_startup=True,
+        task_queues=CELERY_QUEUES,
+        task_default_queue=QUEUE_TRANSLATION_LONG,
+        task_routes=CELERY_TASK_ROUTES,
+        broker_transport_options={
+            'priority_steps': list(range(10)),
+            'sep': ':',
+            'queue_order_strategy': 'priority',
+        },
+        worker_prefetch_multiplier=1,
+        beat_schedule={
+            'reclaim-batch-leases': {
+                'task': 'tasks.reclaim_batch_leases',
+                'schedule': 300.0,
+            },
+        },
     )
     
     return celery
@@ -1,7 +1,7 @@
 
 
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, scoped_session
 from contextlib import contextmanager
 
@@ -38,10 +38,34 @@ def db_session_scope():
     finally:
         session.close()
 
+SCHEMA_UPGRADES = [
+    "CREATE INDEX IF NOT EXISTS idx_novels_user_source_url ON novels (user_id, source_url)",
+    "CREATE INDEX IF NOT EXISTS idx_novels_user_title ON novels (user_id, title)",
+    "CREATE INDEX IF NOT EXISTS idx_novels_user_original_title ON novels (user_id, original_title)",
+    "CREATE INDEX IF NOT EXISTS idx_novels_user_translated_title ON novels (user_id, translated_title)",
+    "ALTER TABLE chapters ADD COLUMN IF NOT EXISTS episode_id BIGINT",
+    "ALTER TABLE chapters ADD COLUMN IF NOT EXISTS number_sort_key DOUBLE PRECISION",
+    "CREATE INDEX IF NOT EXISTS idx_chapters_novel_episode ON chapters (novel_id, episode_id)",
+    "CREATE INDEX IF NOT EXISTS idx_chapters_novel_number_key ON chapters (novel_id, number_sort_key)",
+    "CREATE INDEX IF NOT EXISTS idx_chapters_novel_source_url ON chapters (novel_id, source_url)",
+    "ALTER TABLE translation_token_usage ADD COLUMN IF NOT EXISTS cache_hit BOOLEAN NOT NULL DEFAULT false",
+    "ALTER TABLE token_usage_daily ADD COLUMN IF NOT EXISTS cache_hits INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE translation_token_usage ADD COLUMN IF NOT EXISTS cached_tokens INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE token_usage_daily ADD COLUMN IF NOT EXISTS cached_tokens BIGINT NOT NULL DEFAULT 0",
+    "ALTER TABLE translation_batch_jobs ADD COLUMN IF NOT EXISTS in_flight_chapters JSONB NOT NULL DEFAULT '{}'::jsonb",
+]
+
+def upgrade_schema():
+
+    with engine.begin() as connection:
+        for statement in SCHEMA_UPGRADES:
+            connection.execute(text(statement))
+
 def init_db():
 
     from database.db_models import Base
     Base.metadata.create_all(bind=engine)
+    upgrade_schema()
 
 def drop_all_tables():
 
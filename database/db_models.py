@@ -1,11 +1,35 @@
-from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, Boolean, ForeignKey, Index, ARRAY
+import re
+from sqlalchemy import Column, Integer, BigInteger, Float, String, Text, TIMESTAMP, Date, Boolean, ForeignKey, Index, ARRAY
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy.orm import relationship, declarative_base, validates, deferred
 from sqlalchemy.sql import func
 from datetime import datetime
 
 Base = declarative_base()
 
+EPISODE_ID_PATTERN = re.compile(r'/viewer/(\d+)')
+UNNUMBERED_SORT_KEY = 999999.0
+
+def extract_episode_id_from_url(source_url):
+
+    if not source_url:
+        return None
+    match = EPISODE_ID_PATTERN.search(source_url)
+    if match:
+        return int(match.group(1))
+    return None
+
+def parse_chapter_number(num_str):
+
+    if not num_str:
+        return UNNUMBERED_SORT_KEY
+    if num_str == 'BONUS':
+        return UNNUMBERED_SORT_KEY
+    try:
+        return float(num_str)
+    except (ValueError, TypeError):
+        return UNNUMBERED_SORT_KEY
+
 class Novel(Base):
 
     __tablename__ = 'novels'
@@ -37,14 +61,18 @@ class Novel(Base):
     
     __table_args__ = (
         Index('idx_novels_user_slug', 'user_id', 'slug', unique=True),
+        Index('idx_novels_user_source_url', 'user_id', 'source_url'),
+        Index('idx_novels_user_title', 'user_id', 'title'),
+        Index('idx_novels_user_original_title', 'user_id', 'original_title'),
+        Index('idx_novels_user_translated_title', 'user_id', 'translated_title'),
     )
     
     def __repr__(self):
         return f"<Novel(id={self.id}, title='{self.title}', user_id='{self.user_id}')>"
     
-    def to_dict(self):
+    def to_dict(self, include_chapter_count=True):
 
-        return {
+        data = {
             'id': self.id,
             'user_id': self.user_id,
             'slug': self.slug,
@@ -69,8 +97,12 @@ class Novel(Base):
             'custom_prompt_suffix': self.custom_prompt_suffix,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'chapter_count': self.chapters.count() if self.chapters else 0
         }
+        
+        if include_chapter_count:
+            data['chapter_count'] = self.chapters.count() if self.chapters else 0
+        
+        return data
 
 class Chapter(Base):
 
@@ -83,8 +115,8 @@ class Chapter(Base):
     original_title = Column(String(500))                         
     translated_title = Column(String(500))                            
     chapter_number = Column(String(50))
-    content = Column(Text, nullable=False)                  
-    translated_content = Column(Text)                              
+    content = deferred(Column(Text, nullable=False), group='body')
+    translated_content = deferred(Column(Text), group='body')
     translation_model = Column(String(100))                              
     
     translation_status = Column(String(20), default='pending')                                           
@@ -94,6 +126,8 @@ class Chapter(Base):
     
     images = Column(JSONB)                                         
     source_url = Column(Text)
+    episode_id = Column(BigInteger)
+    number_sort_key = Column(Float, default=UNNUMBERED_SORT_KEY)
     position = Column(Integer, nullable=False)
     is_bonus = Column(Boolean, default=False)
     created_at = Column(TIMESTAMP, server_default=func.now())
@@ -104,8 +138,21 @@ class Chapter(Base):
     __table_args__ = (
         Index('idx_chapters_novel_slug', 'novel_id', 'slug', unique=True),
         Index('idx_chapters_position', 'novel_id', 'position'),
+        Index('idx_chapters_novel_episode', 'novel_id', 'episode_id'),
+        Index('idx_chapters_novel_number_key', 'novel_id', 'number_sort_key'),
+        Index('idx_chapters_novel_source_url', 'novel_id', 'source_url'),
     )
     
+    @validates('source_url')
+    def _sync_episode_id(self, key, value):
+        self.episode_id = extract_episode_id_from_url(value)
+        return value
+    
+    @validates('chapter_number')
+    def _sync_number_sort_key(self, key, value):
+        self.number_sort_key = parse_chapter_number(value)
+        return value
+    
     def __repr__(self):
         return f"<Chapter(id={self.id}, title='{self.title}', novel_id={self.novel_id}, position={self.position})>"
     
@@ -208,6 +255,8 @@ class TranslationTokenUsage(Base):
     output_tokens = Column(Integer, nullable=False)
     total_tokens = Column(Integer, nullable=False)
     translation_type = Column(String(20), default='content')                              
+    cache_hit = Column(Boolean, default=False, nullable=False, server_default='false')
+    cached_tokens = Column(Integer, default=0, nullable=False, server_default='0')
     created_at = Column(TIMESTAMP, server_default=func.now(), index=True)
     
     chapter = relationship('Chapter', backref='token_usage_records', passive_deletes=True)
@@ -232,7 +281,107 @@ class TranslationTokenUsage(Base):
             'output_tokens': self.output_tokens,
             'total_tokens': self.total_tokens,
             'translation_type': self.translation_type,
+            'cache_hit': self.cache_hit,
+            'cached_tokens': self.cached_tokens or 0,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
+class TokenUsageDaily(Base):
+
+    __tablename__ = 'token_usage_daily'
+    
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    user_id = Column(String(100), nullable=False)
+    provider = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+    translation_type = Column(String(20), nullable=False, default='content')
+    input_tokens = Column(BigInteger, nullable=False, default=0)
+    output_tokens = Column(BigInteger, nullable=False, default=0)
+    total_tokens = Column(BigInteger, nullable=False, default=0)
+    record_count = Column(Integer, nullable=False, default=0)
+    cache_hits = Column(Integer, nullable=False, default=0, server_default='0')
+    cached_tokens = Column(BigInteger, nullable=False, default=0, server_default='0')
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index('idx_token_usage_daily_key', 'day', 'user_id', 'provider', 'model', 'translation_type', unique=True),
+        Index('idx_token_usage_daily_user_day', 'user_id', 'day'),
+    )
+    
+    def __repr__(self):
+        return f"<TokenUsageDaily(day={self.day}, user_id='{self.user_id}', model='{self.model}', total_tokens={self.total_tokens})>"
+
+class TranslationCacheEntry(Base):
+
+    __tablename__ = 'translation_cache'
+    
+    cache_key = Column(String(64), primary_key=True)
+    provider = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+    translated_text = Column(Text, nullable=False)
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    last_used_at = Column(TIMESTAMP, server_default=func.now(), index=True)
+    
+    def __repr__(self):
+        return f"<TranslationCacheEntry(cache_key='{self.cache_key}', model='{self.model}', hit_count={self.hit_count})>"
+
+class TranslationBatchJob(Base):
+
+    __tablename__ = 'translation_batch_jobs'
+
+    id = Column(Integer, primary_key=True)
+    job_id = Column(String(64), unique=True, nullable=False, index=True)
+    user_id = Column(String(100), nullable=False)
+    novel_id = Column(Integer, ForeignKey('novels.id', ondelete='CASCADE'), nullable=False, index=True)
+    start_index = Column(Integer, nullable=True)
+    end_index = Column(Integer, nullable=True)
+    untranslated_only = Column(Boolean, default=False)
+    translate_title = Column(Boolean, default=True)
+    translate_content = Column(Boolean, default=True)
+
+    status = Column(String(20), nullable=False, default='running')
+    chapter_ids = Column(JSONB, nullable=False, default=list)
+    next_index = Column(Integer, nullable=False, default=0)
+    in_flight = Column(Integer, nullable=False, default=0)
+    in_flight_chapters = Column(JSONB, nullable=False, default=dict)
+    total_chapters = Column(Integer, nullable=False, default=0)
+    completed_chapters = Column(Integer, nullable=False, default=0)
+    failed_chapters = Column(Integer, nullable=False, default=0)
+    error_message = Column(Text, nullable=True)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    completed_at = Column(TIMESTAMP, nullable=True)
+
+    __table_args__ = (
+        Index('idx_translation_batch_jobs_user_status', 'user_id', 'status'),
+    )
+
+    def __repr__(self):
+        return f"<TranslationBatchJob(job_id='{self.job_id}', status='{self.status}', progress={self.completed_chapters}/{self.total_chapters})>"
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'novel_id': self.novel_id,
+            'start_index': self.start_index,
+            'end_index': self.end_index,
+            'untranslated_only': self.untranslated_only,
+            'translate_title': self.translate_title,
+            'translate_content': self.translate_content,
+            'status': self.status,
+            'total_chapters': self.total_chapters,
+            'completed_chapters': self.completed_chapters,
+            'failed_chapters': self.failed_chapters,
+            'queued_chapters': self.next_index - self.completed_chapters - self.failed_chapters,
+            'remaining_chapters': self.total_chapters - self.next_index,
+            'error_message': self.error_message,
             'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
         }
 
 class GlobalModelPricing(Base):
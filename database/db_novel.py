@@ -1,9 +1,21 @@
 
 
 from database.database import db_session_scope
-from database.db_models import Novel, Chapter, TranslationTokenUsage
-from sqlalchemy import and_
-from sqlalchemy.orm import joinedload
+from database.db_models import (
+    Novel, Chapter, TranslationTokenUsage,
+    extract_episode_id_from_url, parse_chapter_number
+)
+from sqlalchemy import and_, or_, func, text, insert, update
+from sqlalchemy.orm import joinedload, undefer_group
+from bisect import bisect_left, bisect_right
+
+POSITION_GAP = 1024
+
+NOVEL_UPDATABLE_FIELDS = (
+    'title', 'original_title', 'translated_title', 'author', 'translated_author',
+    'cover_url', 'tags', 'translated_tags', 'synopsis', 'translated_synopsis',
+    'source_url', 'slug', 'glossary'
+)
 
 def get_user_novels_db(user_id):
 
@@ -11,6 +23,39 @@ def get_user_novels_db(user_id):
         novels = session.query(Novel).filter_by(user_id=user_id).order_by(Novel.created_at.desc()).all()
         return [n.to_dict() for n in novels]
 
+def get_library_summary_db(user_id):
+
+    with db_session_scope() as session:
+        is_bonus = or_(Chapter.is_bonus == True, func.upper(Chapter.chapter_number) == 'BONUS')
+        
+        counts = session.query(
+            Chapter.novel_id.label('novel_id'),
+            func.count(Chapter.id).label('chapter_count'),
+            func.count(Chapter.id).filter(Chapter.translation_status == 'completed').label('translated_count'),
+            func.count(Chapter.id).filter(is_bonus).label('bonus_count')
+        ).join(Novel, Novel.id == Chapter.novel_id).filter(
+            Novel.user_id == user_id
+        ).group_by(Chapter.novel_id).subquery()
+        
+        rows = session.query(
+            Novel,
+            func.coalesce(counts.c.chapter_count, 0),
+            func.coalesce(counts.c.translated_count, 0),
+            func.coalesce(counts.c.bonus_count, 0)
+        ).outerjoin(counts, counts.c.novel_id == Novel.id).filter(
+            Novel.user_id == user_id
+        ).order_by(Novel.created_at.desc()).all()
+        
+        summaries = []
+        for novel, chapter_count, translated_count, bonus_count in rows:
+            novel_dict = novel.to_dict(include_chapter_count=False)
+            novel_dict['chapter_count'] = chapter_count
+            novel_dict['translated_count'] = translated_count
+            novel_dict['bonus_count'] = bonus_count
+            novel_dict['regular_chapter_count'] = chapter_count - bonus_count
+            summaries.append(novel_dict)
+        return summaries
+
 def get_novel_db(user_id, slug):
 
     with db_session_scope() as session:
@@ -28,10 +73,79 @@ def get_novel_with_chapters_db(user_id, slug):
         if not novel:
             return None
         novel_dict = novel.to_dict()
-        chapters = session.query(Chapter).filter_by(novel_id=novel.id).order_by(Chapter.position).all()
+        chapters = session.query(Chapter).options(undefer_group('body')).filter_by(
+            novel_id=novel.id
+        ).order_by(Chapter.position).all()
         novel_dict['chapters'] = [c.to_dict(include_content=True) for c in chapters]
         return novel_dict
 
+def _chapter_nav_dict(row):
+
+    if not row:
+        return None
+    return {
+        'id': row.id,
+        'title': row.title,
+        'translated_title': row.translated_title or row.title,
+        'chapter_number': row.chapter_number,
+        'position': row.position
+    }
+
+def get_reader_chapter_db(user_id, novel_slug, chapter_index=None, chapter_number=None, order='asc'):
+
+    with db_session_scope() as session:
+        novel = session.query(Novel).filter(
+            and_(Novel.user_id == user_id, Novel.slug == novel_slug)
+        ).first()
+        if not novel:
+            return None
+        
+        descending = order == 'desc'
+        position_order = Chapter.position.desc() if descending else Chapter.position.asc()
+        
+        total_chapters = session.query(func.count(Chapter.id)).filter(
+            Chapter.novel_id == novel.id
+        ).scalar() or 0
+        
+        if chapter_number is not None:
+            chapter = session.query(Chapter).options(undefer_group('body')).filter(
+                and_(Chapter.novel_id == novel.id, Chapter.chapter_number == str(chapter_number))
+            ).order_by(position_order).first()
+            if not chapter:
+                return None
+            before = Chapter.position > chapter.position if descending else Chapter.position < chapter.position
+            chapter_index = session.query(func.count(Chapter.id)).filter(
+                and_(Chapter.novel_id == novel.id, before)
+            ).scalar() or 0
+        else:
+            if chapter_index is None or chapter_index < 0 or chapter_index >= total_chapters:
+                return None
+            chapter_id = session.query(Chapter.id).filter(
+                Chapter.novel_id == novel.id
+            ).order_by(position_order).offset(chapter_index).limit(1).scalar()
+            if chapter_id is None:
+                return None
+            chapter = session.query(Chapter).options(undefer_group('body')).filter_by(id=chapter_id).first()
+        
+        nav_columns = (Chapter.id, Chapter.title, Chapter.translated_title, Chapter.chapter_number, Chapter.position)
+        lower = session.query(*nav_columns).filter(
+            and_(Chapter.novel_id == novel.id, Chapter.position < chapter.position)
+        ).order_by(Chapter.position.desc()).first()
+        higher = session.query(*nav_columns).filter(
+            and_(Chapter.novel_id == novel.id, Chapter.position > chapter.position)
+        ).order_by(Chapter.position.asc()).first()
+        
+        prev_row, next_row = (higher, lower) if descending else (lower, higher)
+        
+        return {
+            'novel': novel.to_dict(include_chapter_count=False),
+            'chapter': chapter.to_dict(include_content=True),
+            'chapter_index': chapter_index,
+            'total_chapters': total_chapters,
+            'prev_chapter': _chapter_nav_dict(prev_row),
+            'next_chapter': _chapter_nav_dict(next_row)
+        }
+
 def create_novel_db(user_id, novel_data):
 
     with db_session_scope() as session:
@@ -63,17 +177,32 @@ def update_novel_db(user_id, slug, updates):
         ).first()
         if not novel:
             return None
-        allowed_fields = [
-            'title', 'original_title', 'translated_title', 'author', 'translated_author',
-            'cover_url', 'tags', 'translated_tags', 'synopsis', 'translated_synopsis',
-            'source_url', 'slug', 'glossary'
-        ]
-        for field in allowed_fields:
+        for field in NOVEL_UPDATABLE_FIELDS:
             if field in updates:
                 setattr(novel, field, updates[field])
         session.flush()
         return novel.to_dict()
 
+def update_novel_changes_db(user_id, slug, changes):
+
+    values = {field: changes[field] for field in NOVEL_UPDATABLE_FIELDS if field in changes}
+
+    with db_session_scope() as session:
+        new_slug = values.get('slug')
+        if not new_slug or new_slug == slug or session.query(Novel.id).filter(Novel.slug == new_slug).first():
+            values.pop('slug', None)
+        if not values:
+            return slug
+
+        changed = or_(*[getattr(Novel, field).is_distinct_from(value) for field, value in values.items()])
+        updated_slug = session.execute(
+            update(Novel)
+            .where(Novel.user_id == user_id, Novel.slug == slug, changed)
+            .values(**values)
+            .returning(Novel.slug)
+        ).scalar()
+        return updated_slug or slug
+
 def delete_novel_db(user_id, slug):
 
     with db_session_scope() as session:
@@ -114,11 +243,70 @@ def find_novel_by_source_url_db(user_id, source_url):
         ).first()
         return novel.to_dict() if novel else None
 
+def normalize_source_url(source_url):
+
+    if not source_url:
+        return ''
+    return source_url.split('?')[0].rstrip('/')
+
+def find_import_novel_db(user_id, title=None, source_url=None):
+
+    columns = (Novel.id, Novel.slug, Novel.title, Novel.original_title, Novel.translated_title, Novel.source_url)
+    
+    with db_session_scope() as session:
+        row = None
+        title = title.strip() if title else ''
+        
+        if title:
+            row = session.query(*columns).filter(
+                and_(
+                    Novel.user_id == user_id,
+                    or_(Novel.title == title, Novel.original_title == title, Novel.translated_title == title)
+                )
+            ).order_by(Novel.id).first()
+        
+        normalized_url = normalize_source_url(source_url)
+        
+        if not row and normalized_url:
+            row = session.query(*columns).filter(
+                and_(
+                    Novel.user_id == user_id,
+                    or_(
+                        Novel.source_url == normalized_url,
+                        Novel.source_url == normalized_url + '/',
+                        Novel.source_url.startswith(normalized_url + '?', autoescape=True),
+                        Novel.source_url.startswith(normalized_url + '/?', autoescape=True)
+                    )
+                )
+            ).order_by(Novel.id).first()
+        
+        if not row and len(normalized_url) > 20:
+            candidates = session.query(*columns).filter(
+                and_(Novel.user_id == user_id, Novel.source_url.isnot(None), Novel.source_url != '')
+            ).order_by(Novel.id).all()
+            for candidate in candidates:
+                novel_url = normalize_source_url(candidate.source_url)
+                if len(novel_url) > 20 and (normalized_url in novel_url or novel_url in normalized_url):
+                    row = candidate
+                    break
+        
+        if not row:
+            return None
+        
+        return {
+            'id': row.id,
+            'slug': row.slug,
+            'title': row.title,
+            'original_title': row.original_title,
+            'translated_title': row.translated_title,
+            'source_url': row.source_url
+        }
+
 def get_next_chapter_position_db(novel_id):
 
     with db_session_scope() as session:
-        max_position = session.query(Chapter.position).filter_by(novel_id=novel_id).order_by(Chapter.position.desc()).first()
-        return (max_position[0] + 1) if max_position else 0
+        max_position = session.query(func.max(Chapter.position)).filter_by(novel_id=novel_id).scalar()
+        return (max_position + POSITION_GAP) if max_position is not None else POSITION_GAP
 
 def find_novel_by_title_db(user_id, title):
 
@@ -133,16 +321,54 @@ def find_novel_by_title_db(user_id, title):
         ).first()
         return novel.to_dict() if novel else None
 
-def parse_chapter_number(num_str):
+def rebalance_positions(session, novel_id):
+
+    session.flush()
+    session.execute(text("""
+        UPDATE chapters SET position = ranked.rn * :gap
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (ORDER BY position, id) AS rn
+            FROM chapters WHERE novel_id = :novel_id
+        ) AS ranked
+        WHERE chapters.id = ranked.id
+    """), {'gap': POSITION_GAP, 'novel_id': novel_id})
+    session.expire_all()
+
+def find_successor_position(session, novel_id, episode_id, number_key):
+
+    if episode_id is not None:
+        successor = session.query(Chapter.position).filter(
+            and_(Chapter.novel_id == novel_id, Chapter.episode_id > episode_id)
+        ).order_by(Chapter.episode_id, Chapter.position).first()
+    else:
+        successor = session.query(Chapter.position).filter(
+            and_(Chapter.novel_id == novel_id, Chapter.number_sort_key > number_key)
+        ).order_by(Chapter.number_sort_key, Chapter.position).first()
+    return successor[0] if successor else None
+
+def allocate_position(session, novel_id, before_position=None):
+
+    if before_position is None:
+        max_position = session.query(func.max(Chapter.position)).filter(
+            Chapter.novel_id == novel_id
+        ).scalar()
+        return POSITION_GAP if max_position is None else max_position + POSITION_GAP
+    
+    previous_position = session.query(func.max(Chapter.position)).filter(
+        and_(Chapter.novel_id == novel_id, Chapter.position < before_position)
+    ).scalar()
+    if previous_position is None:
+        previous_position = -1
+    
+    if before_position - previous_position > 1:
+        return (previous_position + before_position) // 2
+    return None
 
-    if not num_str:
-        return 999999.0
-    if num_str == 'BONUS':
-        return 999999.0
-    try:
-        return float(num_str)
-    except (ValueError, TypeError):
-        return 999999.0
+def count_chapters_before(session, novel_id, position):
+
+    return session.query(func.count(Chapter.id)).filter(
+        and_(Chapter.novel_id == novel_id, Chapter.position < position)
+    ).scalar() or 0
 
 def add_chapter_atomic(user_id, novel_slug, chapter_data):
 
@@ -156,7 +382,7 @@ def add_chapter_atomic(user_id, novel_slug, chapter_data):
         source_url = chapter_data.get('source_url')
         
         if source_url:
-            existing_chapter = session.query(Chapter).filter(
+            existing_chapter = session.query(Chapter.id, Chapter.position).filter(
                 and_(Chapter.novel_id == novel.id, Chapter.source_url == source_url)
             ).first()
             if existing_chapter:
@@ -165,65 +391,28 @@ def add_chapter_atomic(user_id, novel_slug, chapter_data):
                     'message': 'Chapter already exists - skipped',
                     'already_exists': True,
                     'novel_id': novel.slug,
-                    'chapter_index': existing_chapter.position,
+                    'chapter_index': count_chapters_before(session, novel.id, existing_chapter.position),
                     'chapter_id': existing_chapter.id
                 }
         
         position = chapter_data.get('position')
         
         if position is None:
-            new_episode_id = extract_episode_id_from_url(chapter_data.get('source_url'))
-            
-            
-            existing_chapters = session.query(Chapter).filter(
-                Chapter.novel_id == novel.id
-            ).order_by(Chapter.position).all()
-            
-            
-            insert_pos = len(existing_chapters)
-            
-            if new_episode_id is not None:
-                for idx, existing_ch in enumerate(existing_chapters):
-                    existing_episode_id = extract_episode_id_from_url(existing_ch.source_url)
-                    
-                    
-                    if existing_episode_id is None:
-                        continue
-                    
-                    if new_episode_id < existing_episode_id:
-                        insert_pos = idx
-                        break
-            else:
-                new_chapter_num = parse_chapter_number(chapter_data.get('chapter_number'))
-                
-                for idx, existing_ch in enumerate(existing_chapters):
-                    existing_ch_num = parse_chapter_number(existing_ch.chapter_number)
-                    
-                    if new_chapter_num < existing_ch_num:
-                        insert_pos = idx
-                        break
-            
-            
-            if insert_pos < len(existing_chapters):
-                
-                chapters_to_shift = session.query(Chapter).filter(
-                    and_(Chapter.novel_id == novel.id, Chapter.position >= insert_pos)
-                ).order_by(Chapter.position.desc()).all()
-                
-                for ch in chapters_to_shift:
-                    temp_position = -(ch.position + 1000)                                            
-                    ch.position = temp_position
-                
-                session.flush()
-                
-                for ch in chapters_to_shift:
-                    original_position = abs(ch.position) - 1000
-                    final_position = original_position + 1
-                    ch.position = final_position
-                
-                session.flush()
+            successor_position = find_successor_position(
+                session, novel.id,
+                extract_episode_id_from_url(source_url),
+                parse_chapter_number(chapter_data.get('chapter_number'))
+            )
+            position = allocate_position(session, novel.id, successor_position)
             
-            position = insert_pos
+            if position is None:
+                rebalance_positions(session, novel.id)
+                successor_position = find_successor_position(
+                    session, novel.id,
+                    extract_episode_id_from_url(source_url),
+                    parse_chapter_number(chapter_data.get('chapter_number'))
+                )
+                position = allocate_position(session, novel.id, successor_position)
         
         new_chapter = Chapter(
             novel_id=novel.id,
@@ -241,22 +430,199 @@ def add_chapter_atomic(user_id, novel_slug, chapter_data):
         session.add(new_chapter)
         session.flush()
         
-        
-        verify_order(session, novel.id)
-        
         return {
             'success': True,
             'message': 'Chapter imported successfully',
             'novel_id': novel.slug,
-            'chapter_index': new_chapter.position,
+            'chapter_index': count_chapters_before(session, novel.id, new_chapter.position),
             'chapter_id': new_chapter.id
         }
 
-def verify_order(session, novel_id):
+def plan_bulk_positions(existing, new_chapters):
 
-    chapters = session.query(Chapter).filter_by(novel_id=novel_id).order_by(Chapter.position).all()
-    for ch in chapters:
-        episode_id = extract_episode_id_from_url(ch.source_url)
+    existing = sorted(existing, key=lambda ch: ch['position'])
+    existing_positions = [ch['position'] for ch in existing]
+    by_episode = sorted((ch['episode_id'], ch['position']) for ch in existing if ch['episode_id'] is not None)
+    by_number = sorted((ch['number_sort_key'], ch['position']) for ch in existing if ch['number_sort_key'] is not None)
+    
+    runs = {}
+    for order, chapter in enumerate(new_chapters):
+        if chapter['episode_id'] is not None:
+            idx = bisect_right(by_episode, (chapter['episode_id'], float('inf')))
+            successor = by_episode[idx][1] if idx < len(by_episode) else None
+        else:
+            idx = bisect_right(by_number, (chapter['number_sort_key'], float('inf')))
+            successor = by_number[idx][1] if idx < len(by_number) else None
+        runs.setdefault(successor, []).append((
+            chapter['episode_id'] is None,
+            chapter['episode_id'] or 0,
+            chapter['number_sort_key'],
+            order
+        ))
+    
+    new_positions = {}
+    fits = True
+    for successor, members in runs.items():
+        members.sort()
+        if successor is None:
+            start = existing_positions[-1] if existing_positions else 0
+            for offset, member in enumerate(members, start=1):
+                new_positions[member[3]] = start + offset * POSITION_GAP
+            continue
+        
+        idx = bisect_left(existing_positions, successor)
+        previous = existing_positions[idx - 1] if idx > 0 else -1
+        step = (successor - previous) // (len(members) + 1)
+        if step < 1:
+            fits = False
+            break
+        for offset, member in enumerate(members, start=1):
+            new_positions[member[3]] = previous + offset * step
+    
+    if fits:
+        return new_positions, {}
+    
+    merged = []
+    for ch in existing:
+        for member in sorted(runs.pop(ch['position'], [])):
+            merged.append(('new', member[3]))
+        merged.append(('existing', ch['id']))
+    for member in sorted(runs.get(None, [])):
+        merged.append(('new', member[3]))
+    
+    new_positions = {}
+    moved = {}
+    current = {ch['id']: ch['position'] for ch in existing}
+    for rank, (kind, key) in enumerate(merged, start=1):
+        position = rank * POSITION_GAP
+        if kind == 'new':
+            new_positions[key] = position
+        elif current[key] != position:
+            moved[key] = position
+    return new_positions, moved
+
+def bulk_insert_chapters(session, novel, chapters_data):
+
+    existing = [
+        {
+            'id': row.id,
+            'source_url': row.source_url,
+            'episode_id': row.episode_id,
+            'number_sort_key': row.number_sort_key,
+            'position': row.position
+        }
+        for row in session.query(
+            Chapter.id, Chapter.source_url, Chapter.episode_id,
+            Chapter.number_sort_key, Chapter.position
+        ).filter(Chapter.novel_id == novel.id)
+    ]
+    existing_by_url = {ch['source_url']: ch for ch in existing if ch['source_url']}
+    
+    results = [None] * len(chapters_data)
+    rows = []
+    row_slots = []
+    seen_urls = {}
+    seen_slugs = set()
+    
+    for slot, chapter_data in enumerate(chapters_data):
+        source_url = chapter_data.get('source_url')
+        if source_url and source_url in existing_by_url:
+            results[slot] = {'already_exists': True, 'existing_id': existing_by_url[source_url]['id']}
+            continue
+        if source_url and source_url in seen_urls:
+            results[slot] = {'already_exists': True, 'duplicate_of': seen_urls[source_url]}
+            continue
+        
+        slug = chapter_data['slug']
+        if slug in seen_slugs:
+            slug = f"{slug}_{slot}"
+        seen_slugs.add(slug)
+        
+        if source_url:
+            seen_urls[source_url] = len(rows)
+        rows.append({
+            'novel_id': novel.id,
+            'slug': slug,
+            'title': chapter_data.get('title', ''),
+            'original_title': chapter_data.get('original_title'),
+            'translated_title': chapter_data.get('translated_title'),
+            'chapter_number': chapter_data.get('chapter_number'),
+            'content': chapter_data.get('content', ''),
+            'images': chapter_data.get('images', []),
+            'source_url': source_url,
+            'episode_id': extract_episode_id_from_url(source_url),
+            'number_sort_key': parse_chapter_number(chapter_data.get('chapter_number')),
+            'is_bonus': chapter_data.get('is_bonus', False)
+        })
+        row_slots.append(slot)
+    
+    new_positions, moved = plan_bulk_positions(existing, rows)
+    
+    if moved:
+        session.bulk_update_mappings(Chapter, [
+            {'id': chapter_id, 'position': position} for chapter_id, position in moved.items()
+        ])
+        for ch in existing:
+            ch['position'] = moved.get(ch['id'], ch['position'])
+    
+    for order, row in enumerate(rows):
+        row['position'] = new_positions[order]
+    
+    inserted_ids = []
+    if rows:
+        inserted_ids = session.execute(
+            insert(Chapter).returning(Chapter.id, sort_by_parameter_order=True),
+            rows
+        ).scalars().all()
+    
+    all_positions = sorted([ch['position'] for ch in existing] + [row['position'] for row in rows])
+    existing_positions = {ch['id']: ch['position'] for ch in existing}
+    
+    for order, slot in enumerate(row_slots):
+        results[slot] = {
+            'success': True,
+            'message': 'Chapter imported successfully',
+            'novel_id': novel.slug,
+            'chapter_index': bisect_left(all_positions, rows[order]['position']),
+            'chapter_id': inserted_ids[order]
+        }
+    
+    for slot, result in enumerate(results):
+        if 'existing_id' in result:
+            chapter_id = result['existing_id']
+            position = existing_positions[chapter_id]
+        elif 'duplicate_of' in result:
+            chapter_id = inserted_ids[result['duplicate_of']]
+            position = rows[result['duplicate_of']]['position']
+        else:
+            continue
+        results[slot] = {
+            'success': True,
+            'message': 'Chapter already exists - skipped',
+            'already_exists': True,
+            'novel_id': novel.slug,
+            'chapter_index': bisect_left(all_positions, position),
+            'chapter_id': chapter_id
+        }
+    
+    return results
+
+def bulk_add_chapters_db(user_id, chapters_by_novel):
+
+    results = {}
+    with db_session_scope() as session:
+        for novel_slug, chapters_data in chapters_by_novel.items():
+            try:
+                with session.begin_nested():
+                    novel = session.query(Novel).filter(
+                        and_(Novel.user_id == user_id, Novel.slug == novel_slug)
+                    ).with_for_update().first()
+                    if not novel:
+                        raise ValueError(f"Novel not found: {novel_slug}")
+                    results[novel_slug] = bulk_insert_chapters(session, novel, chapters_data)
+            except Exception as e:
+                results[novel_slug] = [{'success': False, 'error': str(e)} for _ in chapters_data]
+    return results
 
 def create_chapter_db(user_id, novel_slug, chapter_data):
 
@@ -265,13 +631,13 @@ def create_chapter_db(user_id, novel_slug, chapter_data):
 def get_chapter_db(chapter_id):
 
     with db_session_scope() as session:
-        chapter = session.query(Chapter).filter_by(id=chapter_id).first()
+        chapter = session.query(Chapter).options(undefer_group('body')).filter_by(id=chapter_id).first()
         return chapter.to_dict(include_content=True) if chapter else None
 
 def update_chapter_db(chapter_id, updates):
 
     with db_session_scope() as session:
-        chapter = session.query(Chapter).filter_by(id=chapter_id).first()
+        chapter = session.query(Chapter).options(undefer_group('body')).filter_by(id=chapter_id).first()
         if not chapter:
             return None
         
@@ -311,23 +677,12 @@ def get_chapters_for_novel_db(user_id, novel_slug):
         if not novel:
             return []
         
-        chapters = session.query(Chapter).filter_by(
+        chapters = session.query(Chapter).options(undefer_group('body')).filter_by(
             novel_id=novel.id
         ).order_by(Chapter.position).all()
         
         return [c.to_dict(include_content=True) for c in chapters]
 
-def extract_episode_id_from_url(source_url):
-
-    if not source_url:
-        return None
-    
-    import re
-    match = re.search(r'/viewer/(\d+)', source_url)
-    if match:
-        return int(match.group(1))
-    return None
-
 def debug_chapter_positions(session, novel_id):
 
     chapters = session.query(Chapter).filter_by(novel_id=novel_id).order_by(Chapter.position).all()
@@ -2,12 +2,12 @@
 
 import os
 from database.db_novel import (
-    get_user_novels_db, get_novel_db, get_novel_with_chapters_db,
+    get_user_novels_db, get_library_summary_db, get_novel_db, get_novel_with_chapters_db,
     create_novel_db, update_novel_db, delete_novel_db,
     create_chapter_db, update_chapter_db, delete_chapter_db,
     find_novel_by_source_url_db, get_next_chapter_position_db
 )
-from database.db_models import Novel as NovelModel
+from database.db_models import Novel as NovelModel, extract_episode_id_from_url, parse_chapter_number
 
 DATA_DIR = 'data'
 
@@ -35,6 +35,72 @@ def load_novels(user_id):
     
     return novels_dict
 
+def load_library_summary(user_id):
+
+    return {novel['slug']: novel for novel in get_library_summary_db(user_id)}
+
+def _novel_column_values(novel):
+
+    return {
+        'title': novel.get('title') or novel.get('translated_title', ''),
+        'original_title': novel.get('original_title'),
+        'translated_title': novel.get('translated_title'),
+        'author': novel.get('author'),
+        'translated_author': novel.get('translated_author'),
+        'cover_url': novel.get('cover_image'),
+        'tags': novel.get('tags', []),
+        'translated_tags': novel.get('translated_tags', []),
+        'synopsis': novel.get('synopsis'),
+        'translated_synopsis': novel.get('translated_synopsis'),
+        'glossary': novel.get('glossary', {}),
+        'source_url': novel.get('source_url')
+    }
+
+def _chapter_column_values(chapter):
+
+    return {
+        'title': chapter.get('title') or chapter.get('translated_title', ''),
+        'original_title': chapter.get('original_title'),
+        'translated_title': chapter.get('translated_title'),
+        'chapter_number': chapter.get('chapter_number'),
+        'content': chapter.get('content', ''),
+        'images': chapter.get('images', []),
+        'source_url': chapter.get('source_url'),
+        'position': chapter.get('position', 0),
+        'is_bonus': chapter.get('is_bonus', False)
+    }
+
+def _chapter_changes(existing, values):
+
+    import hashlib
+    
+    changes = {}
+    for field, value in values.items():
+        if field == 'content':
+            digest = hashlib.md5((value or '').encode('utf-8')).hexdigest()
+            if digest != existing.content_md5:
+                changes[field] = value
+        elif field == 'translated_title':
+                                                                                  
+            if value != (existing.translated_title or existing.title):
+                changes[field] = value
+        elif field == 'images':
+            if (value or []) != (existing.images or []):
+                changes[field] = value
+        elif value != getattr(existing, field):
+            changes[field] = value
+    
+    if 'source_url' in changes:
+        changes['episode_id'] = extract_episode_id_from_url(changes['source_url'])
+    if 'chapter_number' in changes:
+        changes['number_sort_key'] = parse_chapter_number(changes['chapter_number'])
+    return changes
+
+def save_novel_changes(user_id, novel_slug, changes):
+
+    from database.db_novel import update_novel_changes_db
+    return update_novel_changes_db(user_id, novel_slug, changes)
+
 def save_novels(user_id, novels):
 
     import logging
@@ -44,13 +110,11 @@ def save_novels(user_id, novels):
     
     from database.database import db_session_scope
     from database.db_models import Novel, Chapter
+    from sqlalchemy import func
     
     try:
         with db_session_scope() as session:
             for novel_slug, novel in novels.items():
-                logger.info(f"Processing novel: {novel_slug}")
-                logger.info(f"Novel has {len(novel.get('chapters', []))} chapters")
-                
                 existing_novel = session.query(Novel).filter_by(
                     user_id=user_id, slug=novel_slug
                 ).first()
@@ -71,96 +135,76 @@ def save_novels(user_id, novels):
                             user_id=user_id, title=korean_title
                         ).first()
                 
+                novel_values = _novel_column_values(novel)
+                
                 if existing_novel:
-                    existing_novel.title = novel.get('title') or novel.get('translated_title', '')
-                    existing_novel.original_title = novel.get('original_title')
-                    existing_novel.translated_title = novel.get('translated_title')
-                    existing_novel.author = novel.get('author')
-                    existing_novel.translated_author = novel.get('translated_author')
-                    existing_novel.cover_url = novel.get('cover_image')
-                    existing_novel.tags = novel.get('tags', [])
-                    existing_novel.translated_tags = novel.get('translated_tags', [])
-                    existing_novel.synopsis = novel.get('synopsis')
-                    existing_novel.translated_synopsis = novel.get('translated_synopsis')
-                    existing_novel.glossary = novel.get('glossary', {})
-                    existing_novel.source_url = novel.get('source_url')
+                                                                                            
+                    for field, value in novel_values.items():
+                        if getattr(existing_novel, field) != value:
+                            setattr(existing_novel, field, value)
                     
                     new_slug = novel.get('slug')
-                    if new_slug and new_slug != novel_slug:
+                    if new_slug and new_slug != existing_novel.slug:
                         existing_novel.slug = new_slug
                         logger.info(f"Updated novel slug from {novel_slug} to {new_slug}")
                     
                     novel_id = existing_novel.id
-                    logger.info(f"Updated existing novel ID: {novel_id}")
+                    is_new_novel = False
                 else:
-                    new_novel = Novel(
-                        user_id=user_id,
-                        slug=novel_slug,
-                        title=novel.get('title') or novel.get('translated_title', ''),
-                        original_title=novel.get('original_title'),
-                        translated_title=novel.get('translated_title'),
-                        author=novel.get('author'),
-                        translated_author=novel.get('translated_author'),
-                        cover_url=novel.get('cover_image'),
-                        tags=novel.get('tags', []),
-                        translated_tags=novel.get('translated_tags', []),
-                        synopsis=novel.get('synopsis'),
-                        translated_synopsis=novel.get('translated_synopsis'),
-                        glossary=novel.get('glossary', {}),
-                        source_url=novel.get('source_url')
-                    )
+                    new_novel = Novel(user_id=user_id, slug=novel_slug, **novel_values)
                     session.add(new_novel)
                     session.flush()          
                     novel_id = new_novel.id
+                    is_new_novel = True
                     logger.info(f"Created new novel ID: {novel_id}")
                 
                 chapters = novel.get('chapters', [])
-                logger.info(f"Chapters type: {type(chapters)}, count: {len(chapters) if isinstance(chapters, list) else 'N/A'}")
+                if not isinstance(chapters, list) or not chapters:
+                    continue
                 
-                if isinstance(chapters, list):
-                    for idx, chapter in enumerate(chapters):
-                        if not chapter:                      
-                            logger.warning(f"Skipping None chapter at index {idx}")
-                            continue
-                        
-                        chapter_slug = chapter.get('slug')
-                        if not chapter_slug:
-                            logger.warning(f"Skipping chapter without slug at index {idx}")
-                            continue
-                        
-                        logger.info(f"Processing chapter: {chapter_slug}")
-                        
-                        existing_chapter = session.query(Chapter).filter_by(
-                            novel_id=novel_id, slug=chapter_slug
-                        ).first()
-                        
-                        if existing_chapter:
-                            existing_chapter.title = chapter.get('title') or chapter.get('translated_title', '')
-                            existing_chapter.original_title = chapter.get('original_title')
-                            existing_chapter.translated_title = chapter.get('translated_title')
-                            existing_chapter.chapter_number = chapter.get('chapter_number')
-                            existing_chapter.content = chapter.get('content', '')
-                            existing_chapter.images = chapter.get('images', [])
-                            existing_chapter.source_url = chapter.get('source_url')
-                            existing_chapter.position = chapter.get('position', 0)
-                            existing_chapter.is_bonus = chapter.get('is_bonus', False)
-                            logger.info(f"Updated chapter: {chapter_slug}")
-                        else:
-                            new_chapter = Chapter(
-                                novel_id=novel_id,
-                                slug=chapter_slug,
-                                title=chapter.get('title') or chapter.get('translated_title', ''),
-                                original_title=chapter.get('original_title'),
-                                translated_title=chapter.get('translated_title'),
-                                chapter_number=chapter.get('chapter_number'),
-                                content=chapter.get('content', ''),
-                                images=chapter.get('images', []),
-                                source_url=chapter.get('source_url'),
-                                position=chapter.get('position', 0),
-                                is_bonus=chapter.get('is_bonus', False)
-                            )
-                            session.add(new_chapter)
-                            logger.info(f"Created new chapter: {chapter_slug}")
+                existing_chapters = {}
+                if not is_new_novel:
+                                                                                                         
+                    rows = session.query(
+                        Chapter.id, Chapter.slug, Chapter.title, Chapter.original_title,
+                        Chapter.translated_title, Chapter.chapter_number, Chapter.images,
+                        Chapter.source_url, Chapter.position, Chapter.is_bonus,
+                        func.md5(func.coalesce(Chapter.content, '')).label('content_md5')
+                    ).filter(Chapter.novel_id == novel_id).all()
+                    existing_chapters = {row.slug: row for row in rows}
+                
+                updates = []
+                created = 0
+                for idx, chapter in enumerate(chapters):
+                    if not chapter:                      
+                        logger.warning(f"Skipping None chapter at index {idx}")
+                        continue
+                    
+                    chapter_slug = chapter.get('slug')
+                    if not chapter_slug:
+                        logger.warning(f"Skipping chapter without slug at index {idx}")
+                        continue
+                    
+                    values = _chapter_column_values(chapter)
+                    existing_chapter = existing_chapters.get(chapter_slug)
+                    
+                    if existing_chapter:
+                        changes = _chapter_changes(existing_chapter, values)
+                        if changes:
+                            changes['id'] = existing_chapter.id
+                            updates.append(changes)
+                    else:
+                        session.add(Chapter(novel_id=novel_id, slug=chapter_slug, **values))
+                        created += 1
+                
+                                                                                         
+                for changes in updates:
+                    session.query(Chapter).filter(Chapter.id == changes.pop('id')).update(
+                        changes, synchronize_session=False
+                    )
+                
+                if updates or created:
+                    logger.info(f"Novel {novel_slug}: {len(updates)} chapters updated, {created} created")
         logger.info("save_novels completed successfully")
     except Exception as e:
         logger.error(f"Error in save_novels: {e}", exc_info=True)
@@ -239,17 +283,6 @@ def delete_chapter(user_id, novel_slug, chapter_index):
         
         session.delete(chapter_to_delete)
         session.flush()
-        
-        remaining_chapters = session.query(Chapter).filter_by(
-            novel_id=novel_obj.id
-        ).order_by(Chapter.position).all()
-        
-        
-        for idx, ch in enumerate(remaining_chapters):
-            if ch.position != idx:
-                ch.position = idx
-        
-        session.flush()
     
     return True
 
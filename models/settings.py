@@ -1,5 +1,14 @@
    
+import os
+import copy
+import json
 from services.encryption_service import decrypt_dict, is_encrypted, migrate_to_encrypted
+from services.cache_service import cache_get, cache_set, cache_delete
+
+SETTINGS_CACHE_TTL = int(os.getenv('SETTINGS_CACHE_TTL', '300'))
+SETTINGS_LOCAL_MAX_ENTRIES = 1000
+
+_local_settings = {}
 
 def get_default_settings():
                                            
@@ -49,43 +58,72 @@ def initialize_user_settings_file(user_id):
            
     pass
 
+def _settings_cache_key(user_id):
+
+    return f"settings:{user_id.lower()}"
+
+def _decode_settings(raw_settings):
+
+    data = dict(raw_settings or {})
+    
+    defaults = get_default_settings()
+    for key, value in defaults.items():
+        if key not in data:
+            data[key] = value
+    
+    if data.get('encryption_enabled', True):
+        api_keys = data.get('api_keys', {})
+        any_encrypted = any(
+            is_encrypted(key) 
+            for key in api_keys.values() 
+            if key
+        )
+        
+        if any_encrypted:
+            data['api_keys'] = decrypt_dict(api_keys)
+    
+    return data
+
+def invalidate_settings_cache(user_id):
+
+    _local_settings.pop(user_id.lower(), None)
+    cache_delete(_settings_cache_key(user_id))
+
 def load_settings(user_id):
            
     try:
         from database.database import db_session_scope
         from database.db_models import User as DBUser
+        from sqlalchemy import func
         
-        with db_session_scope() as session:
-                                                             
-            user = session.query(DBUser).filter(
-                DBUser.username.ilike(user_id)
-            ).first()
+        cache_key = _settings_cache_key(user_id)
+        local_key = user_id.lower()
+        
+                                                                                   
+        raw = cache_get(cache_key)
+        entry = _local_settings.get(local_key)
+        if raw is not None and entry and entry['raw'] == raw:
+            return copy.deepcopy(entry['data'])
+        
+        if raw is None:
+            with db_session_scope() as session:
+                row = session.query(DBUser.settings).filter(
+                    func.lower(DBUser.username) == local_key
+                ).first()
             
-            if not user:
+            if not row:
                 return get_default_settings()
             
-                                        
-            data = user.settings or {}
-            
-                                                          
-            defaults = get_default_settings()
-            for key, value in defaults.items():
-                if key not in data:
-                    data[key] = value
-            
-                                                       
-            if data.get('encryption_enabled', True):
-                api_keys = data.get('api_keys', {})
-                any_encrypted = any(
-                    is_encrypted(key) 
-                    for key in api_keys.values() 
-                    if key
-                )
-                
-                if any_encrypted:
-                    data['api_keys'] = decrypt_dict(api_keys)
-            
-            return data
+            raw = json.dumps(row.settings or {}, sort_keys=True).encode('utf-8')
+            cache_set(cache_key, raw, SETTINGS_CACHE_TTL)
+        
+        data = _decode_settings(json.loads(raw))
+        
+        if len(_local_settings) >= SETTINGS_LOCAL_MAX_ENTRIES:
+            _local_settings.clear()
+        _local_settings[local_key] = {'raw': raw, 'data': data}
+        
+        return copy.deepcopy(data)
             
     except Exception as e:
                                            
@@ -98,6 +136,7 @@ def save_settings(user_id, settings):
     try:
         from database.database import db_session_scope
         from database.db_models import User as DBUser
+        from sqlalchemy import func
         
                                         
         settings_to_save = settings.copy()
@@ -108,7 +147,7 @@ def save_settings(user_id, settings):
         with db_session_scope() as session:
                                                              
             user = session.query(DBUser).filter(
-                DBUser.username.ilike(user_id)
+                func.lower(DBUser.username) == user_id.lower()
             ).first()
             
             if not user:
@@ -117,8 +156,10 @@ def save_settings(user_id, settings):
                                          
             user.settings = settings_to_save
             session.commit()
+        
+        invalidate_settings_cache(user_id)
             
     except Exception as e:
         import traceback
         traceback.print_exc()
-        raise
\ No newline at end of file
+        raise
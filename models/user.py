@@ -3,6 +3,7 @@ import os
 import hashlib
 import secrets
 from datetime import datetime, timedelta
+from sqlalchemy import func
 
 DATA_DIR = 'data'
 USERS_FILE = os.path.join(DATA_DIR, 'users.json')
@@ -200,7 +201,7 @@ def get_user_info(user_id):
         with db_session_scope() as session:
                                                              
             user = session.query(DBUser).filter(
-                DBUser.username.ilike(user_id)
+                func.lower(DBUser.username) == user_id.lower()
             ).first()
             
             if not user:
@@ -226,7 +227,7 @@ def update_user_email(user_id, new_email):
         with db_session_scope() as session:
                                                              
             user = session.query(DBUser).filter(
-                DBUser.username.ilike(user_id)
+                func.lower(DBUser.username) == user_id.lower()
             ).first()
             
             if not user:
@@ -264,7 +265,7 @@ def update_user_password(user_id, old_password, new_password):
         with db_session_scope() as session:
                                                              
             user = session.query(DBUser).filter(
-                DBUser.username.ilike(user_id)
+                func.lower(DBUser.username) == user_id.lower()
             ).first()
             
             if not user:
@@ -392,7 +393,7 @@ def reset_password_with_token(reset_token, new_password):
             
                                            
             user = session.query(DBUser).filter(
-                DBUser.username.ilike(reset.user_id)
+                func.lower(DBUser.username) == reset.user_id.lower()
             ).first()
             
             if not user:
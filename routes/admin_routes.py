@@ -8,6 +8,9 @@ from sqlalchemy import or_
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
+USERS_PER_PAGE = 50
+USERS_MAX_PER_PAGE = 200
+
 @admin_bp.before_request
 def check_admin_auth():
 
@@ -47,55 +50,66 @@ def get_users():
     try:
         username = session.get('username')
         search_query = request.args.get('search', '').strip()
+        page = max(request.args.get('page', 1, type=int) or 1, 1)
+        per_page = min(max(request.args.get('per_page', USERS_PER_PAGE, type=int) or USERS_PER_PAGE, 1), USERS_MAX_PER_PAGE)
         
         from database.db_models import User, Novel, TranslationTokenUsage
-        from sqlalchemy import func
+        from sqlalchemy import func, select
         
         with db_session_scope() as db_session:
-                        
-            query = db_session.query(User)
+            owner = func.lower(User.username)
             
-                                 
+                                                                                        
+            novel_count = select(func.count(Novel.id)).where(
+                Novel.user_id == owner
+            ).correlate(User).scalar_subquery()
+            
+            webtoon_count = select(func.count(WebtoonJob.id)).where(
+                WebtoonJob.user_id == owner
+            ).correlate(User).scalar_subquery()
+            
+            token_usage = select(func.coalesce(func.sum(TranslationTokenUsage.total_tokens), 0)).where(
+                TranslationTokenUsage.user_id == owner
+            ).correlate(User).scalar_subquery()
+            
+            filters = []
             if search_query:
                 search_pattern = f"%{search_query}%"
-                query = query.filter(
+                filters.append(
                     or_(
                         User.username.ilike(search_pattern),
                         User.email.ilike(search_pattern)
                     )
                 )
             
-            users = query.order_by(User.created_at.desc()).all()
+            total_count = db_session.query(func.count(User.id)).filter(*filters).scalar() or 0
+            
+            rows = db_session.query(
+                User,
+                novel_count.label('novel_count'),
+                webtoon_count.label('webtoon_count'),
+                token_usage.label('total_tokens')
+            ).filter(*filters).order_by(
+                User.created_at.desc(), User.id.desc()
+            ).offset((page - 1) * per_page).limit(per_page).all()
             
-                                             
             user_list = []
-            for user in users:
-                                            
-                novel_count = db_session.query(func.count(Novel.id)).filter(
-                    Novel.user_id == user.username.lower()
-                ).scalar() or 0
-
-                webtoon_count = db_session.query(func.count(WebtoonJob.id)).filter(
-                    WebtoonJob.user_id == user.username.lower()
-                ).scalar() or 0
-                
-                                       
-                token_usage = db_session.query(func.sum(TranslationTokenUsage.total_tokens)).filter(
-                    TranslationTokenUsage.user_id == user.username.lower()
-                ).scalar() or 0
-                
+            for user, user_novels, user_webtoons, user_tokens in rows:
                 user_data = user.to_dict()
-                user_data['novel_count'] = novel_count
-                user_data['webtoon_count'] = webtoon_count
-                user_data['total_tokens'] = int(token_usage)
+                user_data['novel_count'] = user_novels or 0
+                user_data['webtoon_count'] = user_webtoons or 0
+                user_data['total_tokens'] = int(user_tokens or 0)
                 user_list.append(user_data)
             
-            log_admin_action(username, f"Listed users (search: '{search_query}' if search_query else 'none')")
+            log_admin_action(username, f"Listed users (search: '{search_query}' if search_query else 'none', page {page})")
             
             return jsonify({
                 'success': True,
                 'users': user_list,
-                'total_count': len(user_list)
+                'total_count': total_count,
+                'page': page,
+                'per_page': per_page,
+                'total_pages': (total_count + per_page - 1) // per_page
             })
             
     except Exception as e:
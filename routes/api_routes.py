@@ -1,11 +1,12 @@
-from flask import Blueprint, request, jsonify, send_file, session
+from flask import Blueprint, request, jsonify, send_file, session, Response, stream_with_context
 from datetime import datetime
+from sqlalchemy.orm import undefer_group
 from models.novel import (
-    load_novels, save_novels, get_novel_glossary, 
+    load_novels, save_novels, save_novel_changes, get_novel_glossary, 
     save_novel_glossary, delete_novel, delete_chapter, sort_chapters_by_number
 )
 from models.settings import load_settings, save_settings
-from services.ai_service import translate_text, detect_characters, translate_names, detect_character_genders
+from services.ai_service import translate_text, stream_translate_text, detect_characters, translate_names, detect_character_genders
 from services.image_service import download_image, extract_images_from_content, delete_images_for_chapter, get_user_images_dir
 from services.export_service import export_to_epub, export_to_pdf
 from services.token_usage_service import save_token_usage, estimate_translation_tokens
@@ -18,7 +19,7 @@ from utils.auth_decorator import require_auth
 from utils.csrf_utils import csrf
 import os
 import re
-import hashlib
+import json
 import threading
 import time
 
@@ -35,13 +36,6 @@ def get_user_id():
 
     return session.get('user_id')
 
-translation_cache = {}
-MAX_CACHE_SIZE = 100
-
-def get_cache_key(text):
-
-    return hashlib.md5(text.encode('utf-8')).hexdigest()
-
 user_import_semaphores = {}
 user_semaphore_lock = threading.Lock()
 
@@ -64,39 +58,6 @@ def slugify_english(text):
     
     return text or 'unknown_novel'
 
-def find_novel_by_korean_title(novels, korean_title):
-
-    if not korean_title:
-        return None
-    
-    korean_title = korean_title.strip()
-    
-    for novel_id, novel in novels.items():
-        if novel.get('title') == korean_title:
-            return novel_id
-    
-    return None
-
-def find_novel_by_source_url(novels, source_url):
-
-    if not source_url:
-        return None
-    
-    source_url = source_url.split('?')[0].rstrip('/')
-    
-    for novel_id, novel in novels.items():
-        novel_url = novel.get('novel_source_url', '')
-        if novel_url:
-            novel_url = novel_url.split('?')[0].rstrip('/')
-            if novel_url == source_url:
-                return novel_id
-            
-            if len(source_url) > 20 and len(novel_url) > 20:
-                if source_url in novel_url or novel_url in source_url:
-                    return novel_id
-    
-    return None
-
 def recalculate_all_positions(chapters):
 
     if not chapters:
@@ -245,10 +206,9 @@ def import_chapter():
                 is_novel_page = '/novel/' in url_for_detection and '/viewer/' not in url_for_detection
             if not content and not is_novel_page:
                 return jsonify({'error': 'No content provided'}), 400
-            novels = load_novels(user_id)
-            novel_id = find_novel_by_korean_title(novels, original_title)
-            if not novel_id:
-                novel_id = find_novel_by_source_url(novels, novel_source_url)
+            from database.db_novel import find_import_novel_db
+            existing_novel = find_import_novel_db(user_id, title=original_title, source_url=novel_source_url)
+            novel_id = existing_novel['slug'] if existing_novel else None
             
             novel_translated_title = translated_title_from_extension
             translated_author = data.get('author', '')
@@ -258,17 +218,12 @@ def import_chapter():
             tags = data.get('tags', [])
             synopsis = data.get('synopsis', '')
             
-            if not novel_id:
-                 novel_id = find_novel_by_korean_title(novels, original_title)
-            if not novel_id:
-                novel_id = find_novel_by_source_url(novels, novel_source_url)
-
             if api_key:
                 try:
                     should_translate_title = True
                     
-                    if novel_id and novels[novel_id].get('translated_title'):
-                        existing_trans = novels[novel_id].get('translated_title')
+                    if existing_novel and existing_novel.get('translated_title'):
+                        existing_trans = existing_novel.get('translated_title')
                         if existing_trans != original_title and not has_korean(existing_trans):
                             novel_translated_title = existing_trans
                             should_translate_title = False
@@ -278,38 +233,24 @@ def import_chapter():
                         novel_translated_title = None
 
                     if should_translate_title and not novel_translated_title and original_title:
-                        cache_key = get_cache_key(f"title:{original_title}")
-                        if cache_key in translation_cache:
-                            novel_translated_title = translation_cache[cache_key]
-                        else:
-                            translated_title_result = translate_text(
-                                original_title, provider, api_key, selected_model,
-                                glossary=None, images=None
-                            )
-                            if isinstance(translated_title_result, dict):
-                                translated_title_result = translated_title_result.get('translated_text', '')
-                            if translated_title_result and not translated_title_result.startswith("Error") and not translated_title_result.startswith(provider.capitalize()):
-                                novel_translated_title = translated_title_result
-                                translation_cache[cache_key] = novel_translated_title
-                                if len(translation_cache) > MAX_CACHE_SIZE:
-                                    translation_cache.pop(next(iter(translation_cache)))
+                        translated_title_result = translate_text(
+                            original_title, provider, api_key, selected_model,
+                            glossary=None, images=None
+                        )
+                        if isinstance(translated_title_result, dict):
+                            translated_title_result = translated_title_result.get('translated_text', '')
+                        if translated_title_result and not translated_title_result.startswith("Error") and not translated_title_result.startswith(provider.capitalize()):
+                            novel_translated_title = translated_title_result
                     
                     if author:
-                        cache_key = get_cache_key(f"author:{author}")
-                        if cache_key in translation_cache:
-                            translated_author = translation_cache[cache_key]
-                        else:
-                            translated_author_result = translate_text(
-                                author, provider, api_key, selected_model,
-                                glossary=None, images=None
-                            )
-                            if isinstance(translated_author_result, dict):
-                                translated_author_result = translated_author_result.get('translated_text', '')
-                            if translated_author_result and not translated_author_result.startswith("Error") and not translated_author_result.startswith(provider.capitalize()):
-                                translated_author = translated_author_result
-                                translation_cache[cache_key] = translated_author
-                                if len(translation_cache) > MAX_CACHE_SIZE:
-                                    translation_cache.pop(next(iter(translation_cache)))
+                        translated_author_result = translate_text(
+                            author, provider, api_key, selected_model,
+                            glossary=None, images=None
+                        )
+                        if isinstance(translated_author_result, dict):
+                            translated_author_result = translated_author_result.get('translated_text', '')
+                        if translated_author_result and not translated_author_result.startswith("Error") and not translated_author_result.startswith(provider.capitalize()):
+                            translated_author = translated_author_result
                     
                     if tags:
                         tags_text = ', '.join(tags)
@@ -617,6 +558,7 @@ def translate():
         glossary = get_novel_glossary(user_id, novel_id) if novel_id else {}
         images = data.get('images', [])
         chapter_id = data.get('chapter_id')                                          
+        retranslate = bool(data.get('retranslate', False))
         
         result = translate_text(
             text,
@@ -626,7 +568,8 @@ def translate():
             glossary,
             images,
             is_thinking_mode=use_thinking_mode,
-            source_language=source_language
+            source_language=source_language,
+            use_cache=not retranslate
         )
         
         if isinstance(result, dict):
@@ -659,7 +602,9 @@ def translate():
                         input_tokens=token_usage_data.get('input_tokens', 0),
                         output_tokens=token_usage_data.get('output_tokens', 0),
                         total_tokens=token_usage_data.get('total_tokens', 0),
-                        translation_type='content'
+                        translation_type='content',
+                        cache_hit=token_usage_data.get('cache_hit', False),
+                        cached_tokens=token_usage_data.get('cached_tokens', 0)
                     )
                 except Exception as e:
                     pass
@@ -682,6 +627,139 @@ def translate():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _sse_event(event, data):
+
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@api_bp.route('/translate/stream', methods=['POST'])
+@require_auth
+def translate_stream():
+
+    from database.database import db_session_scope
+    from database.db_models import Chapter, Novel
+    from database.db_novel import update_chapter_db
+    
+    user_id = get_user_id()
+    data = request.json or {}
+    text = data.get('text', '')
+    novel_id = data.get('novel_id', '')
+    chapter_id = data.get('chapter_id')
+    source_language = data.get('source_language')
+    
+    if not text:
+        return jsonify({'error': 'No text provided'}), 400
+    
+    if chapter_id:
+        with db_session_scope() as db_session:
+            owned = db_session.query(Chapter.id).join(Novel, Chapter.novel_id == Novel.id).filter(
+                Chapter.id == chapter_id,
+                Novel.user_id == user_id
+            ).first()
+        if not owned:
+            return jsonify({'error': 'Chapter not found'}), 404
+    
+    settings = load_settings(user_id)
+    provider = settings.get('selected_provider', 'openrouter')
+    api_key = settings.get('api_keys', {}).get(provider, '')
+    selected_model = settings.get('provider_models', {}).get(provider, '')
+    
+    use_thinking_mode = data.get('use_thinking_mode', False)
+    if use_thinking_mode:
+        thinking_model = settings.get('thinking_mode_models', {}).get(provider)
+        if thinking_model:
+            selected_model = thinking_model
+    
+    glossary = get_novel_glossary(user_id, novel_id) if novel_id else {}
+    images = data.get('images', [])
+    retranslate = bool(data.get('retranslate', False))
+    
+    def generate():
+        
+        yield _sse_event('start', {'model_used': selected_model})
+        
+        for event in stream_translate_text(
+            text,
+            provider,
+            api_key,
+            selected_model,
+            glossary,
+            images,
+            is_thinking_mode=use_thinking_mode,
+            source_language=source_language,
+            use_cache=not retranslate
+        ):
+            if event['type'] == 'delta':
+                yield _sse_event('delta', {'text': event['text']})
+                continue
+            
+            if event['type'] == 'error':
+                yield _sse_event('error', {'error': event['error']})
+                return
+            
+            translated_text = event['translated_text']
+            token_usage_data = event.get('token_usage')
+            
+            if not (translated_text or '').strip():
+                yield _sse_event('error', {'error': 'Translation came back empty'})
+                return
+            
+            cost_info = None
+            if token_usage_data:
+                cost_info = calculate_cost(
+                    token_usage_data.get('input_tokens', 0),
+                    token_usage_data.get('output_tokens', 0),
+                    token_usage_data.get('provider', provider),
+                    token_usage_data.get('model', selected_model)
+                )
+            
+            saved = False
+            if chapter_id:
+                try:
+                    update_chapter_db(chapter_id, {
+                        'translated_content': translated_text,
+                        'translation_model': selected_model,
+                        'translation_status': 'completed',
+                        'translation_completed_at': datetime.utcnow()
+                    })
+                    saved = True
+                except Exception as e:
+                    pass
+                
+                if token_usage_data:
+                    try:
+                        save_token_usage(
+                            user_id=user_id,
+                            chapter_id=chapter_id,
+                            provider=token_usage_data.get('provider', provider),
+                            model=token_usage_data.get('model', selected_model),
+                            input_tokens=token_usage_data.get('input_tokens', 0),
+                            output_tokens=token_usage_data.get('output_tokens', 0),
+                            total_tokens=token_usage_data.get('total_tokens', 0),
+                            translation_type='content',
+                            cache_hit=token_usage_data.get('cache_hit', False),
+                            cached_tokens=token_usage_data.get('cached_tokens', 0)
+                        )
+                    except Exception as e:
+                        pass
+            
+            yield _sse_event('done', {
+                'success': True,
+                'translated_text': translated_text,
+                'model_used': selected_model,
+                'token_usage': token_usage_data,
+                'cost_info': cost_info,
+                'saved': saved
+            })
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 @api_bp.route('/save-translation', methods=['POST'])
 @require_auth
 def save_translation():
@@ -1229,7 +1307,7 @@ def get_shared_chapter(token, chapter_number):
             if not novel:
                 return jsonify({'error': 'Novel not found or access revoked'}), 404
             
-            chapter = session.query(Chapter).filter(
+            chapter = session.query(Chapter).options(undefer_group('body')).filter(
                 Chapter.novel_id == novel.id,
                 Chapter.chapter_number == str(chapter_number)
             ).first()
@@ -1315,7 +1393,7 @@ def import_shared_novel():
                 }), 400
             
                                                                                       
-            shared_chapters_query = session.query(Chapter).filter(
+            shared_chapters_query = session.query(Chapter).options(undefer_group('body')).filter(
                 Chapter.novel_id == shared_novel.id
             ).order_by(Chapter.position).all()
             
@@ -1495,7 +1573,7 @@ def sync_shared_novel(novel_id):
                 return jsonify({'error': 'Original shared novel not found or no longer shared'}), 404
             
                                                     
-            shared_chapters_query = session.query(Chapter).filter(
+            shared_chapters_query = session.query(Chapter).options(undefer_group('body')).filter(
                 Chapter.novel_id == shared_novel.id
             ).order_by(Chapter.position).all()
             
@@ -2015,13 +2093,11 @@ def update_novel_title():
         if not novel_id or not translated_title:
             return jsonify({'error': 'Missing novel_id or translated_title'}), 400
         
-        novels = load_novels(user_id)
-        
-        if novel_id not in novels:
+        from database.db_novel import get_novel_db
+        if not get_novel_db(user_id, novel_id):
             return jsonify({'error': 'Novel not found'}), 404
         
-        novels[novel_id]['translated_title'] = translated_title
-        save_novels(user_id, novels)
+        save_novel_changes(user_id, novel_id, {'translated_title': translated_title})
         
         return jsonify({'success': True, 'message': 'Novel title updated'})
         
@@ -2113,6 +2189,95 @@ def task_status(task_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/novel/<novel_id>/batch-translate', methods=['POST'])
+@require_auth
+def create_batch_translation(novel_id):
+
+    try:
+        from urllib.parse import unquote
+        from services.batch_translation_service import create_batch_job
+        
+        user_id = get_user_id()
+        data = request.get_json() or {}
+        
+        settings = load_settings(user_id)
+        provider = settings.get('selected_provider', 'openrouter')
+        if not settings.get('api_keys', {}).get(provider):
+            return jsonify({'error': 'No API key configured'}), 400
+        
+        try:
+            start_index = int(data['start_index']) if data.get('start_index') is not None else None
+            end_index = int(data['end_index']) if data.get('end_index') is not None else None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid chapter range'}), 400
+        
+        # Only real JSON booleans; bool('false') would silently flip these options
+        flags = {}
+        for name, default in (('untranslated_only', False), ('translate_title', True), ('translate_content', True)):
+            value = data.get(name, default)
+            if not isinstance(value, bool):
+                return jsonify({'error': f'{name} must be true or false'}), 400
+            flags[name] = value
+        
+        result = create_batch_job(
+            user_id,
+            unquote(novel_id),
+            start_index=start_index,
+            end_index=end_index,
+            untranslated_only=flags['untranslated_only'],
+            translate_title=flags['translate_title'],
+            translate_content=flags['translate_content']
+        )
+        if not result.get('success'):
+            status_code = 404 if result.get('error') == 'Novel not found' else 400
+            return jsonify({'error': result.get('error')}), status_code
+        
+        return jsonify(result), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/batch-translate', methods=['GET'])
+@require_auth
+def list_batch_translations():
+
+    try:
+        from services.batch_translation_service import list_batch_jobs
+        
+        user_id = get_user_id()
+        jobs = list_batch_jobs(user_id, novel_slug=request.args.get('novel_id'))
+        return jsonify({'success': True, 'jobs': jobs})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/batch-translate/<job_id>', methods=['GET'])
+@require_auth
+def get_batch_translation(job_id):
+
+    try:
+        from services.batch_translation_service import get_batch_job
+        
+        job = get_batch_job(get_user_id(), job_id)
+        if not job:
+            return jsonify({'error': 'Batch job not found'}), 404
+        return jsonify({'success': True, 'job': job})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/batch-translate/<job_id>/<action>', methods=['POST'])
+@require_auth
+def control_batch_translation(job_id, action):
+
+    try:
+        from services.batch_translation_service import update_batch_job_status
+        
+        result = update_batch_job_status(get_user_id(), job_id, action)
+        if not result.get('success'):
+            status_code = 404 if result.get('error') == 'Batch job not found' else 400
+            return jsonify({'error': result.get('error')}), status_code
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/translate-novel-title', methods=['POST'])
 def translate_novel_title():
 
@@ -2150,12 +2315,11 @@ def translate_novel_title_sync():
         if not novel_id:
             return jsonify({'error': 'Novel ID required'}), 400
         
-        novels = load_novels(user_id)
-        if novel_id not in novels:
+        from database.db_novel import get_novel_db
+        novel = get_novel_db(user_id, novel_id)
+        if not novel:
             return jsonify({'error': f'Novel not found: {novel_id}'}), 404
         
-        novel = novels[novel_id]
-        
         korean_title = novel.get('title', '')
         korean_author = novel.get('author', '')
         korean_tags = novel.get('tags', [])
@@ -2176,38 +2340,24 @@ def translate_novel_title_sync():
         
         try:
             if korean_title:
-                cache_key = get_cache_key(f"title:{korean_title}")
-                if cache_key in translation_cache:
-                    translated_title = translation_cache[cache_key]
-                else:
-                    translated_title_result = translate_text(
-                        korean_title, provider, api_key, selected_model,
-                        glossary=None, images=None
-                    )
-                    if isinstance(translated_title_result, dict):
-                        translated_title_result = translated_title_result.get('translated_text', '')
-                    if translated_title_result and not translated_title_result.startswith("Error") and not translated_title_result.startswith(provider.capitalize()):
-                        translated_title = translated_title_result
-                        translation_cache[cache_key] = translated_title
-                        if len(translation_cache) > MAX_CACHE_SIZE:
-                            translation_cache.pop(next(iter(translation_cache)))
+                translated_title_result = translate_text(
+                    korean_title, provider, api_key, selected_model,
+                    glossary=None, images=None
+                )
+                if isinstance(translated_title_result, dict):
+                    translated_title_result = translated_title_result.get('translated_text', '')
+                if translated_title_result and not translated_title_result.startswith("Error") and not translated_title_result.startswith(provider.capitalize()):
+                    translated_title = translated_title_result
             
             if korean_author:
-                cache_key = get_cache_key(f"author:{korean_author}")
-                if cache_key in translation_cache:
-                    translated_author = translation_cache[cache_key]
-                else:
-                    translated_author_result = translate_text(
-                        korean_author, provider, api_key, selected_model,
-                        glossary=None, images=None
-                    )
-                    if isinstance(translated_author_result, dict):
-                        translated_author_result = translated_author_result.get('translated_text', '')
-                    if translated_author_result and not translated_author_result.startswith("Error") and not translated_author_result.startswith(provider.capitalize()):
-                        translated_author = translated_author_result
-                        translation_cache[cache_key] = translated_author
-                        if len(translation_cache) > MAX_CACHE_SIZE:
-                            translation_cache.pop(next(iter(translation_cache)))
+                translated_author_result = translate_text(
+                    korean_author, provider, api_key, selected_model,
+                    glossary=None, images=None
+                )
+                if isinstance(translated_author_result, dict):
+                    translated_author_result = translated_author_result.get('translated_text', '')
+                if translated_author_result and not translated_author_result.startswith("Error") and not translated_author_result.startswith(provider.capitalize()):
+                    translated_author = translated_author_result
             
             if korean_tags:
                 tags_text = ', '.join(korean_tags)
@@ -2234,12 +2384,12 @@ def translate_novel_title_sync():
         except Exception as e:
             pass
         
-        novels[novel_id]['translated_title'] = translated_title
-        novels[novel_id]['translated_author'] = translated_author
-        novels[novel_id]['translated_tags'] = translated_tags
-        novels[novel_id]['translated_synopsis'] = translated_synopsis
-        
-        save_novels(user_id, novels)
+        save_novel_changes(user_id, novel_id, {
+            'translated_title': translated_title,
+            'translated_author': translated_author,
+            'translated_tags': translated_tags,
+            'translated_synopsis': translated_synopsis
+        })
         
         return jsonify({
             'success': True,
@@ -2415,17 +2565,6 @@ def batch_delete_chapters():
                     deleted_count += 1
             
             session.flush()
-            
-            remaining_chapters = session.query(Chapter).filter_by(
-                novel_id=novel_obj.id
-            ).order_by(Chapter.position).all()
-            
-            
-            for idx, ch in enumerate(remaining_chapters):
-                if ch.position != idx:
-                    ch.position = idx
-            
-            session.flush()
         
         response_data = {
             'success': True,
@@ -2549,6 +2688,7 @@ def resort_chapters():
     try:
         from database.database import db_session_scope
         from database.db_models import Novel, Chapter
+        from database.db_novel import POSITION_GAP
         
         user_id = get_user_id()
         if not user_id:
@@ -2574,9 +2714,9 @@ def resort_chapters():
             
             sorted_chapters = sorted(chapters, key=get_episode_no)
             
-            for idx, ch in enumerate(sorted_chapters):
-                if ch.position != idx:
-                    ch.position = idx
+            for idx, ch in enumerate(sorted_chapters, start=1):
+                if ch.position != idx * POSITION_GAP:
+                    ch.position = idx * POSITION_GAP
             
             return jsonify({'success': True})
     except Exception as e:
@@ -2638,7 +2778,7 @@ def test_repair():
     return jsonify({'status': 'repair endpoint exists', 'test': 'ok'})
     try:
         from urllib.parse import unquote
-        from database.db_novel import extract_episode_id_from_url
+        from database.db_novel import extract_episode_id_from_url, POSITION_GAP
         from database.database import db_session_scope
         from database.db_models import Novel, Chapter
         from sqlalchemy import and_
@@ -2667,7 +2807,9 @@ def test_repair():
             chapters_with_episodes.sort(key=lambda x: x[0])
             
             updates = []
-            for new_pos, (ep_id, ch) in enumerate(chapters_with_episodes):
+            # Keep the reorder route's gaps so later mid-novel inserts do not force a rebalance
+            for idx, (ep_id, ch) in enumerate(chapters_with_episodes, start=1):
+                new_pos = idx * POSITION_GAP
                 old_pos = ch.position
                 if old_pos != new_pos:
                     ch.position = new_pos
@@ -3009,6 +3151,7 @@ def import_epub():
 
                                        
             max_position = max([ch.position for ch in existing_chapters], default=0)
+            from database.db_novel import POSITION_GAP
 
                              
             chapters_imported = 0
@@ -3057,10 +3200,10 @@ def import_epub():
 
                                                             
                 try:
-                    position = int(ch_number)
+                    position = int(ch_number) * POSITION_GAP
                 except ValueError:
                                                                                   
-                    max_position += 1
+                    max_position += POSITION_GAP
                     position = max_position
 
                                                                                
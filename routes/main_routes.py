@@ -1,5 +1,5 @@
 from flask import Blueprint, render_template, request, send_file, redirect, url_for, session
-from models.novel import load_novels, get_display_title, sort_chapters_by_number
+from models.novel import load_novels, load_library_summary, get_display_title, sort_chapters_by_number
 from models.settings import load_settings
 import os
 import mimetypes
@@ -52,6 +52,7 @@ def view_shared_novel(token):
 def view_shared_chapter(token, chapter_number):
     from database.database import db_session_scope
     from database.db_models import Novel, Chapter
+    from sqlalchemy.orm import undefer_group
     
     with db_session_scope() as session:
         novel = session.query(Novel).filter(
@@ -62,7 +63,7 @@ def view_shared_chapter(token, chapter_number):
         if not novel:
             return render_template('404.html'), 404
             
-        chapter = session.query(Chapter).filter(
+        chapter = session.query(Chapter).options(undefer_group('body')).filter(
             Chapter.novel_id == novel.id,
             Chapter.chapter_number == str(chapter_number)
         ).first()
@@ -266,7 +267,7 @@ def load_webtoons(user_id):
 def index():
 
     user_id = get_user_id()
-    novels = load_novels(user_id)
+    novels = load_library_summary(user_id)
     webtoons = load_webtoons(user_id)
     settings = load_settings(user_id)
     
@@ -279,8 +280,7 @@ def index():
         webtoons=webtoons,
         has_webtoons=has_webtoons,
         settings=settings, 
-        get_display_title=get_display_title, 
-        count_regular_chapters=count_regular_chapters
+        get_display_title=get_display_title
     )
 
 @main_bp.route('/novel/<novel_id>')
@@ -310,31 +310,29 @@ def view_novel(novel_id):
 @main_bp.route('/chapter/<novel_id>/<int:chapter_index>')
 def view_chapter(novel_id, chapter_index):
 
-    user_id = get_user_id()
-    novels = load_novels(user_id)
-    novel = novels.get(novel_id)
-    
-    if not novel or chapter_index >= len(novel.get('chapters', [])):
-        return "Chapter not found", 404
+    from database.db_novel import get_reader_chapter_db
     
+    user_id = get_user_id()
     settings = load_settings(user_id)
+    order = settings.get('default_sort_order', 'asc')
     
-    if 'sort_order_override' in novel and novel['sort_order_override'] is not None:
-        order = novel['sort_order_override']
-    else:
-        order = settings.get('default_sort_order', 'asc')
+    reader = get_reader_chapter_db(user_id, novel_id, chapter_index=chapter_index, order=order)
     
-    novel['sort_order'] = order
-    novel['chapters'] = sort_chapters_by_number(novel['chapters'], order)
+    if not reader:
+        return "Chapter not found", 404
     
-    chapter = novel['chapters'][chapter_index]
+    novel = reader['novel']
+    novel['sort_order'] = order
     
     return render_template(
         'chapter.html',
         novel=novel,
         novel_id=novel_id,
-        chapter=chapter,
-        chapter_index=chapter_index,
+        chapter=reader['chapter'],
+        chapter_index=reader['chapter_index'],
+        total_chapters=reader['total_chapters'],
+        prev_chapter=reader['prev_chapter'],
+        next_chapter=reader['next_chapter'],
         glossary=novel.get('glossary', {}),
         get_display_title=get_display_title,
         thinking_mode_enabled=settings.get('thinking_mode_enabled', False),
@@ -353,32 +351,21 @@ def token_usage_dashboard():
 @main_bp.route('/chapter/<novel_id>/number/<chapter_number>')
 def view_chapter_by_number(novel_id, chapter_number):
 
-    user_id = get_user_id()
-    novels = load_novels(user_id)
-    novel = novels.get(novel_id)
-    
-    if not novel:
-        return "Novel not found", 404
+    from database.db_novel import get_novel_db, get_reader_chapter_db
     
+    user_id = get_user_id()
     settings = load_settings(user_id)
+    order = settings.get('default_sort_order', 'asc')
     
-    if 'sort_order_override' in novel and novel['sort_order_override'] is not None:
-        order = novel['sort_order_override']
-    else:
-        order = settings.get('default_sort_order', 'asc')
-    
-    novel['sort_order'] = order
-    novel['chapters'] = sort_chapters_by_number(novel['chapters'], order)
-    
-    chapter_index = None
-    for idx, chapter in enumerate(novel['chapters']):
-        if chapter and str(chapter.get('chapter_number')) == str(chapter_number):
-            chapter_index = idx
-            break
+    reader = get_reader_chapter_db(user_id, novel_id, chapter_number=chapter_number, order=order)
     
-    if chapter_index is None:
+    if not reader:
+        if not get_novel_db(user_id, novel_id):
+            return "Novel not found", 404
         return "Chapter not found", 404
     
+    chapter_index = reader['chapter_index']
+    
     target_url = url_for('main.view_chapter', novel_id=novel_id, chapter_index=chapter_index)
 
     query_string = request.query_string.decode('utf-8') if request.query_string else ''
@@ -3,6 +3,7 @@
 from flask import Blueprint, request, jsonify, session
 from database.database import db_session_scope
 from database.db_models import Novel, Chapter
+from database.db_novel import POSITION_GAP
 from urllib.parse import unquote
 
 merge_bp = Blueprint('merge', __name__)
@@ -67,6 +68,21 @@ def preview_merge(novel_id):
             unique_source = []
             unique_target = []
             
+            conflict_ids = [
+                ch.id for ch_num in all_chapter_numbers
+                if ch_num in source_ch_map and ch_num in target_ch_map
+                for ch in (source_ch_map[ch_num], target_ch_map[ch_num])
+            ]
+            body_stats = {}
+            if conflict_ids:
+                for ch_id, content, translated_content in session.query(
+                    Chapter.id, Chapter.content, Chapter.translated_content
+                ).filter(Chapter.id.in_(conflict_ids)):
+                    body_stats[ch_id] = {
+                        'has_translation': bool(translated_content),
+                        'word_count': len(content.split()) if content else 0
+                    }
+            
             for ch_num in sorted(all_chapter_numbers):
                 in_source = ch_num in source_ch_map
                 in_target = ch_num in target_ch_map
@@ -81,15 +97,13 @@ def preview_merge(novel_id):
                             'title': s_ch.title,
                             'translated_title': s_ch.translated_title,
                             'created_at': s_ch.created_at.isoformat() if s_ch.created_at else None,
-                            'has_translation': bool(s_ch.translated_content),
-                            'word_count': len(s_ch.content.split()) if s_ch.content else 0
+                            **body_stats.get(s_ch.id, {'has_translation': False, 'word_count': 0})
                         },
                         'target': {
                             'title': t_ch.title,
                             'translated_title': t_ch.translated_title,
                             'created_at': t_ch.created_at.isoformat() if t_ch.created_at else None,
-                            'has_translation': bool(t_ch.translated_content),
-                            'word_count': len(t_ch.content.split()) if t_ch.content else 0
+                            **body_stats.get(t_ch.id, {'has_translation': False, 'word_count': 0})
                         }
                     })
                 elif in_source:
@@ -439,8 +453,8 @@ def execute_merge(novel_id):
 
             all_merged_chapters.sort(key=anchor_sort_key)
             
-            for idx, ch in enumerate(all_merged_chapters):
-                ch.position = idx
+            for idx, ch in enumerate(all_merged_chapters, start=1):
+                ch.position = idx * POSITION_GAP
             
                                                                           
             session.delete(target)
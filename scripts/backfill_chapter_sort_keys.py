@@ -0,0 +1,53 @@
+import sys
+import os
+
+                              
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+                                                             
+from dotenv import load_dotenv
+load_dotenv()
+
+from sqlalchemy import text
+from database.database import db_session_scope, init_db
+from database.db_models import Chapter, parse_chapter_number
+
+BATCH_SIZE = 5000
+
+def backfill_episode_ids():
+    with db_session_scope() as session:
+        result = session.execute(text("""
+            UPDATE chapters
+            SET episode_id = CAST(substring(source_url from '/viewer/([0-9]+)') AS BIGINT)
+            WHERE episode_id IS NULL AND source_url ~ '/viewer/[0-9]+'
+        """))
+        return result.rowcount
+
+def backfill_number_sort_keys():
+    updated = 0
+    while True:
+        with db_session_scope() as session:
+            rows = session.query(Chapter.id, Chapter.chapter_number).filter(
+                Chapter.number_sort_key.is_(None)
+            ).limit(BATCH_SIZE).all()
+            
+            if not rows:
+                return updated
+            
+            session.bulk_update_mappings(Chapter, [
+                {'id': row.id, 'number_sort_key': parse_chapter_number(row.chapter_number)}
+                for row in rows
+            ])
+            updated += len(rows)
+
+def main():
+    init_db()
+    
+    episode_count = backfill_episode_ids()
+    print(f"✅ Episode ids set on {episode_count} chapters")
+    
+    number_count = backfill_number_sort_keys()
+    print(f"✅ Number sort keys set on {number_count} chapters")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import sys
+import os
+import time
+import argparse
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import bubble_detection_service as detection
+from services.page_context import PageContext
+
+IOU_MATCH = 0.5
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    inter_w = min(ax + aw, bx + bw) - max(ax, bx)
+    inter_h = min(ay + ah, by + bh) - max(ay, by)
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    inter = inter_w * inter_h
+    union = aw * ah + bw * bh - inter
+    return inter / float(union) if union > 0 else 0.0
+
+def match_boxes(reference, candidate):
+
+    # Greedy one-to-one matching; returns the IoU of every reference box (0.0 when unmatched)
+    pairs = sorted(
+        ((iou(ref, cand), r, c) for r, ref in enumerate(reference) for c, cand in enumerate(candidate)),
+        reverse=True
+    )
+    used_ref, used_cand = set(), set()
+    scores = [0.0] * len(reference)
+    for score, r, c in pairs:
+        if score <= 0 or r in used_ref or c in used_cand:
+            continue
+        used_ref.add(r)
+        used_cand.add(c)
+        scores[r] = score
+    return scores
+
+def run_detection(image_path, max_pixels):
+
+    detection.ANALYSIS_MAX_PIXELS = max_pixels
+    page = PageContext(image_path)
+    started = time.perf_counter()
+    bubbles = detection.bubble_detection_service.detect_bubbles(image_path, page=page)
+    panels = detection.bubble_detection_service.detect_panels(image_path, bubbles=bubbles, page=page)
+    elapsed = time.perf_counter() - started
+    page.release()
+    return [b['bbox'] for b in bubbles], [p['bbox'] for p in panels], elapsed
+
+def summarize(scores, candidate_count):
+
+    if not scores:
+        return {'mean_iou': 1.0 if not candidate_count else 0.0, 'recall': 1.0 if not candidate_count else 0.0}
+    return {
+        'mean_iou': sum(scores) / len(scores),
+        'recall': sum(1 for score in scores if score >= IOU_MATCH) / float(len(scores))
+    }
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare bubble/panel detection at full resolution against a downscaled analysis copy'
+    )
+    parser.add_argument('images', nargs='+', help='sample webtoon/manga page images')
+    parser.add_argument('--max-pixels', type=int, default=2000000,
+                        help='IMAGE_ANALYSIS_MAX_PIXELS value to evaluate (default: 2000000)')
+    args = parser.parse_args()
+
+    totals = {'bubbles': [], 'panels': [], 'full_time': 0.0, 'scaled_time': 0.0}
+    print(f"{'page':40} {'bubbles':>9} {'b-IoU':>6} {'b-rec':>6} {'panels':>9} {'p-IoU':>6} {'p-rec':>6} {'speedup':>8}")
+
+    for image_path in args.images:
+        full_bubbles, full_panels, full_time = run_detection(image_path, 0)
+        scaled_bubbles, scaled_panels, scaled_time = run_detection(image_path, args.max_pixels)
+
+        bubble_scores = match_boxes(full_bubbles, scaled_bubbles)
+        panel_scores = match_boxes(full_panels, scaled_panels)
+        bubble_summary = summarize(bubble_scores, len(scaled_bubbles))
+        panel_summary = summarize(panel_scores, len(scaled_panels))
+
+        totals['bubbles'].extend(bubble_scores)
+        totals['panels'].extend(panel_scores)
+        totals['full_time'] += full_time
+        totals['scaled_time'] += scaled_time
+
+        print(
+            f"{os.path.basename(image_path)[:40]:40} "
+            f"{len(full_bubbles):>4}/{len(scaled_bubbles):<4} {bubble_summary['mean_iou']:6.3f} {bubble_summary['recall']:6.2f} "
+            f"{len(full_panels):>4}/{len(scaled_panels):<4} {panel_summary['mean_iou']:6.3f} {panel_summary['recall']:6.2f} "
+            f"{full_time / max(scaled_time, 1e-6):7.2f}x"
+        )
+
+    bubble_summary = summarize(totals['bubbles'], 0)
+    panel_summary = summarize(totals['panels'], 0)
+    print()
+    print(f"Bubbles: mean IoU {bubble_summary['mean_iou']:.3f}, recall@{IOU_MATCH} {bubble_summary['recall']:.2f}")
+    print(f"Panels:  mean IoU {panel_summary['mean_iou']:.3f}, recall@{IOU_MATCH} {panel_summary['recall']:.2f}")
+    print(f"Detection time: {totals['full_time']:.2f}s full resolution, {totals['scaled_time']:.2f}s at {args.max_pixels} px")
+
+if __name__ == '__main__':
+    main()
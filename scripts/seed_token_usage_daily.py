@@ -0,0 +1,24 @@
+import sys
+import os
+
+                              
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+                                                             
+from dotenv import load_dotenv
+load_dotenv()
+
+from database.database import init_db
+from services.token_usage_service import seed_token_usage_daily
+
+def main():
+    init_db()
+    
+    row_count = seed_token_usage_daily()
+    if row_count:
+        print(f"✅ Seeded {row_count} daily token usage rows")
+    else:
+        print("ℹ️ Daily token usage rollup already populated; nothing to seed")
+
+if __name__ == '__main__':
+    main()
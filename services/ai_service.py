@@ -1,6 +1,8 @@
 import json
 import re
-import requests
+from services.provider_client import chat_completion, stream_chat_completion, deepl_translate
+from services.translation_cache_service import build_cache_key, get_cached_translation, store_translation
+from services.glossary_service import prune_glossary
 import html
 from collections import Counter
 
@@ -29,41 +31,159 @@ def extract_translation_text(result):
         return result, None, None
     return None, "Unknown result format", None
 
-def translate_text(text, provider, api_key, selected_model, glossary=None, images=None, is_thinking_mode=False, source_language=None, custom_prompt_suffix=None):
+CHUNKING_THRESHOLD_TOKENS = 6000
+CHUNK_TARGET_TOKENS = 3000
+CHUNK_CONTEXT_CHARS = 600
+CHUNK_MAX_WORKERS = 4
 
-    if not api_key:
-        return {'error': 'API key not configured.', 'translated_text': None, 'token_usage': None}
-    
+_token_encoding = None
+
+def estimate_text_tokens(text):
+
+    global _token_encoding
     try:
-        text = clean_korean_text(text)
-        
-        glossary_instructions = ""
-        if glossary and len(glossary) > 0:
-            glossary_instructions = "\n\nCHARACTER GLOSSARY - Use these EXACT translations:\n"
-            for char_id, char_info in glossary.items():
-                korean_name = char_info.get('korean_name', '')
-                english_name = char_info.get('english_name', '')
-                gender = char_info.get('gender', '')
-                
-                glossary_instructions += f"\n- {korean_name} → {english_name}"
-                
-                if gender == 'male':
-                    glossary_instructions += " (Use he/him pronouns)"
-                elif gender == 'female':
-                    glossary_instructions += " (Use she/her pronouns)"
-                elif gender == 'other':
-                    glossary_instructions += " (Use they/them pronouns)"
-                elif gender == 'auto':
-                    glossary_instructions += " (Determine appropriate pronouns from context)"
-                
-        
-        image_context = ""
-        if images and len(images) > 0:
-            image_context = "\n\nNote: This chapter contains images at the following positions:\n"
-            for img in images:
-                image_context += f"[IMAGE_{img.get('index', 0)}] - {img.get('alt', 'Image')}\n"
+        if _token_encoding is None:
+            import tiktoken
+            _token_encoding = tiktoken.get_encoding('cl100k_base')
+        return len(_token_encoding.encode(text))
+    except Exception:
+        return len(text)
+
+def split_text_into_chunks(text, max_tokens=CHUNK_TARGET_TOKENS):
+
+    pieces = re.split(r'(\n[ \t]*\n+)', text)
+    paragraphs = pieces[0::2]
+    separators = pieces[1::2]
+    
+    units = []
+    for idx, paragraph in enumerate(paragraphs):
+        separator = separators[idx] if idx < len(separators) else ''
+        if estimate_text_tokens(paragraph) <= max_tokens:
+            units.append((paragraph, separator))
+            continue
         
-        system_prompt = """
+        lines = paragraph.split('\n')
+        for line_idx, line in enumerate(lines):
+            units.append((line, '\n' if line_idx < len(lines) - 1 else separator))
+    
+    chunks = []
+    current = None
+    current_tokens = 0
+    pending_separator = ''
+    for unit, separator in units:
+        unit_tokens = estimate_text_tokens(unit)
+        if current is not None and current_tokens + unit_tokens > max_tokens:
+            chunks.append((current, pending_separator))
+            current = None
+            current_tokens = 0
+        current = unit if current is None else current + pending_separator + unit
+        current_tokens += unit_tokens
+        pending_separator = separator
+    if current is not None:
+        chunks.append((current, pending_separator))
+    
+    return chunks
+
+def translate_text_chunked(text, provider, api_key, selected_model, glossary=None, images=None, is_thinking_mode=False, source_language=None, custom_prompt_suffix=None, use_cache=True, on_chunk=None, max_tokens=CHUNK_TARGET_TOKENS, max_workers=CHUNK_MAX_WORKERS):
+
+    from concurrent.futures import ThreadPoolExecutor
+    
+    chunks = split_text_into_chunks(text, max_tokens)
+    
+    def translate_chunk(index):
+        
+        chunk_text = chunks[index][0]
+        if not chunk_text.strip():
+            return {'translated_text': chunk_text, 'token_usage': None, 'error': None}
+        
+        context_text = chunks[index - 1][0][-CHUNK_CONTEXT_CHARS:] if index > 0 else None
+        chunk_images = [
+            img for img in (images or [])
+            if isinstance(img, dict) and f"[IMAGE_{img.get('index', 0)}]" in chunk_text
+        ]
+        result = translate_text(
+            chunk_text, provider, api_key, selected_model,
+            glossary=glossary, images=chunk_images, is_thinking_mode=is_thinking_mode,
+            source_language=source_language, custom_prompt_suffix=custom_prompt_suffix,
+            use_cache=use_cache, chunked=False, context_text=context_text
+        )
+        if on_chunk and not result.get('error'):
+            on_chunk(index, len(chunks), result.get('translated_text') or '')
+        return result
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        results = list(executor.map(translate_chunk, range(len(chunks))))
+    
+    failed = [idx for idx, result in enumerate(results) if result.get('error')]
+    if failed:
+        first_error = results[failed[0]]['error']
+        return {
+            'error': f'{first_error} (segments failed: {len(failed)}/{len(chunks)})',
+            'translated_text': None,
+            'token_usage': None
+        }
+    
+    translated_parts = []
+    token_usage = {
+        'input_tokens': 0,
+        'output_tokens': 0,
+        'total_tokens': 0,
+        'provider': provider,
+        'model': selected_model,
+        'cached_tokens': 0,
+        'cache_hit': True,
+        'saved_tokens': 0,
+        'chunks': len(chunks)
+    }
+    for (chunk_text, separator), result in zip(chunks, results):
+        leading = chunk_text[:len(chunk_text) - len(chunk_text.lstrip('\n'))]
+        trailing = chunk_text[len(chunk_text.rstrip('\n')):] if chunk_text.strip() else ''
+        translated_parts.append(leading + (result.get('translated_text') or '').strip('\n') + trailing + separator)
+        usage = result.get('token_usage') or {}
+        for field in ('input_tokens', 'output_tokens', 'total_tokens', 'cached_tokens', 'saved_tokens'):
+            token_usage[field] += usage.get(field, 0) or 0
+        if chunk_text.strip() and not usage.get('cache_hit'):
+            token_usage['cache_hit'] = False
+    
+    return {
+        'translated_text': ''.join(translated_parts),
+        'token_usage': token_usage,
+        'error': None,
+        'cache_hit': token_usage['cache_hit']
+    }
+
+def lookup_translation_cache(text, provider, selected_model, glossary=None, images=None, custom_prompt_suffix=None, is_thinking_mode=False, source_language=None, context_text=None, use_cache=True):
+
+    cache_key = build_cache_key(
+        text, provider, selected_model, glossary=glossary, images=images,
+        custom_prompt_suffix=custom_prompt_suffix, is_thinking_mode=is_thinking_mode,
+        source_language=source_language, context_text=context_text
+    )
+    # With use_cache=False the key is still returned so a fresh result overwrites the stale entry
+    if not use_cache:
+        return cache_key, None
+    cached = get_cached_translation(cache_key)
+    if not cached:
+        return cache_key, None
+    
+    return cache_key, {
+        'translated_text': cached['translated_text'],
+        'token_usage': {
+            'input_tokens': 0,
+            'output_tokens': 0,
+            'total_tokens': 0,
+            'provider': provider,
+            'model': selected_model,
+            'cache_hit': True,
+            'saved_tokens': (cached.get('input_tokens') or 0) + (cached.get('output_tokens') or 0)
+        },
+        'error': None,
+        'cache_hit': True
+    }
+
+# Kept byte-for-byte static so providers can serve it from their prompt-prefix cache;
+# anything per-novel or per-chapter belongs in the user prompt.
+TRANSLATION_SYSTEM_PROMPT = """
 You are a professional Korean-to-English literary translator specializing in web novels. 
 Your goal is to produce natural, fluent English that faithfully reflects the tone, personality, and style of the original Korean text.
 
@@ -131,11 +251,52 @@ OUTPUT RULES
 - Output only the translated English text.  
 - Do NOT include explanations, metadata, or internal notes.  
 - Maintain all formatting rules exactly.
-
-{custom_prompt_suffix if custom_prompt_suffix else ""}
 """
 
-        user_prompt = f"""CRITICAL INSTRUCTIONS:
+def _glossary_instructions(glossary):
+
+    glossary_instructions = ""
+    if glossary and len(glossary) > 0:
+        glossary_instructions = "\n\nCHARACTER GLOSSARY - Use these EXACT translations:\n"
+        for char_id, char_info in glossary.items():
+            korean_name = char_info.get('korean_name', '')
+            english_name = char_info.get('english_name', '')
+            gender = char_info.get('gender', '')
+            
+            glossary_instructions += f"\n- {korean_name} → {english_name}"
+            
+            if gender == 'male':
+                glossary_instructions += " (Use he/him pronouns)"
+            elif gender == 'female':
+                glossary_instructions += " (Use she/her pronouns)"
+            elif gender == 'other':
+                glossary_instructions += " (Use they/them pronouns)"
+            elif gender == 'auto':
+                glossary_instructions += " (Determine appropriate pronouns from context)"
+    
+    return glossary_instructions
+
+def prepare_translation_prompts(text, glossary=None, images=None, custom_prompt_suffix=None, context_text=None, is_thinking_mode=False):
+
+    glossary_instructions = _glossary_instructions(glossary)
+    
+    image_context = ""
+    if images and len(images) > 0:
+        image_context = "\n\nNote: This chapter contains images at the following positions:\n"
+        for img in images:
+            image_context += f"[IMAGE_{img.get('index', 0)}] - {img.get('alt', 'Image')}\n"
+    
+    system_prompt = TRANSLATION_SYSTEM_PROMPT
+    
+    custom_instructions = ""
+    if custom_prompt_suffix and custom_prompt_suffix.strip():
+        custom_instructions = f"\nADDITIONAL INSTRUCTIONS:\n{custom_prompt_suffix.strip()}\n"
+
+    context_section = ""
+    if context_text:
+        context_section = f"\nPREVIOUS PASSAGE (context only - do NOT translate or repeat it):\n{context_text}\n"
+    
+    user_prompt = f"""CRITICAL INSTRUCTIONS:
 1. Preserve ALL line breaks and paragraph spacing EXACTLY as in the original
 2. Keep the same number of blank lines between paragraphs
 3. Maintain the exact formatting structure
@@ -144,24 +305,57 @@ OUTPUT RULES
 6. Translate the content naturally while keeping the original structure
 7. IGNORE any encoded strings or metadata - only translate readable text
 8. Output ONLY readable English text, no encoded content
-
+{custom_instructions}
 {glossary_instructions}
 
 {image_context}
-
+{context_section}
 Korean text:
 {text}"""
 
-        headers = {"Content-Type": "application/json"}
-        json_payload = {}
+    # Roughly size the output limit to the input so long chapters don't get truncated.
+    # Tokens ~= chars/3; add a buffer and cap to 64k (provider/model limits should still enforce tighter caps if needed).
+    approx_tokens = max(1000, int(len(text) / 3))
+    if is_thinking_mode:
+        max_tokens = min(64000, approx_tokens + 8000)
+    else:
+        max_tokens = min(64000, max(4000, approx_tokens + 4000))
+    
+    return system_prompt, user_prompt, max_tokens
+
+def translate_text(text, provider, api_key, selected_model, glossary=None, images=None, is_thinking_mode=False, source_language=None, custom_prompt_suffix=None, use_cache=True, chunked=None, context_text=None, on_chunk=None):
+
+    if not api_key:
+        return {'error': 'API key not configured.', 'translated_text': None, 'token_usage': None}
+    
+    try:
+        text = clean_korean_text(text)
         
-        # Roughly size the output limit to the input so long chapters don't get truncated.
-        # Tokens ~= chars/3; add a buffer and cap to 64k (provider/model limits should still enforce tighter caps if needed).
-        approx_tokens = max(1000, int(len(text) / 3))
-        if is_thinking_mode:
-            max_tokens = min(64000, approx_tokens + 8000)
-        else:
-            max_tokens = min(64000, max(4000, approx_tokens + 4000))
+        if chunked is None:
+            chunked = estimate_text_tokens(text) > CHUNKING_THRESHOLD_TOKENS
+        if chunked:
+            return translate_text_chunked(
+                text, provider, api_key, selected_model, glossary=glossary, images=images,
+                is_thinking_mode=is_thinking_mode, source_language=source_language,
+                custom_prompt_suffix=custom_prompt_suffix, use_cache=use_cache, on_chunk=on_chunk
+            )
+        
+        glossary = prune_glossary(glossary, text)
+        
+        cache_key = None
+        if text.strip():
+            cache_key, cached_result = lookup_translation_cache(
+                text, provider, selected_model, glossary=glossary, images=images,
+                custom_prompt_suffix=custom_prompt_suffix, is_thinking_mode=is_thinking_mode,
+                source_language=source_language, context_text=context_text, use_cache=use_cache
+            )
+            if cached_result:
+                return cached_result
+        
+        system_prompt, user_prompt, max_tokens = prepare_translation_prompts(
+            text, glossary=glossary, images=images, custom_prompt_suffix=custom_prompt_suffix,
+            context_text=context_text, is_thinking_mode=is_thinking_mode
+        )
         
         def detect_source_lang(text_value, source_lang_hint):
                                                                              
@@ -205,14 +399,6 @@ Korean text:
             return text_value
 
         if provider == 'deepl':
-                                                                      
-            url = "https://api.deepl.com/v2/translate"
-                                                               
-            if api_key and api_key.strip().endswith(':fx'):
-                url = "https://api-free.deepl.com/v2/translate"
-            headers = {
-                "Authorization": f"DeepL-Auth-Key {api_key}"
-            }
             text_for_deepl = normalize_korean_informal(text)
             deepl_source_lang = detect_source_lang(text, source_language)
             if deepl_source_lang == 'KO':
@@ -226,126 +412,327 @@ Korean text:
                                                                 
             data_payload["split_sentences"] = 1
             data_payload["preserve_formatting"] = 0
-            response = requests.post(url, headers=headers, data=data_payload)
-        
-        elif provider == 'openrouter':
-            headers["Authorization"] = f"Bearer {api_key}"
-            headers["HTTP-Referer"] = "http://localhost:5000"
-            headers["X-Title"] = "Novel Translator"
-            json_payload = {
-                "model": selected_model,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "temperature": 0.3,
-                "max_tokens": max_tokens
-            }
-            response = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=json_payload)
+            translated_text, error = deepl_translate(api_key, data_payload)
+            token_usage = None
         
-        elif provider == 'openai':
-            headers["Authorization"] = f"Bearer {api_key}"
-            
-            token_param = "max_completion_tokens" if "o1-" in selected_model else "max_tokens"
-            
-            json_payload = {
-                "model": selected_model,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "temperature": 1 if "o1-" in selected_model else 0.3,                
-            }
-            json_payload[token_param] = max_tokens
-            
-            response = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=json_payload)
-        
-        elif provider == 'google':
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/{selected_model}:generateContent?key={api_key}"
-            json_payload = {
-                "contents": [
-                    {
-                        "parts": [
-                            {"text": f"{system_prompt}\n\n{user_prompt}"}
-                        ]
-                    }
-                ],
-                "generationConfig": {
-                    "maxOutputTokens": max_tokens,
-                    "temperature": 0.3
-                }
-            }
-            response = requests.post(url, headers=headers, json=json_payload)
+        elif provider in ('openrouter', 'openai', 'google'):
+            translated_text, token_usage, error = chat_completion(
+                provider, api_key, selected_model, system_prompt, user_prompt,
+                temperature=0.3, max_tokens=max_tokens, google_generation_config=True,
+                cache_system_prompt=True
+            )
         
         else:
             return {'error': 'Unsupported provider. Please use OpenRouter, OpenAI, Google Gemini, or DeepL.', 'translated_text': None, 'token_usage': None}
         
-        if response.status_code == 200:
-            data = response.json()
+        if error:
+            return {'error': error, 'translated_text': None, 'token_usage': None}
+        
+        translated_text = re.sub(r'[A-Za-z0-9+/]{40,}={0,2}', '[corrupted data removed]', translated_text)
+        
+        if cache_key:
+            store_translation(cache_key, provider, selected_model, translated_text, token_usage)
+        
+        return {
+            'translated_text': translated_text,
+            'token_usage': token_usage,
+            'error': None
+        }
             
-            token_usage = None
-            if provider == 'deepl':
-                translations = data.get('translations', [])
-                if translations:
-                    translated_text = translations[0].get('text', '')
-                else:
-                    return {'error': 'DeepL API Error: No translations in response.', 'translated_text': None, 'token_usage': None}
-            elif provider == 'google':
-                candidates = data.get('candidates', [])
-                if candidates:
-                    content = candidates[0].get('content', {})
-                    parts = content.get('parts', [])
-                    if parts:
-                        translated_text = parts[0].get('text', '')
-                    else:
-                        return {'error': 'Google API Error: No content in response.', 'translated_text': None, 'token_usage': None}
-                else:
-                    return {'error': 'Google API Error: No candidates in response.', 'translated_text': None, 'token_usage': None}
-                
-                usage_metadata = data.get('usageMetadata', {})
-                if usage_metadata:
-                    token_usage = {
-                        'input_tokens': usage_metadata.get('promptTokenCount', 0),
-                        'output_tokens': usage_metadata.get('candidatesTokenCount', 0),
-                        'total_tokens': usage_metadata.get('totalTokenCount', 0),
-                        'provider': provider,
-                        'model': selected_model
-                    }
-            else:
-                choices = data.get('choices', [])
-                if choices:
-                    translated_text = choices[0].get('message', {}).get('content', '')
-                else:
-                    return {'error': f'{provider.capitalize()} API Error: No choices in response.', 'translated_text': None, 'token_usage': None}
-                
-                usage = data.get('usage', {})
-                if usage:
-                    token_usage = {
-                        'input_tokens': usage.get('prompt_tokens', 0),
-                        'output_tokens': usage.get('completion_tokens', 0),
-                        'total_tokens': usage.get('total_tokens', 0),
-                        'provider': provider,
-                        'model': selected_model
-                    }
+    except Exception as e:
+        return {'error': f'{provider.capitalize()} error: {str(e)}', 'translated_text': None, 'token_usage': None}
+
+def _stream_in_segments(text, provider, api_key, selected_model, glossary=None, images=None, is_thinking_mode=False, source_language=None, custom_prompt_suffix=None, use_cache=True):
+
+    import queue
+    import threading
+    
+    events = queue.Queue()
+    
+    def on_chunk(index, total, translated_text):
+        events.put(('chunk', index, translated_text))
+    
+    def run():
+        result = translate_text(
+            text, provider, api_key, selected_model, glossary=glossary, images=images,
+            is_thinking_mode=is_thinking_mode, source_language=source_language,
+            custom_prompt_suffix=custom_prompt_suffix, use_cache=use_cache, on_chunk=on_chunk
+        )
+        events.put(('result', None, result))
+    
+    threading.Thread(target=run, daemon=True).start()
+    
+    pending = {}
+    next_index = 0
+    while True:
+        kind, index, payload = events.get()
+        if kind == 'result':
+            break
+        pending[index] = payload
+        while next_index in pending:
+            segment = pending.pop(next_index)
+            yield {'type': 'delta', 'text': ('\n\n' if next_index else '') + segment.strip('\n')}
+            next_index += 1
+    
+    if payload.get('error'):
+        yield {'type': 'error', 'error': payload['error']}
+        return
+    
+    if not (payload.get('translated_text') or '').strip():
+        yield {'type': 'error', 'error': f'{provider.capitalize()} returned an empty translation'}
+        return
+    
+    if next_index == 0:
+        yield {'type': 'delta', 'text': payload.get('translated_text') or ''}
+    yield {
+        'type': 'done',
+        'translated_text': payload.get('translated_text') or '',
+        'token_usage': payload.get('token_usage'),
+        'cache_hit': bool(payload.get('cache_hit'))
+    }
+
+def stream_translate_text(text, provider, api_key, selected_model, glossary=None, images=None, is_thinking_mode=False, source_language=None, custom_prompt_suffix=None, use_cache=True):
+
+    if not api_key:
+        yield {'type': 'error', 'error': 'API key not configured.'}
+        return
+    
+    try:
+        text = clean_korean_text(text)
+        
+        if provider == 'deepl' or estimate_text_tokens(text) > CHUNKING_THRESHOLD_TOKENS:
+            yield from _stream_in_segments(
+                text, provider, api_key, selected_model, glossary=glossary, images=images,
+                is_thinking_mode=is_thinking_mode, source_language=source_language,
+                custom_prompt_suffix=custom_prompt_suffix, use_cache=use_cache
+            )
+            return
+        
+        if provider not in ('openrouter', 'openai', 'google'):
+            yield {'type': 'error', 'error': 'Unsupported provider. Please use OpenRouter, OpenAI, Google Gemini, or DeepL.'}
+            return
+        
+        glossary = prune_glossary(glossary, text)
+        
+        cache_key = None
+        if text.strip():
+            cache_key, cached_result = lookup_translation_cache(
+                text, provider, selected_model, glossary=glossary, images=images,
+                custom_prompt_suffix=custom_prompt_suffix, is_thinking_mode=is_thinking_mode,
+                source_language=source_language, use_cache=use_cache
+            )
+            if cached_result:
+                yield {'type': 'delta', 'text': cached_result['translated_text']}
+                yield {
+                    'type': 'done',
+                    'translated_text': cached_result['translated_text'],
+                    'token_usage': cached_result['token_usage'],
+                    'cache_hit': True
+                }
+                return
+        
+        system_prompt, user_prompt, max_tokens = prepare_translation_prompts(
+            text, glossary=glossary, images=images, custom_prompt_suffix=custom_prompt_suffix,
+            is_thinking_mode=is_thinking_mode
+        )
+        
+        parts = []
+        token_usage = None
+        for delta, usage, error in stream_chat_completion(
+            provider, api_key, selected_model, system_prompt, user_prompt,
+            temperature=0.3, max_tokens=max_tokens, google_generation_config=True,
+            cache_system_prompt=True
+        ):
+            if error:
+                yield {'type': 'error', 'error': error}
+                return
+            if delta:
+                parts.append(delta)
+                yield {'type': 'delta', 'text': delta}
+            if usage:
+                token_usage = usage
+        
+        # A stream can close cleanly without content (filtered or truncated output)
+        if not ''.join(parts).strip():
+            yield {'type': 'error', 'error': f'{provider.capitalize()} returned an empty translation'}
+            return
+        
+        translated_text = re.sub(r'[A-Za-z0-9+/]{40,}={0,2}', '[corrupted data removed]', ''.join(parts))
+        
+        if cache_key:
+            store_translation(cache_key, provider, selected_model, translated_text, token_usage)
+        
+        yield {
+            'type': 'done',
+            'translated_text': translated_text,
+            'token_usage': token_usage,
+            'cache_hit': False
+        }
+    
+    except Exception as e:
+        yield {'type': 'error', 'error': f'{provider.capitalize()} error: {str(e)}'}
+
+SEGMENT_BATCH_MAX_SEGMENTS = 40
+
+# Short and static so every page of every job shares the provider's prompt-prefix cache.
+SEGMENT_SYSTEM_PROMPT = """
+You translate speech bubbles, captions and sound effects from Korean or Japanese comics (webtoons/manga) into natural English.
+
+You receive a JSON object {"segments": [{"id": <number>, "text": <source text>}, ...]}.
+Each segment is one bubble or caption from the same page, in reading order - use the neighbouring segments as context.
+
+RULES
+- Translate every segment. Never merge, split, skip or reorder segments.
+- Keep translations short enough to fit back into the original bubble.
+- Keep speaker tone, honorific nuance and profanity; romanize oppa/unnie/hyung/noona/sunbae.
+- If a character glossary is provided, use those exact names and pronouns.
+- The output must contain ZERO Korean or Japanese characters.
+
+OUTPUT
+Return ONLY a JSON object of the form {"translations": [{"id": <number>, "text": <English translation>}, ...]} with one entry per input id.
+"""
+
+def _parse_segment_translations(content):
+
+    if not content:
+        return {}
+    content = content.strip()
+    if content.startswith('```'):
+        content = re.sub(r'^```[a-zA-Z]*\s*', '', content)
+        content = re.sub(r'\s*```$', '', content)
+    
+    try:
+        data = json.loads(content)
+    except ValueError:
+        match = re.search(r'[\[{].*[\]}]', content, re.DOTALL)
+        if not match:
+            return {}
+        try:
+            data = json.loads(match.group(0))
+        except ValueError:
+            return {}
+    
+    if isinstance(data, dict):
+        data = data.get('translations', data)
+    
+    translations = {}
+    if isinstance(data, list):
+        for position, item in enumerate(data):
+            if isinstance(item, dict) and isinstance(item.get('text'), str):
+                try:
+                    translations[int(item.get('id', position))] = item['text']
+                except (TypeError, ValueError):
+                    continue
+            elif isinstance(item, str):
+                translations[position] = item
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            if isinstance(value, str):
+                try:
+                    translations[int(key)] = value
+                except ValueError:
+                    continue
+    return translations
+
+def translate_segments(segments, provider, api_key, selected_model, glossary=None, source_language=None, custom_prompt_suffix=None, use_cache=True, max_segments=SEGMENT_BATCH_MAX_SEGMENTS):
+
+    if not api_key:
+        return {'error': 'API key not configured.', 'translations': None, 'token_usage': None}
+    
+    segments = [clean_korean_text(segment or '') for segment in segments]
+    translations = [segment if not segment.strip() else None for segment in segments]
+    pending = [idx for idx, segment in enumerate(segments) if segment.strip()]
+    token_usage = {
+        'input_tokens': 0,
+        'output_tokens': 0,
+        'total_tokens': 0,
+        'provider': provider,
+        'model': selected_model,
+        'cached_tokens': 0,
+        'requests': 0
+    }
+    
+    def add_usage(usage):
+        
+        for field in ('input_tokens', 'output_tokens', 'total_tokens', 'cached_tokens'):
+            token_usage[field] += (usage or {}).get(field, 0) or 0
+    
+    if provider in ('openrouter', 'openai', 'google'):
+        glossary = prune_glossary(glossary, '\n'.join(segments[idx] for idx in pending))
+        
+        for start in range(0, len(pending), max_segments):
+            batch = pending[start:start + max_segments]
+            payload = json.dumps(
+                {'segments': [{'id': position, 'text': segments[idx]} for position, idx in enumerate(batch)]},
+                ensure_ascii=False
+            )
             
-            translated_text = re.sub(r'[A-Za-z0-9+/]{40,}={0,2}', '[corrupted data removed]', translated_text)
+            cache_key, cached_result = lookup_translation_cache(
+                payload, provider, selected_model, glossary=glossary,
+                custom_prompt_suffix=custom_prompt_suffix, source_language=source_language,
+                context_text='segments', use_cache=use_cache
+            )
+            if cached_result:
+                cached_translations = _parse_segment_translations(cached_result['translated_text'])
+                if len(cached_translations) >= len(batch):
+                    for position, idx in enumerate(batch):
+                        translations[idx] = cached_translations.get(position)
+                    continue
             
-            return {
-                'translated_text': translated_text,
-                'token_usage': token_usage,
-                'error': None
-            }
-        else:
-            error_msg = f"{provider.capitalize()} API Error: {response.status_code}"
-            try:
-                error_data = response.json()
-                error_msg += f" - {error_data.get('error', {}).get('message', 'Unknown error')}"
-            except:
-                pass
-            return {'error': error_msg, 'translated_text': None, 'token_usage': None}
+            custom_instructions = ""
+            if custom_prompt_suffix and custom_prompt_suffix.strip():
+                custom_instructions = f"\nADDITIONAL INSTRUCTIONS:\n{custom_prompt_suffix.strip()}\n"
+            language_hint = f"Source language: {source_language}\n" if source_language else ""
+            user_prompt = f"""{language_hint}{custom_instructions}{_glossary_instructions(glossary)}
+
+{payload}"""
             
-    except Exception as e:
-        return {'error': f'{provider.capitalize()} error: {str(e)}', 'translated_text': None, 'token_usage': None}
+            content, usage, error = chat_completion(
+                provider, api_key, selected_model, SEGMENT_SYSTEM_PROMPT, user_prompt,
+                temperature=0.3, max_tokens=min(16000, max(1000, int(len(payload) / 2) + 500)),
+                google_generation_config=True, cache_system_prompt=True, json_mode=True
+            )
+            if error:
+                return {'error': error, 'translations': None, 'token_usage': None}
+            add_usage(usage)
+            token_usage['requests'] += 1
+            
+            parsed = _parse_segment_translations(content)
+            for position, idx in enumerate(batch):
+                translated = parsed.get(position)
+                if isinstance(translated, str) and translated.strip():
+                    translations[idx] = re.sub(r'[A-Za-z0-9+/]{40,}={0,2}', '[corrupted data removed]', translated)
+            
+            if cache_key and all(translations[idx] is not None for idx in batch):
+                store_translation(cache_key, provider, selected_model, json.dumps(
+                    {'translations': [{'id': position, 'text': translations[idx]} for position, idx in enumerate(batch)]},
+                    ensure_ascii=False
+                ), usage)
+    
+    elif provider != 'deepl':
+        return {'error': 'Unsupported provider. Please use OpenRouter, OpenAI, Google Gemini, or DeepL.', 'translations': None, 'token_usage': None}
+    
+    # DeepL has no structured mode, and models occasionally drop an id; translate those one by one
+    for idx in pending:
+        if translations[idx] is not None:
+            continue
+        result = translate_text(
+            segments[idx], provider, api_key, selected_model, glossary=glossary,
+            source_language=source_language, custom_prompt_suffix=custom_prompt_suffix,
+            use_cache=use_cache, chunked=False
+        )
+        if result.get('error'):
+            return {'error': result['error'], 'translations': None, 'token_usage': None}
+        translations[idx] = result.get('translated_text') or ''
+        add_usage(result.get('token_usage'))
+        if not (result.get('token_usage') or {}).get('cache_hit'):
+            token_usage['requests'] += 1
+    
+    return {
+        'translations': translations,
+        'token_usage': token_usage,
+        'error': None
+    }
 
 def detect_characters(text, provider, api_key, selected_model):
 
@@ -403,76 +790,26 @@ Return ONLY a valid JSON array like this:
 Korean text:
 {sample_text}"""
 
-        headers = {"Content-Type": "application/json"}
-        json_payload = {
-            "model": selected_model,
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            "temperature": 0.1,
-            "max_tokens": 1000
-        }
-        
-        if provider == 'openrouter':
-            headers["Authorization"] = f"Bearer {api_key}"
-            headers["HTTP-Referer"] = "http://localhost:5000"
-            headers["X-Title"] = "Novel Translator"
-            response = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=json_payload)
-        
-        elif provider == 'openai':
-            headers["Authorization"] = f"Bearer {api_key}"
-            response = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=json_payload)
-        
-        elif provider == 'google':
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/{selected_model}:generateContent?key={api_key}"
-            json_payload = {
-                "contents": [
-                    {
-                        "parts": [
-                            {"text": f"{system_prompt}\n\n{user_prompt}"}
-                        ]
-                    }
-                ]
-            }
-            response = requests.post(url, headers=headers, json=json_payload)
-        
-        else:
+        if provider not in ('openrouter', 'openai', 'google'):
             return {'error': 'Unsupported provider. Please use OpenRouter, OpenAI, or Google Gemini.'}
         
-        if response.status_code == 200:
-            data = response.json()
-            
-            if provider == 'google':
-                candidates = data.get('candidates', [])
-                if candidates:
-                    content = candidates[0].get('content', {})
-                    parts = content.get('parts', [])
-                    if parts:
-                        content_str = parts[0].get('text', '')
-                    else:
-                        return {'error': 'Google API: No content.'}
-                else:
-                    return {'error': 'Google API: No candidates.'}
-            else:
-                choices = data.get('choices', [])
-                if choices:
-                    content_str = choices[0].get('message', {}).get('content', '')
-                else:
-                    return {'error': f'{provider.capitalize()} API: No choices.'}
+        content_str, _, error = chat_completion(
+            provider, api_key, selected_model, system_prompt, user_prompt,
+            temperature=0.1, max_tokens=1000
+        )
+        if error:
+            return {'error': error}
+        
+        try:
+            if '```json' in content_str:
+                content_str = content_str.split('```json')[1].split('```')[0].strip()
+            elif '```' in content_str:
+                content_str = content_str.split('```')[1].split('```')[0].strip()
             
-            try:
-                if '```json' in content_str:
-                    content_str = content_str.split('```json')[1].split('```')[0].strip()
-                elif '```' in content_str:
-                    content_str = content_str.split('```')[1].split('```')[0].strip()
-                
-                characters = json.loads(content_str)
-                return {'success': True, 'characters': characters}
-            except json.JSONDecodeError:
-                return {'error': 'Failed to parse AI response'}
-        else:
-            return {'error': f'{provider.capitalize()} API Error: {response.status_code}'}
+            characters = json.loads(content_str)
+            return {'success': True, 'characters': characters}
+        except json.JSONDecodeError:
+            return {'error': 'Failed to parse AI response'}
             
     except Exception as e:
         return {'error': str(e)}
@@ -1292,79 +1629,36 @@ Return ONLY a valid JSON object mapping English names to Korean names:
 
 Include titles if they're used as character identifiers. Only exclude obvious non-names like sound effects."""
 
-        headers = {"Content-Type": "application/json"}
-        json_payload = {
-            "model": selected_model,
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            "temperature": 0.1,
-            "max_tokens": 1000
-        }
+        if provider not in ('openrouter', 'openai', 'google'):
+            return {}
         
-        if provider == 'openrouter':
-            headers["Authorization"] = f"Bearer {api_key}"
-            headers["HTTP-Referer"] = "http://localhost:5000"
-            headers["X-Title"] = "Novel Translator"
-            response = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=json_payload)
-        elif provider == 'openai':
-            headers["Authorization"] = f"Bearer {api_key}"
-            response = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=json_payload)
-        elif provider == 'google':
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/{selected_model}:generateContent?key={api_key}"
-            json_payload = {
-                "contents": [{
-                    "parts": [{"text": f"{system_prompt}\n\n{user_prompt}"}]
-                }]
-            }
-            response = requests.post(url, headers=headers, json=json_payload)
-        else:
+        content_str, _, error = chat_completion(
+            provider, api_key, selected_model, system_prompt, user_prompt,
+            temperature=0.1, max_tokens=1000
+        )
+        if error:
             return {}
         
-        if response.status_code == 200:
-            data = response.json()
+        try:
+            if '```json' in content_str:
+                content_str = content_str.split('```json')[1].split('```')[0].strip()
+            elif '```' in content_str:
+                content_str = content_str.split('```')[1].split('```')[0].strip()
             
-            if provider == 'google':
-                candidates = data.get('candidates', [])
-                if candidates:
-                    content = candidates[0].get('content', {})
-                    parts = content.get('parts', [])
-                    if parts:
-                        content_str = parts[0].get('text', '')
-                    else:
-                        return {}
-                else:
-                    return {}
-            else:
-                choices = data.get('choices', [])
-                if choices:
-                    content_str = choices[0].get('message', {}).get('content', '')
-                else:
-                    return {}
+            name_mapping = json.loads(content_str)
             
-            try:
-                if '```json' in content_str:
-                    content_str = content_str.split('```json')[1].split('```')[0].strip()
-                elif '```' in content_str:
-                    content_str = content_str.split('```')[1].split('```')[0].strip()
-                
-                name_mapping = json.loads(content_str)
-                
-                validated_mapping = {}
-                for eng_name, kor_name in name_mapping.items():
-                    if kor_name in korean_text:
-                        validated_mapping[kor_name] = eng_name
-                
-                validated_mapping = validate_detected_names(
-                    validated_mapping, korean_text, english_text
-                )
-                
-                return validated_mapping
-                
-            except json.JSONDecodeError:
-                return {}
-        else:
+            validated_mapping = {}
+            for eng_name, kor_name in name_mapping.items():
+                if kor_name in korean_text:
+                    validated_mapping[kor_name] = eng_name
+            
+            validated_mapping = validate_detected_names(
+                validated_mapping, korean_text, english_text
+            )
+            
+            return validated_mapping
+            
+        except json.JSONDecodeError:
             return {}
             
     except Exception as e:
@@ -1479,76 +1773,26 @@ IMPORTANT:
 Korean names:
 {names_list}"""
 
-        headers = {"Content-Type": "application/json"}
-        json_payload = {
-            "model": selected_model,
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            "temperature": 0.3,
-            "max_tokens": 1000
-        }
-        
-        if provider == 'openrouter':
-            headers["Authorization"] = f"Bearer {api_key}"
-            headers["HTTP-Referer"] = "http://localhost:5000"
-            headers["X-Title"] = "Novel Translator"
-            response = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=json_payload)
-        
-        elif provider == 'openai':
-            headers["Authorization"] = f"Bearer {api_key}"
-            response = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=json_payload)
-        
-        elif provider == 'google':
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/{selected_model}:generateContent?key={api_key}"
-            json_payload = {
-                "contents": [
-                    {
-                        "parts": [
-                            {"text": f"{system_prompt}\n\n{user_prompt}"}
-                        ]
-                    }
-                ]
-            }
-            response = requests.post(url, headers=headers, json=json_payload)
-        
-        else:
+        if provider not in ('openrouter', 'openai', 'google'):
             return {'error': 'Unsupported provider. Please use OpenRouter, OpenAI, or Google Gemini.'}
         
-        if response.status_code == 200:
-            data = response.json()
-            
-            if provider == 'google':
-                candidates = data.get('candidates', [])
-                if candidates:
-                    content = candidates[0].get('content', {})
-                    parts = content.get('parts', [])
-                    if parts:
-                        content_str = parts[0].get('text', '')
-                    else:
-                        return {'error': 'Google API: No content.'}
-                else:
-                    return {'error': 'Google API: No candidates.'}
-            else:
-                choices = data.get('choices', [])
-                if choices:
-                    content_str = choices[0].get('message', {}).get('content', '')
-                else:
-                    return {'error': f'{provider.capitalize()} API: No choices.'}
+        content_str, _, error = chat_completion(
+            provider, api_key, selected_model, system_prompt, user_prompt,
+            temperature=0.3, max_tokens=1000
+        )
+        if error:
+            return {'error': error}
+        
+        try:
+            if '```json' in content_str:
+                content_str = content_str.split('```json')[1].split('```')[0].strip()
+            elif '```' in content_str:
+                content_str = content_str.split('```')[1].split('```')[0].strip()
             
-            try:
-                if '```json' in content_str:
-                    content_str = content_str.split('```json')[1].split('```')[0].strip()
-                elif '```' in content_str:
-                    content_str = content_str.split('```')[1].split('```')[0].strip()
-                
-                translations = json.loads(content_str)
-                return {'success': True, 'translations': translations}
-            except json.JSONDecodeError:
-                return {'error': 'Failed to parse AI response'}
-        else:
-            return {'error': f'{provider.capitalize()} API Error: {response.status_code}'}
+            translations = json.loads(content_str)
+            return {'success': True, 'translations': translations}
+        except json.JSONDecodeError:
+            return {'error': 'Failed to parse AI response'}
             
     except Exception as e:
         return {'error': str(e)}
@@ -1584,76 +1828,26 @@ Return ONLY a valid JSON object like this:
 
 Valid values are: "male" (he/him), "female" (she/her), "other" (they/them), or "auto" (let translator decide)"""
 
-        headers = {"Content-Type": "application/json"}
-        json_payload = {
-            "model": selected_model,
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            "temperature": 0.1,
-            "max_tokens": 1000
-        }
-        
-        if provider == 'openrouter':
-            headers["Authorization"] = f"Bearer {api_key}"
-            headers["HTTP-Referer"] = "http://localhost:5000"
-            headers["X-Title"] = "Novel Translator"
-            response = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=json_payload)
-        
-        elif provider == 'openai':
-            headers["Authorization"] = f"Bearer {api_key}"
-            response = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=json_payload)
-        
-        elif provider == 'google':
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/{selected_model}:generateContent?key={api_key}"
-            json_payload = {
-                "contents": [
-                    {
-                        "parts": [
-                            {"text": f"{system_prompt}\n\n{user_prompt}"}
-                        ]
-                    }
-                ]
-            }
-            response = requests.post(url, headers=headers, json=json_payload)
-        
-        else:
+        if provider not in ('openrouter', 'openai', 'google'):
             return {'error': 'Unsupported provider. Please use OpenRouter, OpenAI, or Google Gemini.'}
         
-        if response.status_code == 200:
-            data = response.json()
-            
-            if provider == 'google':
-                candidates = data.get('candidates', [])
-                if candidates:
-                    content = candidates[0].get('content', {})
-                    parts = content.get('parts', [])
-                    if parts:
-                        content_str = parts[0].get('text', '')
-                    else:
-                        return {'error': 'Google API: No content.'}
-                else:
-                    return {'error': 'Google API: No candidates.'}
-            else:
-                choices = data.get('choices', [])
-                if choices:
-                    content_str = choices[0].get('message', {}).get('content', '')
-                else:
-                    return {'error': f'{provider.capitalize()} API: No choices.'}
+        content_str, _, error = chat_completion(
+            provider, api_key, selected_model, system_prompt, user_prompt,
+            temperature=0.1, max_tokens=1000
+        )
+        if error:
+            return {'error': error}
+        
+        try:
+            if '```json' in content_str:
+                content_str = content_str.split('```json')[1].split('```')[0].strip()
+            elif '```' in content_str:
+                content_str = content_str.split('```')[1].split('```')[0].strip()
             
-            try:
-                if '```json' in content_str:
-                    content_str = content_str.split('```json')[1].split('```')[0].strip()
-                elif '```' in content_str:
-                    content_str = content_str.split('```')[1].split('```')[0].strip()
-                
-                genders = json.loads(content_str)
-                return {'success': True, 'genders': genders}
-            except json.JSONDecodeError:
-                return {'error': 'Failed to parse AI response'}
-        else:
-            return {'error': f'{provider.capitalize()} API Error: {response.status_code}'}
+            genders = json.loads(content_str)
+            return {'success': True, 'genders': genders}
+        except json.JSONDecodeError:
+            return {'error': 'Failed to parse AI response'}
             
     except Exception as e:
         return {'error': str(e)}
@@ -0,0 +1,253 @@
+import os
+import time
+import uuid
+from datetime import datetime
+from database.database import db_session_scope
+from database.db_models import TranslationBatchJob, Novel, Chapter
+from sqlalchemy import func
+
+BATCH_MAX_CONCURRENT_CHAPTERS = int(os.getenv('BATCH_MAX_CONCURRENT_CHAPTERS', '8'))
+BATCH_MAX_ACTIVE_JOBS = int(os.getenv('BATCH_MAX_ACTIVE_JOBS', '3'))
+# A dispatched chapter that has not reported back after this long is treated as lost (worker crash or lost
+# message); keep it well above BATCH_GROUP_SOFT_TIME_LIMIT, which the group task enforces itself on any pool
+BATCH_LEASE_TIMEOUT = int(os.getenv('BATCH_LEASE_TIMEOUT', '3600'))
+ACTIVE_STATUSES = ('running', 'paused')
+
+def _finish_if_done(job):
+
+    if job.in_flight > 0:
+        return
+    if job.status == 'running' and job.next_index >= job.total_chapters:
+        job.status = 'completed'
+        job.completed_at = datetime.utcnow()
+    elif job.status == 'cancelled' and not job.completed_at:
+        job.completed_at = datetime.utcnow()
+
+def _reclaim_stale_leases(session, job, now=None):
+
+    now = now or time.time()
+    leases = dict(job.in_flight_chapters or {})
+    stale = [chapter_id for chapter_id, dispatched_at in leases.items() if now - dispatched_at > BATCH_LEASE_TIMEOUT]
+    if not stale:
+        return 0
+
+    for chapter_id in stale:
+        leases.pop(chapter_id)
+    job.in_flight_chapters = leases
+    job.in_flight = len(leases)
+    job.failed_chapters += len(stale)
+    job.error_message = 'Translation task was lost or timed out'
+    session.query(Chapter).filter(
+        Chapter.id.in_([int(chapter_id) for chapter_id in stale]),
+        Chapter.translation_status.in_(('queued', 'in_progress'))
+    ).update({'translation_status': 'failed'}, synchronize_session=False)
+    _finish_if_done(job)
+    return len(stale)
+
+def reclaim_stale_leases():
+
+    user_ids = set()
+    with db_session_scope() as session:
+        jobs = session.query(TranslationBatchJob).filter(
+            TranslationBatchJob.status.in_(ACTIVE_STATUSES + ('cancelled',)),
+            TranslationBatchJob.in_flight > 0
+        ).order_by(TranslationBatchJob.created_at, TranslationBatchJob.id).with_for_update().all()
+        for job in jobs:
+            if _reclaim_stale_leases(session, job):
+                user_ids.add(job.user_id)
+
+    for user_id in user_ids:
+        dispatch_batch_jobs(user_id)
+    return len(user_ids)
+
+def create_batch_job(user_id, novel_slug, start_index=None, end_index=None, untranslated_only=False,
+                     translate_title=True, translate_content=True):
+
+    if start_index is not None and start_index < 0:
+        return {'success': False, 'error': 'start_index must be 0 or greater'}
+    if start_index is not None and end_index is not None and end_index < start_index:
+        return {'success': False, 'error': 'end_index must not be before start_index'}
+    if not translate_title and not translate_content:
+        return {'success': False, 'error': 'Nothing to translate'}
+
+    with db_session_scope() as session:
+        novel = session.query(Novel).filter(
+            Novel.user_id == user_id,
+            Novel.slug == novel_slug
+        ).first()
+        if not novel:
+            return {'success': False, 'error': 'Novel not found'}
+
+        active_jobs = session.query(TranslationBatchJob.novel_id).filter(
+            TranslationBatchJob.user_id == user_id,
+            TranslationBatchJob.status.in_(ACTIVE_STATUSES)
+        ).all()
+        if any(row.novel_id == novel.id for row in active_jobs):
+            return {'success': False, 'error': 'A batch translation is already active for this novel'}
+        if len(active_jobs) >= BATCH_MAX_ACTIVE_JOBS:
+            return {'success': False, 'error': f'You can have at most {BATCH_MAX_ACTIVE_JOBS} active batch translations'}
+
+        is_translated = func.coalesce(func.octet_length(Chapter.translated_content), 0) > 0
+        rows = session.query(Chapter.id, is_translated.label('is_translated')).filter(
+            Chapter.novel_id == novel.id
+        ).order_by(Chapter.position, Chapter.id)
+        if start_index:
+            rows = rows.offset(start_index)
+        if end_index is not None:
+            rows = rows.limit(end_index - (start_index or 0) + 1)
+
+        chapter_ids = [row.id for row in rows if not (untranslated_only and row.is_translated)]
+        if not chapter_ids:
+            return {'success': False, 'error': 'No chapters match the requested range'}
+
+        job = TranslationBatchJob(
+            job_id=uuid.uuid4().hex,
+            user_id=user_id,
+            novel_id=novel.id,
+            start_index=start_index,
+            end_index=end_index,
+            untranslated_only=bool(untranslated_only),
+            translate_title=bool(translate_title),
+            translate_content=bool(translate_content),
+            status='running',
+            chapter_ids=chapter_ids,
+            next_index=0,
+            in_flight=0,
+            in_flight_chapters={},
+            total_chapters=len(chapter_ids)
+        )
+        session.add(job)
+        session.flush()
+        job_id = job.job_id
+
+    dispatch_batch_jobs(user_id)
+    return {'success': True, 'job': get_batch_job(user_id, job_id)}
+
+def get_batch_job(user_id, job_id):
+
+    with db_session_scope() as session:
+        job = session.query(TranslationBatchJob).filter_by(job_id=job_id, user_id=user_id).first()
+        return job.to_dict() if job else None
+
+def list_batch_jobs(user_id, novel_slug=None, limit=50):
+
+    with db_session_scope() as session:
+        query = session.query(TranslationBatchJob).filter(TranslationBatchJob.user_id == user_id)
+        if novel_slug:
+            query = query.join(Novel, Novel.id == TranslationBatchJob.novel_id).filter(Novel.slug == novel_slug)
+        jobs = query.order_by(TranslationBatchJob.created_at.desc()).limit(limit).all()
+        return [job.to_dict() for job in jobs]
+
+def update_batch_job_status(user_id, job_id, action):
+
+    transitions = {
+        'pause': (('running',), 'paused'),
+        'resume': (('paused',), 'running'),
+        'cancel': (ACTIVE_STATUSES, 'cancelled'),
+    }
+    if action not in transitions:
+        return {'success': False, 'error': f'Unknown action: {action}'}
+    allowed_from, new_status = transitions[action]
+
+    with db_session_scope() as session:
+        job = session.query(TranslationBatchJob).filter_by(
+            job_id=job_id, user_id=user_id
+        ).with_for_update().first()
+        if not job:
+            return {'success': False, 'error': 'Batch job not found'}
+        if job.status not in allowed_from:
+            return {'success': False, 'error': f'Cannot {action} a job that is {job.status}'}
+
+        job.status = new_status
+        _finish_if_done(job)
+
+    if action == 'resume':
+        dispatch_batch_jobs(user_id)
+    return {'success': True, 'job': get_batch_job(user_id, job_id)}
+
+def dispatch_batch_jobs(user_id):
+
+    from tasks.translation_tasks import translate_chapter_group_task
+
+    dispatched = []
+    with db_session_scope() as session:
+        jobs = session.query(TranslationBatchJob).filter(
+            TranslationBatchJob.user_id == user_id,
+            TranslationBatchJob.status.in_(ACTIVE_STATUSES)
+        ).order_by(TranslationBatchJob.created_at, TranslationBatchJob.id).with_for_update().all()
+
+        now = time.time()
+        for job in jobs:
+            _reclaim_stale_leases(session, job, now)
+
+        slots = BATCH_MAX_CONCURRENT_CHAPTERS - sum(job.in_flight for job in jobs)
+        for job in jobs:
+            if job.status != 'running':
+                continue
+            take = min(slots, job.total_chapters - job.next_index)
+            if take <= 0:
+                _finish_if_done(job)
+                continue
+            # One task per job per dispatch; the worker runs its chapters concurrently
+            dispatched.append({
+                'job_id': job.job_id,
+                'novel_id': session.query(Novel.slug).filter(Novel.id == job.novel_id).scalar(),
+                'chapter_ids': job.chapter_ids[job.next_index:job.next_index + take],
+                'translate_title': job.translate_title,
+                'translate_content': job.translate_content,
+                # A job over already translated chapters is a re-translation and must not replay the cache
+                'retranslate': not job.untranslated_only
+            })
+            leases = dict(job.in_flight_chapters or {})
+            leases.update({str(chapter_id): now for chapter_id in dispatched[-1]['chapter_ids']})
+            job.in_flight_chapters = leases
+            job.next_index += take
+            job.in_flight = len(leases)
+            slots -= take
+
+        chapter_ids = [chapter_id for item in dispatched for chapter_id in item['chapter_ids']]
+        if chapter_ids:
+            session.query(Chapter).filter(
+                Chapter.id.in_(chapter_ids)
+            ).update({'translation_status': 'queued'}, synchronize_session=False)
+
+    for item in dispatched:
+        try:
+            translate_chapter_group_task.delay(
+                user_id=user_id,
+                novel_id=item['novel_id'],
+                chapter_ids=item['chapter_ids'],
+                translate_content=item['translate_content'],
+                translate_title=item['translate_title'],
+                batch_job_id=item['job_id'],
+                retranslate=item['retranslate']
+            )
+        except Exception as e:
+            for chapter_id in item['chapter_ids']:
+                record_chapter_result(item['job_id'], chapter_id, False, error=str(e), dispatch=False)
+
+    return len(chapter_ids)
+
+def record_chapter_result(job_id, chapter_id, success, error=None, dispatch=True):
+
+    with db_session_scope() as session:
+        job = session.query(TranslationBatchJob).filter_by(job_id=job_id).with_for_update().first()
+        if not job:
+            return
+        leases = dict(job.in_flight_chapters or {})
+        if leases.pop(str(chapter_id), None) is None:
+            # Already reclaimed as lost and counted as failed at that point
+            return
+        job.in_flight_chapters = leases
+        job.in_flight = len(leases)
+        if success:
+            job.completed_chapters += 1
+        else:
+            job.failed_chapters += 1
+            if error:
+                job.error_message = error
+        _finish_if_done(job)
+        user_id = job.user_id
+
+    if dispatch:
+        dispatch_batch_jobs(user_id)
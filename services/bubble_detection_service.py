@@ -2,6 +2,12 @@
 
 from typing import List, Dict, Tuple, Optional
 import os
+from services.page_context import PageContext, load_page
+
+# Detection runs on a grayscale copy of at most this many pixels; 0 (the default) analyses at full resolution.
+# Check scripts/compare_analysis_scale.py on sample pages before enabling a limit.
+ANALYSIS_MAX_PIXELS = int(os.getenv('IMAGE_ANALYSIS_MAX_PIXELS', '0'))
+ANALYSIS_MIN_SCALE = float(os.getenv('IMAGE_ANALYSIS_MIN_SCALE', '0.4'))
 
 class BubbleDetectionService:
                                                                              
@@ -21,36 +27,54 @@ class BubbleDetectionService:
             except ImportError as e:
                 raise ImportError(f"OpenCV (cv2) or numpy not installed: {e}")
     
-    def detect_bubbles(self, image_path: str, save_debug: bool = False) -> List[Dict]:
+    def _analysis_page(self, page: PageContext) -> PageContext:
+                                                                                   
+        height, width = page.shape
+        if ANALYSIS_MAX_PIXELS <= 0 or height * width <= ANALYSIS_MAX_PIXELS:
+            return page
+        scale = max(ANALYSIS_MIN_SCALE, (ANALYSIS_MAX_PIXELS / float(height * width)) ** 0.5)
+        return page.scaled(scale)
+    
+    def _scaled_px(self, value: float, scale: float, minimum: int = 1) -> int:
+        return max(minimum, int(round(value * scale)))
+    
+    def _scaled_kernel(self, size: int, scale: float) -> int:
+        scaled = self._scaled_px(size, scale, minimum=3)
+        return scaled if scaled % 2 else scaled + 1
+    
+    def _to_original_bbox(self, bbox: List[int], scale: float, width: int, height: int) -> List[int]:
+        if scale == 1.0:
+            return bbox
+        x, y, w, h = bbox
+        x1 = max(0, int(x / scale))
+        y1 = max(0, int(y / scale))
+        x2 = min(width, int(round((x + w) / scale)))
+        y2 = min(height, int(round((y + h) / scale)))
+        return [x1, y1, x2 - x1, y2 - y1]
+    
+    def detect_bubbles(self, image_path: str, save_debug: bool = False, page: PageContext = None) -> List[Dict]:
                    
         self._ensure_cv2()
         cv2 = self._cv2
         np = self._np
         
-                    
-        image = cv2.imread(image_path)
-        if image is None:
+        page = load_page(image_path, page)
+        try:
+            height, width = page.shape
+        except ValueError:
             print(f"Warning: Could not load image for bubble detection: {image_path}")
             return []
         
-        height, width = image.shape[:2]
         image_area = height * width
+        analysis = self._analysis_page(page)
+        scale = analysis.scale
         
-                              
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-                                                                             
-                                                                  
-        _, thresh = cv2.threshold(gray, 240, 255, cv2.THRESH_BINARY)
-        
-                                                                        
-        _, thresh_lower = cv2.threshold(gray, 220, 255, cv2.THRESH_BINARY)
-        
-                                 
-        combined_thresh = cv2.bitwise_or(thresh, thresh_lower)
+        # Everything above 240 is also above 220, so the 220 mask already is the union of both
+        combined_thresh = analysis.threshold(220)
         
                                                        
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        kernel_size = self._scaled_kernel(5, scale)
+        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
         
                                          
         closed = cv2.morphologyEx(combined_thresh, cv2.MORPH_CLOSE, kernel, iterations=2)
@@ -66,10 +90,10 @@ class BubbleDetectionService:
         
                                      
         for contour in contours:
-            area = cv2.contourArea(contour)
+            area = cv2.contourArea(contour) / (scale * scale)
             
                                     
-            x, y, w, h = cv2.boundingRect(contour)
+            x, y, w, h = self._to_original_bbox(list(cv2.boundingRect(contour)), scale, width, height)
             
                                                           
             min_area = 500
@@ -85,7 +109,7 @@ class BubbleDetectionService:
             
                                                       
             hull = cv2.convexHull(contour)
-            hull_area = cv2.contourArea(hull)
+            hull_area = cv2.contourArea(hull) / (scale * scale)
             
             solidity = 1.0
             if hull_area > 0:
@@ -97,6 +121,9 @@ class BubbleDetectionService:
             if w < 20 or h < 20:
                 continue
             
+            if scale != 1.0:
+                contour = np.round(contour / scale).astype(np.int32)
+            
             bubbles.append({
                 'bubble_id': bubble_id,
                 'bbox': [x, y, w, h],
@@ -116,58 +143,58 @@ class BubbleDetectionService:
         
         return bubbles
     
-    def detect_panels(self, image_path: str, bubbles: List[Dict] = None) -> List[Dict]:
+    def detect_panels(self, image_path: str, bubbles: List[Dict] = None, page: PageContext = None) -> List[Dict]:
                    
         self._ensure_cv2()
         cv2 = self._cv2
         np = self._np
         
-                    
-        image = cv2.imread(image_path)
-        if image is None:
+        page = load_page(image_path, page)
+        try:
+            height, width = page.shape
+        except ValueError:
             print(f"Warning: Could not load image for panel detection: {image_path}")
             return []
         
-        height, width = image.shape[:2]
         image_area = height * width
+        analysis = self._analysis_page(page)
+        scale = analysis.scale
+        analysis_height, analysis_width = analysis.shape
+        gray = analysis.gray
         
-                              
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-                                        
-                                                                              
-        _, white_mask = cv2.threshold(gray, 240, 255, cv2.THRESH_BINARY)
+        white_mask = analysis.threshold(240)
         
                                                                       
-        vertical_gutter_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, height // 5))
+        vertical_gutter_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, analysis_height // 5))
         vertical_gutters = cv2.morphologyEx(white_mask, cv2.MORPH_OPEN, vertical_gutter_kernel)
         
                                                                         
-        horizontal_gutter_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (width // 5, 1))
+        horizontal_gutter_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (analysis_width // 5, 1))
         horizontal_gutters = cv2.morphologyEx(white_mask, cv2.MORPH_OPEN, horizontal_gutter_kernel)
         
                          
         white_gutters = cv2.bitwise_or(vertical_gutters, horizontal_gutters)
         
                                                                   
-        gutter_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+        gutter_kernel_size = self._scaled_kernel(5, scale)
+        gutter_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (gutter_kernel_size, gutter_kernel_size))
         white_gutters = cv2.dilate(white_gutters, gutter_kernel, iterations=2)
         
                                       
                                     
-        edges = cv2.Canny(gray, 50, 150)
+        edges = analysis.edges(50, 150)
         
                                               
         kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-        dilated = cv2.dilate(edges, kernel, iterations=2)
+        dilated = cv2.dilate(edges, kernel, iterations=self._scaled_px(2, scale))
         
                                                                            
                           
-        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (width // 10, 1))
+        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (analysis_width // 10, 1))
         horizontal_lines = cv2.morphologyEx(dilated, cv2.MORPH_OPEN, horizontal_kernel)
         
                         
-        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, height // 10))
+        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, analysis_height // 10))
         vertical_lines = cv2.morphologyEx(dilated, cv2.MORPH_OPEN, vertical_kernel)
         
                              
@@ -176,9 +203,9 @@ class BubbleDetectionService:
                                          
                                                            
         diagonal_mask = np.zeros_like(gray)
-        hough_lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=80, 
-                                       minLineLength=min(width, height) // 6, 
-                                       maxLineGap=15)
+        hough_lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=self._scaled_px(80, scale, minimum=20), 
+                                       minLineLength=min(analysis_width, analysis_height) // 6, 
+                                       maxLineGap=self._scaled_px(15, scale))
         
         if hough_lines is not None:
             for line in hough_lines:
@@ -188,8 +215,8 @@ class BubbleDetectionService:
                                                                                      
                                                                
                 line_length = np.sqrt((x2 - x1)**2 + (y2 - y1)**2)
-                if line_length > min(width, height) // 8:
-                    cv2.line(diagonal_mask, (x1, y1), (x2, y2), 255, 3)
+                if line_length > min(analysis_width, analysis_height) // 8:
+                    cv2.line(diagonal_mask, (x1, y1), (x2, y2), 255, self._scaled_px(3, scale))
         
                                         
                                                                 
@@ -202,12 +229,12 @@ class BubbleDetectionService:
         if bubbles:
             bubble_mask = np.zeros_like(gray)
             for bubble in bubbles:
-                bx, by, bw, bh = bubble['bbox']
+                bx, by, bw, bh = [int(round(value * scale)) for value in bubble['bbox']]
                                                             
-                padding = 5
+                padding = self._scaled_px(5, scale)
                 cv2.rectangle(bubble_mask, 
                             (max(0, bx - padding), max(0, by - padding)), 
-                            (min(width, bx + bw + padding), min(height, by + bh + padding)), 
+                            (min(analysis_width, bx + bw + padding), min(analysis_height, by + bh + padding)), 
                             255, -1)
             
                                                      
@@ -226,7 +253,7 @@ class BubbleDetectionService:
         
                                                                       
                                          
-        separator_mask = cv2.dilate(all_separators, kernel, iterations=3)
+        separator_mask = cv2.dilate(all_separators, kernel, iterations=self._scaled_px(3, scale))
         inverted = cv2.bitwise_not(separator_mask)
         
                                                    
@@ -237,12 +264,12 @@ class BubbleDetectionService:
         max_panel_area = image_area * 0.95                                              
         
         for contour in panel_contours:
-            area = cv2.contourArea(contour)
+            area = cv2.contourArea(contour) / (scale * scale)
             
             if area < min_panel_area or area > max_panel_area:
                 continue
             
-            x, y, w, h = cv2.boundingRect(contour)
+            x, y, w, h = self._to_original_bbox(list(cv2.boundingRect(contour)), scale, width, height)
             
                                       
             if w < 50 or h < 50:
@@ -281,6 +308,34 @@ class BubbleDetectionService:
         
         return panels
     
+    def find_horizontal_gutters(self, image_path: str, page: PageContext = None,
+                                min_height: int = 8) -> List[Tuple[int, int]]:
+                   
+        self._ensure_cv2()
+        np = self._np
+        
+        page = load_page(image_path, page)
+        height, width = page.shape
+        analysis = self._analysis_page(page)
+        scale = analysis.scale
+        
+        # Same near-white mask as the panel gutters, plus flat rows for dark or coloured gutters
+        white_rows = analysis.threshold(240).mean(axis=1) >= 255 * 0.98
+        flat_rows = analysis.gray.std(axis=1) <= 3
+        gutter_rows = np.concatenate(([False], white_rows | flat_rows, [False]))
+        
+        changes = np.flatnonzero(np.diff(gutter_rows.astype(np.int8)))
+        min_rows = self._scaled_px(min_height, scale)
+        gutters = []
+        for start, end in zip(changes[::2], changes[1::2]):
+            if end - start < min_rows:
+                continue
+            gutters.append((
+                max(0, int(start / scale)),
+                min(height, int(round(end / scale)))
+            ))
+        return gutters
+    
     def _remove_overlapping_panels(self, panels: List[Dict]) -> List[Dict]:
                    
         if len(panels) <= 1:
@@ -0,0 +1,55 @@
+import os
+import json
+import redis
+
+_client = None
+
+def get_redis():
+
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+            socket_timeout=1,
+            socket_connect_timeout=1
+        )
+    return _client
+
+def cache_get(key):
+
+    try:
+        return get_redis().get(key)
+    except redis.RedisError:
+        return None
+
+def cache_get_json(key):
+
+    raw = cache_get(key)
+    if raw is None:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+def cache_set(key, value, ttl):
+
+    try:
+        get_redis().set(key, value, ex=ttl)
+        return True
+    except redis.RedisError:
+        return False
+
+def cache_set_json(key, value, ttl):
+
+    return cache_set(key, json.dumps(value, sort_keys=True), ttl)
+
+def cache_delete(*keys):
+
+    if not keys:
+        return False
+    try:
+        get_redis().delete(*keys)
+        return True
+    except redis.RedisError:
+        return False
@@ -9,6 +9,8 @@ from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 DATA_DIR = 'data'
 KEY_FILE = os.path.join(DATA_DIR, '.encryption_key')
 
+_fernet = None
+
 def _get_or_create_key():
 
     if os.path.exists(KEY_FILE):
@@ -27,14 +29,20 @@ def _get_or_create_key():
     
     return key
 
+def _get_fernet():
+
+    global _fernet
+    if _fernet is None:
+        _fernet = Fernet(_get_or_create_key())
+    return _fernet
+
 def encrypt_value(value):
 
     if not value:
         return ''
     
     try:
-        key = _get_or_create_key()
-        f = Fernet(key)
+        f = _get_fernet()
         
         encrypted = f.encrypt(value.encode('utf-8'))
         
@@ -48,8 +56,7 @@ def decrypt_value(encrypted_value):
         return ''
     
     try:
-        key = _get_or_create_key()
-        f = Fernet(key)
+        f = _get_fernet()
         
         encrypted_bytes = base64.b64decode(encrypted_value.encode('utf-8'))
         
@@ -0,0 +1,117 @@
+import threading
+from collections import OrderedDict, deque
+from services.translation_cache_service import glossary_fingerprint
+
+MATCHER_CACHE_SIZE = 256
+
+_matchers = OrderedDict()
+_matchers_lock = threading.Lock()
+
+class GlossaryMatcher:
+
+    def __init__(self, patterns):
+
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+        self.keys = set()
+
+        for pattern, keys in patterns.items():
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                state = next_state
+            self.output[state] = tuple(set(self.output[state]) | set(keys))
+            self.keys.update(keys)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                if self.output[self.fail[next_state]]:
+                    self.output[next_state] = tuple(set(self.output[next_state]) | set(self.output[self.fail[next_state]]))
+
+    def find(self, text):
+
+        found = set()
+        state = 0
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+                if len(found) == len(self.keys):
+                    break
+        return found
+
+def _name_patterns(korean_name):
+
+    from services.ai_service import get_korean_surnames
+
+    name = (korean_name or '').strip()
+    if not name:
+        return set()
+
+    patterns = {name}
+    parts = [part for part in name.replace('(', ' ').replace(')', ' ').replace('/', ' ').replace(',', ' ').split() if part]
+    patterns.update(part for part in parts if len(part) >= 2)
+
+    # Characters are usually addressed by given name alone, so match 민수 for 김민수 as well
+    surnames = get_korean_surnames()
+    for part in parts:
+        if len(part) >= 4 and part[:2] in surnames:
+            patterns.add(part[2:])
+        elif len(part) >= 3 and part[0] in surnames:
+            patterns.add(part[1:])
+    return patterns
+
+def get_glossary_matcher(glossary):
+
+    fingerprint = glossary_fingerprint(glossary)
+    with _matchers_lock:
+        matcher = _matchers.get(fingerprint)
+        if matcher is not None:
+            _matchers.move_to_end(fingerprint)
+            return matcher
+
+    patterns = {}
+    for char_id, char_info in glossary.items():
+        if not isinstance(char_info, dict):
+            continue
+        for pattern in _name_patterns(char_info.get('korean_name')):
+            patterns.setdefault(pattern, set()).add(char_id)
+    matcher = GlossaryMatcher(patterns)
+
+    with _matchers_lock:
+        _matchers[fingerprint] = matcher
+        while len(_matchers) > MATCHER_CACHE_SIZE:
+            _matchers.popitem(last=False)
+    return matcher
+
+def prune_glossary(glossary, text):
+
+    if not glossary or not isinstance(glossary, dict):
+        return glossary
+    if not text:
+        return {}
+
+    matched = get_glossary_matcher(glossary).find(text)
+    return {
+        char_id: char_info for char_id, char_info in glossary.items()
+        if char_id in matched or not (isinstance(char_info, dict) and (char_info.get('korean_name') or '').strip())
+    }
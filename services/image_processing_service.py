@@ -6,6 +6,8 @@
 from PIL import Image, ImageDraw, ImageFont
 from typing import List, Dict
 import os
+from services.page_context import PageContext, load_page
+from services.inpainting_service import inpaint_masked_regions
 
 class ImageProcessingService:
                                                                              
@@ -31,7 +33,7 @@ class ImageProcessingService:
                                  
         return None
     
-    def remove_text(self, image_path: str, text_regions: List[Dict]):
+    def remove_text(self, image_path: str, text_regions: List[Dict], page: PageContext = None):
                    
                                                                       
         try:
@@ -45,11 +47,8 @@ class ImageProcessingService:
                 f"Original error: {str(e)}"
             )
         
-                    
-        img = cv2.imread(image_path)
-        
-        if img is None:
-            raise ValueError(f"Could not read image: {image_path}")
+        page = load_page(image_path, page)
+        img = page.image
         
                                           
         mask = np.zeros(img.shape[:2], dtype=np.uint8)
@@ -66,10 +65,8 @@ class ImageProcessingService:
                               
             cv2.rectangle(mask, (x, y), (x + w, y + h), 255, -1)
         
-                                                                           
-        inpainted = cv2.inpaint(img, mask, inpaintRadius=7, flags=cv2.INPAINT_TELEA)
-        
-        return inpainted
+        # Work scales with the text area, which also keeps tall strips bounded without tiling here
+        return inpaint_masked_regions(img, mask)
     
     def render_text(self, image, translated_regions: List[Dict], 
                    output_path: str) -> str:
@@ -85,10 +82,11 @@ class ImageProcessingService:
                 f"Original error: {str(e)}"
             )
         
-                                           
-        img_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        pil_img = Image.fromarray(img_rgb)
-        draw = ImageDraw.Draw(pil_img)
+        # Only black and white are drawn, which are the same in BGR and RGB, so each text
+        # block is drawn straight onto a view of the BGR buffer without any colour conversion
+        height, width = image.shape[:2]
+        measure = ImageDraw.Draw(Image.new('L', (1, 1)))
+        outline_range = 2
         
         for region in translated_regions:
             text = region['text']
@@ -106,25 +104,37 @@ class ImageProcessingService:
                 font = ImageFont.load_default()
             
                                          
-            wrapped_text = self._wrap_text(text, font, w, draw)
+            wrapped_text = self._wrap_text(text, font, w, measure)
             
                                                       
-            bbox = draw.multiline_textbbox((0, 0), wrapped_text, font=font)
+            bbox = measure.multiline_textbbox((0, 0), wrapped_text, font=font, align='center')
             text_width = bbox[2] - bbox[0]
             text_height = bbox[3] - bbox[1]
             
             text_x = int(x + (w - text_width) // 2)
             text_y = int(y + (h - text_height) // 2)
             
+            left = max(0, text_x + bbox[0] - outline_range - 1)
+            top = max(0, text_y + bbox[1] - outline_range - 1)
+            right = min(width, text_x + bbox[2] + outline_range + 1)
+            bottom = min(height, text_y + bbox[3] + outline_range + 1)
+            if right <= left or bottom <= top:
+                continue
+            
+            crop = image[top:bottom, left:right]
+            pil_crop = Image.fromarray(crop)
+            draw = ImageDraw.Draw(pil_crop)
+            origin_x = text_x - left
+            origin_y = text_y - top
+            
                                                            
                                   
-            outline_range = 2
             for adj_x in range(-outline_range, outline_range + 1):
                 for adj_y in range(-outline_range, outline_range + 1):
                     if adj_x == 0 and adj_y == 0:
                         continue
                     draw.multiline_text(
-                        (text_x + adj_x, text_y + adj_y),
+                        (origin_x + adj_x, origin_y + adj_y),
                         wrapped_text,
                         font=font,
                         fill='black',
@@ -133,26 +143,15 @@ class ImageProcessingService:
             
                                
             draw.multiline_text(
-                (text_x, text_y),
+                (origin_x, origin_y),
                 wrapped_text,
                 font=font,
                 fill='white',
                 align='center'
             )
+            crop[:] = pil_crop
         
-                                                 
-        try:
-            import cv2
-            import numpy as np
-        except ImportError as e:
-            raise ImportError(
-                f"OpenCV (cv2) and numpy are required for image processing. "
-                f"Install them with: pip install opencv-python-headless numpy. "
-                f"Also install system library: sudo apt-get install libgl1-mesa-glx libglib2.0-0. "
-                f"Original error: {str(e)}"
-            )
-        final_img = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
-        cv2.imwrite(output_path, final_img)
+        cv2.imwrite(output_path, image)
         
         return output_path
     
@@ -198,11 +197,11 @@ class ImageProcessingService:
     
     def process_image(self, image_path: str, ocr_results: List[Dict], 
                      translated_results: List[Dict], output_path: str, 
-                     overwrite_text: bool = True) -> str:
+                     overwrite_text: bool = True, page: PageContext = None) -> str:
                    
         if overwrite_text:
                                           
-            inpainted_img = self.remove_text(image_path, ocr_results)
+            inpainted_img = self.remove_text(image_path, ocr_results, page=page)
             
                                             
             final_path = self.render_text(inpainted_img, translated_results, output_path)
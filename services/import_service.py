@@ -4,8 +4,8 @@ import re
 import time
 import hashlib
 from database.db_novel import (
-    create_novel_db, get_novel_db, find_novel_by_source_url_db, 
-    find_novel_by_title_db, add_chapter_atomic, update_novel_db
+    create_novel_db, get_novel_db, find_import_novel_db, add_chapter_atomic, update_novel_db,
+    bulk_add_chapters_db, normalize_source_url
 )
 from models.settings import load_settings
 from services.image_service import download_image, extract_images_from_content
@@ -33,9 +33,7 @@ def process_chapter_import(user_id, chapter_data, skip_translation=False):
     
     if is_novel_page or (not content and not chapter_data.get('chapter_number')):
         
-        novel_data = find_novel_by_title_db(user_id, original_title)
-        if not novel_data:
-            novel_data = find_novel_by_source_url_db(user_id, novel_source_url)
+        novel_data = find_import_novel_db(user_id, title=original_title, source_url=novel_source_url)
         
         novel_id = novel_data['slug'] if novel_data else None
         
@@ -135,10 +133,7 @@ def process_chapter_import(user_id, chapter_data, skip_translation=False):
     if not content:
         return {'success': False, 'error': 'No content provided'}
     
-    novel_data = find_novel_by_title_db(user_id, original_title)
-    
-    if not novel_data:
-        novel_data = find_novel_by_source_url_db(user_id, novel_source_url)
+    novel_data = find_import_novel_db(user_id, title=original_title, source_url=novel_source_url)
     
     novel_id = novel_data['slug'] if novel_data else None
     
@@ -274,9 +269,8 @@ def create_novel_from_data(user_id, chapter_data, skip_translation=False):
     create_novel_db(user_id, novel_data)
     return slug
 
-def add_chapter_to_novel(user_id, novel_id, chapter_data, images, skip_translation=False):
+def prepare_chapter_data(novel_id, chapter_data, images):
 
-    
     chapter_data['images'] = images
     
     if 'chapter_title' in chapter_data and chapter_data.get('chapter_title'):
@@ -292,6 +286,12 @@ def add_chapter_to_novel(user_id, novel_id, chapter_data, images, skip_translati
         chapter_num = chapter_data.get('chapter_number', '0')
         chapter_data['slug'] = f"{novel_id}_ch{chapter_num}_{int(time.time())}"
     
+    return chapter_data
+
+def add_chapter_to_novel(user_id, novel_id, chapter_data, images, skip_translation=False):
+
+    chapter_data = prepare_chapter_data(novel_id, chapter_data, images)
+    
     result = add_chapter_atomic(user_id, novel_id, chapter_data)
     
     return result
@@ -308,68 +308,62 @@ def slugify_english(text):
     
     return text or 'unknown_novel'
 
+NOVEL_METADATA_FIELDS = [
+    'translated_title', 'author', 'translated_author', 'tags',
+    'translated_tags', 'synopsis', 'translated_synopsis'
+]
+
+def collect_novel_updates(user_id, chapters):
+
+    update_data = {}
+    for chapter_data in chapters:
+        for field in NOVEL_METADATA_FIELDS:
+            if chapter_data.get(field):
+                update_data[field] = chapter_data.get(field)
+    
+    cover_url = next((ch.get('cover_url') for ch in reversed(chapters) if ch.get('cover_url')), '')
+    if cover_url:
+        cover_image_path = download_image(cover_url, user_id, overwrite=True)
+        if cover_image_path:
+            update_data['cover_url'] = cover_image_path
+    
+    return update_data
+
 def process_batch_chapter_import(user_id, chapters_data):
 
     from services.image_service import download_images_parallel
     
-    results = []
-    successful = 0
-    failed = 0
+    results = [None] * len(chapters_data)
     
+    groups = {}
     for idx, chapter_data in enumerate(chapters_data):
+        source_url = chapter_data.get('source_url', '')
+        novel_source_url = chapter_data.get('novel_source_url', source_url)
+        key = ((chapter_data.get('original_title') or '').strip(), normalize_source_url(novel_source_url))
+        groups.setdefault(key, []).append(idx)
+    
+    def fail(idx, error):
+        results[idx] = {
+            'index': idx,
+            'success': False,
+            'error': str(error),
+            'chapter_title': chapters_data[idx].get('chapter_title', 'Unknown')
+        }
+    
+    pending = {}
+    for (original_title, novel_source_url), indices in groups.items():
+        group_chapters = [chapters_data[idx] for idx in indices]
+        first_chapter = group_chapters[0]
+        
         try:
-            original_title = chapter_data.get('original_title', '')
-            source_url = chapter_data.get('source_url', '')
-            novel_source_url = chapter_data.get('novel_source_url', source_url)
-            images_from_extension = chapter_data.get('images', [])
-            content = chapter_data.get('content', '')
-            skip_translation = chapter_data.get('skip_translation', False)
-            
-            
-            novel_data = find_novel_by_title_db(user_id, original_title)
-            if not novel_data:
-                novel_data = find_novel_by_source_url_db(user_id, novel_source_url)
-            
+            novel_data = find_import_novel_db(user_id, title=original_title, source_url=novel_source_url)
             novel_id = novel_data['slug'] if novel_data else None
             
             if novel_id:
-                update_data = {}
-                
-                cover_url = chapter_data.get('cover_url', '')
-                if cover_url:
-                    cover_image_path = download_image(cover_url, user_id, overwrite=True)
-                    if cover_image_path:
-                        update_data['cover_url'] = cover_image_path
-                
-                if chapter_data.get('translated_title'):
-                    update_data['translated_title'] = chapter_data.get('translated_title')
-                if chapter_data.get('author'):
-                    update_data['author'] = chapter_data.get('author')
-                if chapter_data.get('translated_author'):
-                    update_data['translated_author'] = chapter_data.get('translated_author')
-                if chapter_data.get('tags'):
-                    update_data['tags'] = chapter_data.get('tags')
-                if chapter_data.get('translated_tags'):
-                    update_data['translated_tags'] = chapter_data.get('translated_tags')
-                if chapter_data.get('synopsis'):
-                    update_data['synopsis'] = chapter_data.get('synopsis')
-                if chapter_data.get('translated_synopsis'):
-                    update_data['translated_synopsis'] = chapter_data.get('translated_synopsis')
-                    
+                update_data = collect_novel_updates(user_id, group_chapters)
                 if update_data:
                     update_novel_db(user_id, novel_id, update_data)
-            
-            images = []
-            if images_from_extension:
-                images = download_images_parallel(images_from_extension, user_id)
-            
-            content_images = extract_images_from_content(content, user_id)
-            existing_urls = {img['url'] for img in images}
-            for content_img in content_images:
-                if content_img['url'] not in existing_urls:
-                    images.append(content_img)
-            
-            if not novel_id:
+            else:
                                                       
                 from services.settings_service import can_user_import_novel
                 can_import, error_msg, current_count, limit = can_user_import_novel(user_id)
@@ -377,18 +371,38 @@ def process_batch_chapter_import(user_id, chapters_data):
                 if not can_import:
                     raise Exception(error_msg)
                 
-                novel_id = create_novel_from_data(user_id, chapter_data, skip_translation)
-            
-            result = add_chapter_to_novel(
-                user_id=user_id,
-                novel_id=novel_id,
-                chapter_data=chapter_data,
-                images=images,
-                skip_translation=skip_translation
-            )
-            
+                novel_id = create_novel_from_data(user_id, first_chapter, first_chapter.get('skip_translation', False))
+        except Exception as e:
+            for idx in indices:
+                fail(idx, e)
+            continue
+        
+        for idx in indices:
+            chapter_data = chapters_data[idx]
+            try:
+                images = []
+                if chapter_data.get('images'):
+                    images = download_images_parallel(chapter_data.get('images', []), user_id)
+                
+                content_images = extract_images_from_content(chapter_data.get('content', ''), user_id)
+                existing_urls = {img['url'] for img in images}
+                for content_img in content_images:
+                    if content_img['url'] not in existing_urls:
+                        images.append(content_img)
+                
+                pending.setdefault(novel_id, []).append((idx, prepare_chapter_data(novel_id, chapter_data, images)))
+            except Exception as e:
+                fail(idx, e)
+    
+    inserted = bulk_add_chapters_db(user_id, {
+        novel_id: [chapter_data for _, chapter_data in entries]
+        for novel_id, entries in pending.items()
+    })
+    
+    for novel_id, entries in pending.items():
+        for (idx, chapter_data), result in zip(entries, inserted.get(novel_id, [])):
             if result.get('success'):
-                results.append({
+                results[idx] = {
                     'index': idx,
                     'success': True,
                     'data': {
@@ -397,24 +411,16 @@ def process_batch_chapter_import(user_id, chapters_data):
                     },
                     'chapter_title': chapter_data.get('chapter_title', 'Unknown'),
                     'already_exists': result.get('already_exists', False)
-                })
-                successful += 1
+                }
             else:
-                raise Exception(result.get('error', 'Unknown error'))
-            
-        except Exception as e:
-            results.append({
-                'index': idx,
-                'success': False,
-                'error': str(e),
-                'chapter_title': chapter_data.get('chapter_title', 'Unknown')
-            })
-            failed += 1
+                fail(idx, result.get('error', 'Unknown error'))
+    
+    successful = sum(1 for result in results if result and result['success'])
     
     return {
         'success': True,
         'total': len(chapters_data),
         'successful': successful,
-        'failed': failed,
+        'failed': len(chapters_data) - successful,
         'results': results
     }
@@ -9,6 +9,63 @@ from PIL import Image
 import io
 import base64
 
+INPAINT_RADIUS = 7
+INPAINT_MAX_WORKERS = int(os.getenv('INPAINT_MAX_WORKERS', '1'))
+
+def _merge_boxes(boxes: List[List[int]]) -> List[List[int]]:
+
+    merged = []
+    for box in sorted(boxes):
+        x1, y1, x2, y2 = box
+        changed = True
+        while changed:
+            changed = False
+            for other in merged:
+                if x1 < other[2] and other[0] < x2 and y1 < other[3] and other[1] < y2:
+                    merged.remove(other)
+                    x1, y1 = min(x1, other[0]), min(y1, other[1])
+                    x2, y2 = max(x2, other[2]), max(y2, other[3])
+                    changed = True
+                    break
+        merged.append([x1, y1, x2, y2])
+    return merged
+
+def inpaint_masked_regions(img, mask, radius: int = INPAINT_RADIUS, max_workers: int = INPAINT_MAX_WORKERS):
+
+    import cv2
+    
+    # Telea only reads known pixels within `radius` of the hole, so a padded crop around each
+    # connected mask region gives the same result as inpainting the whole image
+    margin = radius * 2
+    h, w = mask.shape[:2]
+    count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    boxes = _merge_boxes([
+        [
+            max(0, int(x) - margin), max(0, int(y) - margin),
+            min(w, int(x + bw) + margin), min(h, int(y + bh) + margin)
+        ]
+        for x, y, bw, bh, _ in stats[1:count]
+    ])
+    
+    inpainted = img.copy()
+    
+    def inpaint_box(box):
+        x1, y1, x2, y2 = box
+        inpainted[y1:y2, x1:x2] = cv2.inpaint(
+            img[y1:y2, x1:x2], mask[y1:y2, x1:x2], inpaintRadius=radius, flags=cv2.INPAINT_TELEA
+        )
+    
+    # Crops never overlap after merging, and cv2 releases the GIL, so far-apart regions can run in parallel
+    if max_workers > 1 and len(boxes) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(boxes))) as executor:
+            list(executor.map(inpaint_box, boxes))
+    else:
+        for box in boxes:
+            inpaint_box(box)
+    
+    return inpainted
+
 class InpaintingService:
                                                                            
     
@@ -66,8 +123,7 @@ class InpaintingService:
                                                      
             cv2.rectangle(mask, (x1, y1), (x2, y2), 255, -1)
         
-                                       
-        inpainted = cv2.inpaint(img, mask, inpaintRadius=7, flags=cv2.INPAINT_TELEA)
+        inpainted = inpaint_masked_regions(img, mask)
         
                      
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
@@ -5,6 +5,7 @@ from PIL import Image
 import io
 import base64
 import requests
+from services import provider_client
 import json
 import re
 
@@ -103,11 +104,13 @@ IMPORTANT: Generate the translated image as your response. The image should look
         }
         
         try:
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
+            response = provider_client.post(
+                'openrouter',
+                provider_client.OPENROUTER_URL,
                 headers=headers,
                 json=json_payload,
-                timeout=120                                       
+                timeout=120,
+                rate_limit=(api_key, json_payload.get('model'))
             )
             response.raise_for_status()
             
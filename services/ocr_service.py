@@ -26,6 +26,49 @@ class OCRService:
         else:
             raise ValueError(f"Unknown OCR method: {method}")
     
+    def detect_text_tiled(self, image_path: str, method: str, source_language: str = 'korean',
+                          api_key: Optional[str] = None, endpoint: Optional[str] = None,
+                          page=None) -> List[Dict]:
+                   
+        from services.page_context import load_page
+        from services.tiling_service import plan_tiles, offset_regions, TILE_HEIGHT, TILE_MAX_WORKERS
+        
+        # Only the header is read here, so short pages never pay for a decode
+        with Image.open(image_path) as header:
+            if TILE_HEIGHT <= 0 or header.size[1] <= TILE_HEIGHT * 1.25:
+                return self.detect_text(image_path, method, source_language, api_key, endpoint)
+        
+        page = load_page(image_path, page)
+        tiles = plan_tiles(page)
+        if len(tiles) == 1:
+            return self.detect_text(image_path, method, source_language, api_key, endpoint)
+        
+        import cv2
+        import tempfile
+        from concurrent.futures import ThreadPoolExecutor
+        
+        def detect_tile(tile):
+            
+            # Each tile is encoded only while it is being uploaded, keeping provider size limits and memory bounded
+            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
+                tmp_path = tmp.name
+            try:
+                cv2.imwrite(tmp_path, page.image[tile['top']:tile['bottom']])
+                results = self.detect_text(tmp_path, method, source_language, api_key, endpoint)
+            finally:
+                try:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                except:
+                    pass
+            return offset_regions(results or [], tile)
+        
+        print(f"🧩 Running OCR on {len(tiles)} tiles of {image_path}")
+        with ThreadPoolExecutor(max_workers=max(1, min(TILE_MAX_WORKERS, len(tiles)))) as executor:
+            tile_results = list(executor.map(detect_tile, tiles))
+        
+        return [region for regions in tile_results for region in regions]
+    
     def detect_text_in_region(self, image_path: str, x: int, y: int, w: int, h: int,
                               method: str, source_language: str = 'korean',
                               api_key: Optional[str] = None, endpoint: Optional[str] = None) -> Optional[Dict]:
@@ -346,10 +389,12 @@ class OCRService:
     
     def detect_text_with_grouping(self, image_path: str, method: str, source_language: str = 'korean',
                                    api_key: Optional[str] = None, endpoint: Optional[str] = None,
-                                   enable_bubble_detection: bool = True) -> Dict:
+                                   enable_bubble_detection: bool = True, page=None) -> Dict:
                    
-                                
-        ocr_regions = self.detect_text(image_path, method, source_language, api_key, endpoint)
+        from services.page_context import load_page
+        
+        page = load_page(image_path, page)
+        ocr_regions = self.detect_text_tiled(image_path, method, source_language, api_key, endpoint, page=page)
         
         if not enable_bubble_detection or not ocr_regions:
                                                                       
@@ -366,12 +411,12 @@ class OCRService:
             
                                                               
             print(f"🔍 Detecting speech bubbles in {image_path}...")
-            bubbles = bubble_detection_service.detect_bubbles(image_path, save_debug=False)
+            bubbles = bubble_detection_service.detect_bubbles(image_path, save_debug=False, page=page)
             print(f"✅ Found {len(bubbles)} speech bubbles")
             
                                                                                     
             print(f"🔍 Detecting panel boundaries...")
-            panels = bubble_detection_service.detect_panels(image_path, bubbles=bubbles)
+            panels = bubble_detection_service.detect_panels(image_path, bubbles=bubbles, page=page)
             print(f"✅ Found {len(panels)} panels")
             
                                              
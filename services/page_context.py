@@ -0,0 +1,98 @@
+from typing import Dict, Tuple
+
+class PageContext:
+
+    def __init__(self, image_path: str):
+        self.image_path = image_path
+        self._cv2 = None
+        self._image = None
+        self._gray = None
+        self._thresholds: Dict[int, object] = {}
+        self._edges: Dict[Tuple[int, int], object] = {}
+        self._scaled: Dict[float, 'PageContext'] = {}
+        self.scale = 1.0
+        self.tiles = None
+
+    def _ensure_cv2(self):
+
+        if self._cv2 is None:
+            try:
+                import cv2
+                self._cv2 = cv2
+            except ImportError as e:
+                raise ImportError(f"OpenCV (cv2) not installed: {e}")
+        return self._cv2
+
+    @property
+    def image(self):
+
+        # Decoded once per page; detectors, inpainting and rendering all share this BGR buffer
+        if self._image is None:
+            image = self._ensure_cv2().imread(self.image_path)
+            if image is None:
+                raise ValueError(f"Could not read image: {self.image_path}")
+            self._image = image
+        return self._image
+
+    @property
+    def shape(self):
+        if self._gray is not None:
+            return self._gray.shape[:2]
+        return self.image.shape[:2]
+
+    @property
+    def gray(self):
+
+        if self._gray is None:
+            self._gray = self._ensure_cv2().cvtColor(self.image, self._cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    def threshold(self, level: int):
+
+        mask = self._thresholds.get(level)
+        if mask is None:
+            cv2 = self._ensure_cv2()
+            _, mask = cv2.threshold(self.gray, level, 255, cv2.THRESH_BINARY)
+            self._thresholds[level] = mask
+        return mask
+
+    def edges(self, low: int, high: int):
+
+        edges = self._edges.get((low, high))
+        if edges is None:
+            edges = self._ensure_cv2().Canny(self.gray, low, high)
+            self._edges[(low, high)] = edges
+        return edges
+
+    def scaled(self, scale: float) -> 'PageContext':
+
+        if scale >= 1.0:
+            return self
+        scale = round(scale, 3)
+        child = self._scaled.get(scale)
+        if child is None:
+            cv2 = self._ensure_cv2()
+            height, width = self.shape
+            size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+            # Grayscale-only analysis copy; INTER_AREA keeps thin gutters and outlines visible
+            child = PageContext(self.image_path)
+            child._cv2 = cv2
+            child._gray = cv2.resize(self.gray, size, interpolation=cv2.INTER_AREA)
+            child.scale = scale
+            self._scaled[scale] = child
+        return child
+
+    def release(self):
+
+        self._image = None
+        self._gray = None
+        self._thresholds.clear()
+        self._edges.clear()
+        self._scaled.clear()
+        self.tiles = None
+
+def load_page(image_path: str, page: PageContext = None) -> PageContext:
+
+    if page is not None:
+        return page
+    return PageContext(image_path)
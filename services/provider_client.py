@@ -0,0 +1,420 @@
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from services import rate_limit_service
+from services.rate_limit_service import RateLimitExceeded
+from services.cache_service import cache_get, cache_set
+
+CONNECT_TIMEOUT = float(os.getenv('PROVIDER_CONNECT_TIMEOUT', '10'))
+READ_TIMEOUT = float(os.getenv('PROVIDER_READ_TIMEOUT', '180'))
+MAX_RETRIES = int(os.getenv('PROVIDER_MAX_RETRIES', '2'))
+# Overall budget for one call including retries and rate-limit waits; keep it under Celery's 240s soft limit
+REQUEST_DEADLINE = float(os.getenv('PROVIDER_REQUEST_DEADLINE', '220'))
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 20.0
+POOL_SIZE = int(os.getenv('PROVIDER_POOL_SIZE', '32'))
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+GOOGLE_CACHE_TTL = int(os.getenv('GOOGLE_PROMPT_CACHE_TTL', '3600'))
+GOOGLE_CACHE_UNSUPPORTED_TTL = 86400
+OPENROUTER_CACHE_CONTROL_PREFIXES = ('anthropic/', 'google/')
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+OPENAI_URL = "https://api.openai.com/v1/chat/completions"
+GOOGLE_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+GOOGLE_STREAM_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:streamGenerateContent"
+GOOGLE_CACHED_CONTENTS_URL = "https://generativelanguage.googleapis.com/v1beta/cachedContents"
+DEEPL_URL = "https://api.deepl.com/v2/translate"
+DEEPL_FREE_URL = "https://api-free.deepl.com/v2/translate"
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def get_session(provider):
+
+    session = _sessions.get(provider)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(provider)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _sessions[provider] = session
+    return session
+
+def _retry_after(response):
+
+    if response is None:
+        return None
+    retry_after = response.headers.get('Retry-After')
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        return None
+
+def _retry_delay(attempt, response=None):
+
+    retry_after = _retry_after(response)
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_MAX)
+
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+def post(provider, url, headers=None, json=None, data=None, params=None, timeout=None, max_retries=None, stream=False, rate_limit=None):
+
+    session = get_session(provider)
+    read_timeout = timeout or READ_TIMEOUT
+    retries = MAX_RETRIES if max_retries is None else max_retries
+    deadline = time.monotonic() + max(REQUEST_DEADLINE, CONNECT_TIMEOUT + 1)
+
+    def remaining():
+        return deadline - time.monotonic()
+
+    attempt = 0
+    while True:
+        lease = rate_limit_service.acquire(provider, *rate_limit, max_wait=max(0.0, remaining() - CONNECT_TIMEOUT)) if rate_limit else None
+        try:
+            response = session.post(
+                url, headers=headers, json=json, data=data, params=params,
+                timeout=(CONNECT_TIMEOUT, max(1.0, min(read_timeout, remaining()))), stream=stream
+            )
+        except requests.exceptions.ReadTimeout:
+            # The provider may still be generating (and billing) this completion, so never re-send it
+            rate_limit_service.release(lease, timed_out=True)
+            raise
+        except requests.exceptions.ConnectionError:
+            rate_limit_service.release(lease)
+            delay = _retry_delay(attempt)
+            if attempt >= retries or remaining() < delay + CONNECT_TIMEOUT + 1:
+                raise
+            time.sleep(delay)
+            attempt += 1
+            continue
+
+        if lease:
+            # requests stops the clock once headers arrive, so streamed calls are not judged
+            # slow for the time spent generating a long output
+            lease['first_byte_latency'] = response.elapsed.total_seconds()
+        
+        if stream and response.status_code == 200:
+            response.rate_limit_lease = lease
+        else:
+            rate_limit_service.release(lease, response.status_code, _retry_after(response))
+
+        if response.status_code in RETRY_STATUS_CODES and attempt < retries:
+            delay = _retry_delay(attempt, response)
+            if remaining() >= delay + CONNECT_TIMEOUT + 1:
+                response.close()
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+        return response
+
+def _error_message(provider, response):
+
+    error_msg = f"{provider.capitalize()} API Error: {response.status_code}"
+    try:
+        error_data = response.json()
+        error_msg += f" - {error_data.get('error', {}).get('message', 'Unknown error')}"
+    except Exception:
+        pass
+    retry_after = _retry_after(response)
+    if response.status_code == 429 and retry_after is not None:
+        error_msg += f" (retry after {retry_after:.0f}s)"
+    return error_msg
+
+def _prompt_fingerprint(system_prompt):
+
+    return hashlib.sha256(system_prompt.encode('utf-8')).hexdigest()[:32]
+
+def _google_cached_content(api_key, model, system_prompt):
+
+    key_hash = hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:16]
+    redis_key = f"gemini-prompt-cache:{key_hash}:{model}:{_prompt_fingerprint(system_prompt)}"
+
+    cached = cache_get(redis_key)
+    if cached is not None:
+        return (cached.decode('utf-8') if isinstance(cached, bytes) else cached) or None
+
+    try:
+        response = post('google', GOOGLE_CACHED_CONTENTS_URL, params={'key': api_key}, json={
+            "model": f"models/{model}",
+            "systemInstruction": {"parts": [{"text": system_prompt}]},
+            "ttl": f"{GOOGLE_CACHE_TTL}s"
+        }, max_retries=0, rate_limit=(api_key, model))
+    except (requests.exceptions.RequestException, RateLimitExceeded):
+        return None
+
+    if response.status_code != 200:
+        # Typically the prompt is below the model's minimum cacheable size; don't retry for a day
+        if 400 <= response.status_code < 500 and response.status_code != 429:
+            cache_set(redis_key, '', GOOGLE_CACHE_UNSUPPORTED_TTL)
+        return None
+
+    name = response.json().get('name')
+    if name:
+        cache_set(redis_key, name, max(60, GOOGLE_CACHE_TTL - 300))
+    return name
+
+def _chat_request(provider, api_key, model, system_prompt, user_prompt, temperature=0.3,
+                  max_tokens=None, google_generation_config=False, stream=False, cache_system_prompt=False,
+                  json_mode=False):
+
+    headers = {"Content-Type": "application/json"}
+    params = None
+
+    if provider in ('openrouter', 'openai'):
+        headers["Authorization"] = f"Bearer {api_key}"
+        is_reasoning_model = provider == 'openai' and "o1-" in (model or '')
+        system_content = system_prompt
+        if cache_system_prompt and provider == 'openrouter' and (model or '').startswith(OPENROUTER_CACHE_CONTROL_PREFIXES):
+            system_content = [
+                {"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}
+            ]
+        json_payload = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system_content},
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": 1 if is_reasoning_model else temperature
+        }
+        if cache_system_prompt and provider == 'openai':
+            json_payload["prompt_cache_key"] = _prompt_fingerprint(system_prompt)
+        if json_mode:
+            json_payload["response_format"] = {"type": "json_object"}
+        if max_tokens:
+            json_payload["max_completion_tokens" if is_reasoning_model else "max_tokens"] = max_tokens
+        if stream:
+            json_payload["stream"] = True
+            json_payload["stream_options"] = {"include_usage": True}
+
+        if provider == 'openrouter':
+            headers["HTTP-Referer"] = "http://localhost:5000"
+            headers["X-Title"] = "Novel Translator"
+            url = OPENROUTER_URL
+        else:
+            url = OPENAI_URL
+
+    elif provider == 'google':
+        url = (GOOGLE_STREAM_URL if stream else GOOGLE_URL).format(model=model)
+        params = {'key': api_key}
+        if stream:
+            params['alt'] = 'sse'
+        if cache_system_prompt:
+            json_payload = {
+                "contents": [
+                    {
+                        "role": "user",
+                        "parts": [
+                            {"text": user_prompt}
+                        ]
+                    }
+                ]
+            }
+            cached_content = _google_cached_content(api_key, model, system_prompt)
+            if cached_content:
+                json_payload["cachedContent"] = cached_content
+            else:
+                json_payload["systemInstruction"] = {"parts": [{"text": system_prompt}]}
+        else:
+            json_payload = {
+                "contents": [
+                    {
+                        "parts": [
+                            {"text": f"{system_prompt}\n\n{user_prompt}"}
+                        ]
+                    }
+                ]
+            }
+        if google_generation_config:
+            json_payload["generationConfig"] = {"temperature": temperature}
+            if max_tokens:
+                json_payload["generationConfig"]["maxOutputTokens"] = max_tokens
+        if json_mode:
+            json_payload.setdefault("generationConfig", {})["responseMimeType"] = "application/json"
+
+    else:
+        return None
+
+    return url, headers, json_payload, params
+
+def _google_usage(usage_metadata, provider, model):
+
+    return {
+        'input_tokens': usage_metadata.get('promptTokenCount', 0),
+        'output_tokens': usage_metadata.get('candidatesTokenCount', 0),
+        'total_tokens': usage_metadata.get('totalTokenCount', 0),
+        'cached_tokens': usage_metadata.get('cachedContentTokenCount', 0) or 0,
+        'provider': provider,
+        'model': model
+    }
+
+def _openai_usage(usage, provider, model):
+
+    return {
+        'input_tokens': usage.get('prompt_tokens', 0),
+        'output_tokens': usage.get('completion_tokens', 0),
+        'total_tokens': usage.get('total_tokens', 0),
+        'cached_tokens': (usage.get('prompt_tokens_details') or {}).get('cached_tokens', 0) or 0,
+        'provider': provider,
+        'model': model
+    }
+
+def chat_completion(provider, api_key, model, system_prompt, user_prompt, temperature=0.3,
+                    max_tokens=None, google_generation_config=False, timeout=None, cache_system_prompt=False,
+                    json_mode=False):
+
+    chat_request = _chat_request(
+        provider, api_key, model, system_prompt, user_prompt, temperature=temperature,
+        max_tokens=max_tokens, google_generation_config=google_generation_config,
+        cache_system_prompt=cache_system_prompt, json_mode=json_mode
+    )
+    if chat_request is None:
+        return None, None, f'Unsupported provider: {provider}'
+    url, headers, json_payload, params = chat_request
+
+    try:
+        response = post(
+            provider, url, headers=headers, json=json_payload, params=params,
+            timeout=timeout, rate_limit=(api_key, model)
+        )
+    except RateLimitExceeded as e:
+        return None, None, str(e)
+
+    if response.status_code != 200:
+        return None, None, _error_message(provider, response)
+
+    data = response.json()
+    token_usage = None
+
+    if provider == 'google':
+        candidates = data.get('candidates', [])
+        if not candidates:
+            return None, None, 'Google API Error: No candidates in response.'
+        parts = candidates[0].get('content', {}).get('parts', [])
+        if not parts:
+            return None, None, 'Google API Error: No content in response.'
+        content = parts[0].get('text', '')
+
+        usage_metadata = data.get('usageMetadata', {})
+        if usage_metadata:
+            token_usage = _google_usage(usage_metadata, provider, model)
+    else:
+        choices = data.get('choices', [])
+        if not choices:
+            return None, None, f'{provider.capitalize()} API Error: No choices in response.'
+        content = choices[0].get('message', {}).get('content', '')
+
+        usage = data.get('usage', {})
+        if usage:
+            token_usage = _openai_usage(usage, provider, model)
+
+    return content, token_usage, None
+
+def _sse_events(response):
+
+    response.encoding = response.encoding or 'utf-8'
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith('data:'):
+            continue
+        payload = line[5:].strip()
+        if payload == '[DONE]':
+            return
+        try:
+            yield json.loads(payload)
+        except ValueError:
+            continue
+
+def stream_chat_completion(provider, api_key, model, system_prompt, user_prompt, temperature=0.3,
+                           max_tokens=None, google_generation_config=False, timeout=None, cache_system_prompt=False):
+
+    chat_request = _chat_request(
+        provider, api_key, model, system_prompt, user_prompt, temperature=temperature,
+        max_tokens=max_tokens, google_generation_config=google_generation_config, stream=True,
+        cache_system_prompt=cache_system_prompt
+    )
+    if chat_request is None:
+        yield None, None, f'Unsupported provider: {provider}'
+        return
+    url, headers, json_payload, params = chat_request
+
+    try:
+        response = post(
+            provider, url, headers=headers, json=json_payload, params=params,
+            timeout=timeout, stream=True, rate_limit=(api_key, model)
+        )
+    except RateLimitExceeded as e:
+        yield None, None, str(e)
+        return
+
+    with response:
+        if response.status_code != 200:
+            yield None, None, _error_message(provider, response)
+            return
+
+        timed_out = False
+        try:
+            yield from _stream_deltas(provider, model, response)
+        except requests.exceptions.ConnectionError:
+            # requests reports a read timeout between streamed chunks as a ConnectionError
+            timed_out = True
+            raise
+        finally:
+            rate_limit_service.release(getattr(response, 'rate_limit_lease', None), response.status_code, timed_out=timed_out)
+
+def _stream_deltas(provider, model, response):
+
+    token_usage = None
+    for event in _sse_events(response):
+        if event.get('error'):
+            error = event['error']
+            message = error.get('message', 'Unknown error') if isinstance(error, dict) else str(error)
+            yield None, None, f'{provider.capitalize()} API Error: {message}'
+            return
+
+        if provider == 'google':
+            if event.get('usageMetadata'):
+                token_usage = _google_usage(event['usageMetadata'], provider, model)
+            for candidate in event.get('candidates', [])[:1]:
+                for part in candidate.get('content', {}).get('parts', []):
+                    if part.get('text') and not part.get('thought'):
+                        yield part['text'], None, None
+        else:
+            if event.get('usage'):
+                token_usage = _openai_usage(event['usage'], provider, model)
+            for choice in event.get('choices', [])[:1]:
+                delta = choice.get('delta', {}).get('content')
+                if delta:
+                    yield delta, None, None
+
+    yield None, token_usage, None
+
+def deepl_translate(api_key, data_payload, timeout=None):
+
+    url = DEEPL_FREE_URL if api_key and api_key.strip().endswith(':fx') else DEEPL_URL
+    headers = {"Authorization": f"DeepL-Auth-Key {api_key}"}
+
+    try:
+        response = post('deepl', url, headers=headers, data=data_payload, timeout=timeout, rate_limit=(api_key, None))
+    except RateLimitExceeded as e:
+        return None, str(e)
+
+    if response.status_code != 200:
+        return None, _error_message('deepl', response)
+
+    translations = response.json().get('translations', [])
+    if not translations:
+        return None, 'DeepL API Error: No translations in response.'
+    return translations[0].get('text', ''), None
@@ -1,17 +1,12 @@
 
 
-import os
-from celery import Celery
 from database.database import db_session_scope
 from database.db_models import Novel, Chapter
 
 def get_celery_app():
 
-    return Celery(
-        'translator',
-        broker=os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0'),
-        backend=os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
-    )
+    from celery_app import celery
+    return celery
 
 def get_queue_status():
 
@@ -84,9 +79,28 @@ def get_queue_status():
             'scheduled_count': sum(len(t) for t in scheduled.values()),
             'workers_online': len(stats),
             'total_concurrency': total_concurrency
-        }
+        },
+        'queues': get_queue_depths(app)
     }
 
+def get_queue_depths(app=None):
+
+    from celery_app import CELERY_QUEUES
+    
+    app = app or get_celery_app()
+    sep = app.conf.broker_transport_options.get('sep', ':')
+    steps = app.conf.broker_transport_options.get('priority_steps', [0])
+    depths = {}
+    try:
+        with app.connection_for_read() as connection:
+            client = connection.default_channel.client
+            for queue in CELERY_QUEUES:
+                keys = [queue.name] + [f"{queue.name}{sep}{step}" for step in steps if step]
+                depths[queue.name] = sum(client.llen(key) for key in keys)
+    except Exception:
+        return {}
+    return depths
+
 def enrich_tasks_with_titles(tasks):
 
     if not tasks:
@@ -0,0 +1,202 @@
+import os
+import time
+import uuid
+import hashlib
+import redis
+from services.cache_service import get_redis
+
+DEFAULT_RATES = {
+    'openrouter': 5.0,
+    'openai': 5.0,
+    'google': 2.0,
+    'deepl': 5.0,
+}
+RATE_LIMIT_BURST_SECONDS = float(os.getenv('PROVIDER_RATE_BURST_SECONDS', '2'))
+RATE_LIMIT_MAX_WAIT = float(os.getenv('PROVIDER_RATE_MAX_WAIT', '120'))
+INITIAL_CONCURRENCY = float(os.getenv('PROVIDER_INITIAL_CONCURRENCY', '4'))
+MIN_CONCURRENCY = float(os.getenv('PROVIDER_MIN_CONCURRENCY', '1'))
+MAX_CONCURRENCY = float(os.getenv('PROVIDER_MAX_CONCURRENCY', '16'))
+LATENCY_TARGET = float(os.getenv('PROVIDER_LATENCY_TARGET', '90'))
+DEFAULT_COOLDOWN_MS = 1000
+DECREASE_INTERVAL_MS = 1000
+LEASE_TTL_MS = 300000
+STATE_TTL_MS = 86400000
+POLL_INTERVAL_MS = 50
+
+# Returns 0 when a request slot was granted, otherwise the number of milliseconds to wait.
+ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local capacity = tonumber(ARGV[3])
+
+local cooldown = redis.call('PTTL', KEYS[4])
+if cooldown > 0 then
+    return cooldown
+end
+
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+local limit = tonumber(redis.call('HGET', KEYS[3], 'limit') or ARGV[6])
+if redis.call('ZCARD', KEYS[2]) >= math.max(1, math.floor(limit)) then
+    return tonumber(ARGV[7])
+end
+
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or capacity)
+local ts = tonumber(redis.call('HGET', KEYS[1], 'ts') or now)
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+if tokens < 1 then
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+    return math.ceil((1 - tokens) * 1000 / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens - 1), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], ARGV[8])
+redis.call('ZADD', KEYS[2], now + tonumber(ARGV[5]), ARGV[4])
+redis.call('PEXPIRE', KEYS[2], ARGV[8])
+return 0
+"""
+
+# Additive increase on success, multiplicative decrease on throttling or slow responses.
+RELEASE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local signal = ARGV[3]
+local min_limit = tonumber(ARGV[5])
+local max_limit = tonumber(ARGV[6])
+
+redis.call('ZREM', KEYS[1], ARGV[2])
+local limit = tonumber(redis.call('HGET', KEYS[2], 'limit') or ARGV[7])
+local decreased_at = tonumber(redis.call('HGET', KEYS[2], 'decreased_at') or 0)
+
+if signal == 'throttle' then
+    local cooldown = tonumber(ARGV[4])
+    if cooldown > redis.call('PTTL', KEYS[3]) then
+        redis.call('SET', KEYS[3], '1', 'PX', cooldown)
+    end
+    if now - decreased_at >= tonumber(ARGV[8]) then
+        limit = math.max(min_limit, limit / 2)
+        redis.call('HSET', KEYS[2], 'decreased_at', now)
+    end
+elseif signal == 'slow' then
+    if now - decreased_at >= tonumber(ARGV[8]) then
+        limit = math.max(min_limit, limit * 0.8)
+        redis.call('HSET', KEYS[2], 'decreased_at', now)
+    end
+elseif signal == 'ok' then
+    limit = math.min(max_limit, limit + 1 / limit)
+end
+
+redis.call('HSET', KEYS[2], 'limit', tostring(limit))
+redis.call('PEXPIRE', KEYS[2], ARGV[9])
+return tostring(limit)
+"""
+
+_scripts = {}
+
+class RateLimitExceeded(Exception):
+
+    def __init__(self, provider, retry_after):
+        self.provider = provider
+        self.retry_after = retry_after
+        super().__init__(f"{provider.capitalize()} rate limit reached - retry after {retry_after:.0f}s")
+
+def _script(name, source):
+
+    script = _scripts.get(name)
+    if script is None:
+        script = get_redis().register_script(source)
+        _scripts[name] = script
+    return script
+
+def _now_ms():
+
+    return int(time.time() * 1000)
+
+def provider_rate(provider):
+
+    env_value = os.getenv(f'PROVIDER_RATE_{provider.upper()}')
+    if env_value:
+        try:
+            return max(0.01, float(env_value))
+        except ValueError:
+            pass
+    return DEFAULT_RATES.get(provider, 5.0)
+
+def limiter_keys(provider, api_key, model):
+
+    key_hash = hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:16]
+    prefix = f"ratelimit:{provider}:{key_hash}:{model or ''}"
+    return [f"{prefix}:bucket", f"{prefix}:leases", f"{prefix}:aimd", f"{prefix}:cooldown"]
+
+def acquire(provider, api_key, model, max_wait=None):
+
+    keys = limiter_keys(provider, api_key, model)
+    rate = provider_rate(provider)
+    capacity = max(1.0, rate * RATE_LIMIT_BURST_SECONDS)
+    lease_id = uuid.uuid4().hex
+    deadline = time.monotonic() + (RATE_LIMIT_MAX_WAIT if max_wait is None else max_wait)
+
+    while True:
+        try:
+            wait_ms = int(_script('acquire', ACQUIRE_SCRIPT)(keys=keys, args=[
+                _now_ms(), rate, capacity, lease_id, LEASE_TTL_MS, INITIAL_CONCURRENCY,
+                POLL_INTERVAL_MS, STATE_TTL_MS
+            ]))
+        except redis.RedisError:
+            return None
+
+        if wait_ms <= 0:
+            return {'keys': keys, 'lease_id': lease_id, 'started_at': time.monotonic()}
+
+        wait = wait_ms / 1000.0
+        if time.monotonic() + wait > deadline:
+            raise RateLimitExceeded(provider, wait)
+        time.sleep(wait)
+
+def release(lease, status_code=None, retry_after=None, timed_out=False):
+
+    if not lease:
+        return None
+
+    latency = lease.get('first_byte_latency')
+    if latency is None:
+        latency = time.monotonic() - lease['started_at']
+    if timed_out:
+        # No response at all within the read timeout is the strongest latency signal
+        signal = 'slow'
+    elif status_code == 429:
+        signal = 'throttle'
+    elif status_code is not None and status_code >= 500:
+        signal = 'error'
+    elif status_code is not None and latency > LATENCY_TARGET:
+        signal = 'slow'
+    elif status_code is not None and status_code < 400:
+        signal = 'ok'
+    else:
+        signal = 'error'
+
+    cooldown_ms = int(retry_after * 1000) if retry_after else DEFAULT_COOLDOWN_MS
+    keys = lease['keys']
+    try:
+        limit = _script('release', RELEASE_SCRIPT)(keys=[keys[1], keys[2], keys[3]], args=[
+            _now_ms(), lease['lease_id'], signal, cooldown_ms, MIN_CONCURRENCY, MAX_CONCURRENCY,
+            INITIAL_CONCURRENCY, DECREASE_INTERVAL_MS, STATE_TTL_MS
+        ])
+        return float(limit)
+    except (redis.RedisError, ValueError, TypeError):
+        return None
+
+def get_limiter_state(provider, api_key, model):
+
+    keys = limiter_keys(provider, api_key, model)
+    try:
+        client = get_redis()
+        limit = client.hget(keys[2], 'limit')
+        in_flight = client.zcount(keys[1], _now_ms(), '+inf')
+        cooldown_ms = client.pttl(keys[3])
+    except redis.RedisError:
+        return None
+    return {
+        'concurrency_limit': float(limit) if limit else INITIAL_CONCURRENCY,
+        'in_flight': in_flight,
+        'cooldown_seconds': max(0, cooldown_ms) / 1000.0,
+        'rate_per_second': provider_rate(provider)
+    }
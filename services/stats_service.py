@@ -3,7 +3,7 @@
 from flask import jsonify
 from database.database import db_session_scope
 from database.db_models import (
-    User, Novel, Chapter, TranslationTokenUsage, 
+    User, Novel, Chapter, TokenUsageDaily,
     GlobalModelPricing, Export
 )
 from sqlalchemy import func, or_
@@ -24,7 +24,7 @@ def get_overview_stats():
         ).scalar() or 0
         
                       
-        total_tokens = db_session.query(func.sum(TranslationTokenUsage.total_tokens)).scalar() or 0
+        total_tokens = db_session.query(func.sum(TokenUsageDaily.total_tokens)).scalar() or 0
         
                         
         one_month_ago = datetime.now() - timedelta(days=30)
@@ -48,16 +48,16 @@ def get_token_stats():
     with db_session_scope() as db_session:
                      
         by_provider = db_session.query(
-            TranslationTokenUsage.provider,
-            func.sum(TranslationTokenUsage.total_tokens).label('total')
-        ).group_by(TranslationTokenUsage.provider).all()
+            TokenUsageDaily.provider,
+            func.sum(TokenUsageDaily.total_tokens).label('total')
+        ).group_by(TokenUsageDaily.provider).all()
         
                           
         by_model = db_session.query(
-            TranslationTokenUsage.model,
-            func.sum(TranslationTokenUsage.total_tokens).label('total')
-        ).group_by(TranslationTokenUsage.model).order_by(
-            func.sum(TranslationTokenUsage.total_tokens).desc()
+            TokenUsageDaily.model,
+            func.sum(TokenUsageDaily.total_tokens).label('total')
+        ).group_by(TokenUsageDaily.model).order_by(
+            func.sum(TokenUsageDaily.total_tokens).desc()
         ).limit(5).all()
         
                                   
@@ -65,29 +65,31 @@ def get_token_stats():
         this_month_start = datetime(now.year, now.month, 1)
         last_month_start = (this_month_start - timedelta(days=1)).replace(day=1)
         
-        this_month_tokens = db_session.query(func.sum(TranslationTokenUsage.total_tokens)).filter(
-            TranslationTokenUsage.created_at >= this_month_start
+        this_month_tokens = db_session.query(func.sum(TokenUsageDaily.total_tokens)).filter(
+            TokenUsageDaily.day >= this_month_start.date()
         ).scalar() or 0
         
-        last_month_tokens = db_session.query(func.sum(TranslationTokenUsage.total_tokens)).filter(
-            TranslationTokenUsage.created_at >= last_month_start,
-            TranslationTokenUsage.created_at < this_month_start
+        last_month_tokens = db_session.query(func.sum(TokenUsageDaily.total_tokens)).filter(
+            TokenUsageDaily.day >= last_month_start.date(),
+            TokenUsageDaily.day < this_month_start.date()
         ).scalar() or 0
         
                                   
+        pricing_by_provider = {}
+        for pricing in db_session.query(GlobalModelPricing).all():
+            pricing_by_provider.setdefault(pricing.provider, []).append(pricing)
+        
         total_cost = 0.0
         cost_breakdown = []
         
         for provider, tokens in by_provider:
             provider_cost = 0.0
-            pricing = db_session.query(GlobalModelPricing).filter(
-                GlobalModelPricing.provider == provider
-            ).all()
+            pricing = pricing_by_provider.get(provider)
             
             if pricing:
                 avg_input = sum(float(p.input_price_per_1m or 0) for p in pricing) / len(pricing)
                 avg_output = sum(float(p.output_price_per_1m or 0) for p in pricing) / len(pricing)
-                provider_cost = (tokens / 1_000_000) * ((avg_input * 0.6) + (avg_output * 0.4))
+                provider_cost = (int(tokens) / 1_000_000) * ((avg_input * 0.6) + (avg_output * 0.4))
             
             total_cost += provider_cost
             cost_breakdown.append({
@@ -152,7 +154,11 @@ def get_activity_stats():
         ).scalar() or 0
         
                         
-        avg_tokens = db_session.query(func.avg(TranslationTokenUsage.total_tokens)).scalar() or 0
+        token_sum, record_sum = db_session.query(
+            func.sum(TokenUsageDaily.total_tokens),
+            func.sum(TokenUsageDaily.record_count)
+        ).one()
+        avg_tokens = float(token_sum) / float(record_sum) if record_sum else 0
         
         return {
             'active_users_7d': active_7d,
@@ -171,12 +177,12 @@ def get_top_lists():
                                   
         top_users = db_session.query(
             User.username,
-            func.sum(TranslationTokenUsage.total_tokens).label('total_tokens')
+            func.sum(TokenUsageDaily.total_tokens).label('total_tokens')
         ).join(
-            TranslationTokenUsage,
-            func.lower(User.username) == TranslationTokenUsage.user_id
+            TokenUsageDaily,
+            func.lower(User.username) == TokenUsageDaily.user_id
         ).group_by(User.username).order_by(
-            func.sum(TranslationTokenUsage.total_tokens).desc()
+            func.sum(TokenUsageDaily.total_tokens).desc()
         ).limit(10).all()
         
                         
@@ -258,39 +264,43 @@ def get_storage_stats():
 def get_chart_data():
 
     with db_session_scope() as db_session:
+        today = datetime.now().date()
+        first_day = today - timedelta(days=29)
+        range_start = datetime(first_day.year, first_day.month, first_day.day)
+        
+        completed_day = func.date(Chapter.translation_completed_at)
+        translations_by_day = dict(db_session.query(
+            completed_day, func.count(Chapter.id)
+        ).filter(
+            Chapter.translation_completed_at >= range_start,
+            Chapter.translation_status == 'completed'
+        ).group_by(completed_day).all())
+        
+        tokens_by_day = dict(db_session.query(
+            TokenUsageDaily.day, func.sum(TokenUsageDaily.total_tokens)
+        ).filter(
+            TokenUsageDaily.day >= first_day
+        ).group_by(TokenUsageDaily.day).all())
+        
+        signup_day = func.date(User.created_at)
+        signups_by_day = dict(db_session.query(
+            signup_day, func.count(User.id)
+        ).filter(
+            User.created_at >= range_start
+        ).group_by(signup_day).all())
+        
         days = []
         translations_data = []
         tokens_data = []
         signups_data = []
         
         for i in range(29, -1, -1):
-            day = datetime.now() - timedelta(days=i)
-            day_start = datetime(day.year, day.month, day.day)
-            day_end = day_start + timedelta(days=1)
+            day = today - timedelta(days=i)
             
             days.append(day.strftime('%b %d'))
-            
-                          
-            translations = db_session.query(func.count(Chapter.id)).filter(
-                Chapter.translation_completed_at >= day_start,
-                Chapter.translation_completed_at < day_end,
-                Chapter.translation_status == 'completed'
-            ).scalar() or 0
-            translations_data.append(translations)
-            
-                    
-            tokens = db_session.query(func.sum(TranslationTokenUsage.total_tokens)).filter(
-                TranslationTokenUsage.created_at >= day_start,
-                TranslationTokenUsage.created_at < day_end
-            ).scalar() or 0
-            tokens_data.append(int(tokens))
-            
-                     
-            signups = db_session.query(func.count(User.id)).filter(
-                User.created_at >= day_start,
-                User.created_at < day_end
-            ).scalar() or 0
-            signups_data.append(signups)
+            translations_data.append(translations_by_day.get(day, 0))
+            tokens_data.append(int(tokens_by_day.get(day) or 0))
+            signups_data.append(signups_by_day.get(day, 0))
         
         return {
             'labels': days,
@@ -0,0 +1,63 @@
+import os
+from typing import List, Dict
+from services.page_context import PageContext
+
+TILE_HEIGHT = int(os.getenv('WEBTOON_TILE_HEIGHT', '4000'))
+TILE_OVERLAP = int(os.getenv('WEBTOON_TILE_OVERLAP', '200'))
+TILE_MAX_WORKERS = int(os.getenv('WEBTOON_TILE_MAX_WORKERS', '4'))
+
+def plan_tiles(page: PageContext, tile_height: int = TILE_HEIGHT, overlap: int = TILE_OVERLAP) -> List[Dict]:
+
+    if page.tiles is not None:
+        return page.tiles
+
+    height, width = page.shape
+    if tile_height <= 0 or height <= tile_height * 1.25:
+        page.tiles = [{'top': 0, 'bottom': height, 'core_top': 0, 'core_bottom': height}]
+        return page.tiles
+
+    from services.bubble_detection_service import bubble_detection_service
+
+    gutter_centers = [
+        (start + end) // 2
+        for start, end in bubble_detection_service.find_horizontal_gutters(page.image_path, page=page)
+    ]
+
+    # Prefer cutting in the middle of a gutter; fall back to a hard cut padded by the overlap
+    cuts = []
+    start = 0
+    while height - start > tile_height:
+        candidates = [center for center in gutter_centers if start + tile_height // 2 <= center <= start + tile_height]
+        cut = max(candidates) if candidates else start + tile_height
+        cuts.append((cut, not candidates))
+        start = cut
+
+    boundaries = [(0, False)] + cuts + [(height, False)]
+    tiles = []
+    for (core_top, top_is_hard), (core_bottom, bottom_is_hard) in zip(boundaries, boundaries[1:]):
+        tiles.append({
+            'top': max(0, core_top - overlap) if top_is_hard else core_top,
+            'bottom': min(height, core_bottom + overlap) if bottom_is_hard else core_bottom,
+            'core_top': core_top,
+            'core_bottom': core_bottom
+        })
+    page.tiles = tiles
+    return tiles
+
+def region_in_core(bbox: List[int], tile: Dict) -> bool:
+
+    # A region seen by two overlapping tiles belongs to the tile holding its vertical centre
+    center_y = bbox[1] + bbox[3] / 2
+    return tile['core_top'] <= center_y < tile['core_bottom']
+
+def offset_regions(regions: List[Dict], tile: Dict) -> List[Dict]:
+
+    kept = []
+    for region in regions:
+        bbox = region.get('bbox')
+        if not bbox or len(bbox) < 4:
+            continue
+        region['bbox'] = [bbox[0], bbox[1] + tile['top'], bbox[2], bbox[3]]
+        if region_in_core(region['bbox'], tile):
+            kept.append(region)
+    return kept
@@ -2,10 +2,41 @@
 
 from datetime import datetime, timedelta
 from database.database import db_session_scope
-from database.db_models import TranslationTokenUsage, Chapter, Novel
+from database.db_models import TranslationTokenUsage, TokenUsageDaily, Chapter, Novel
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 import tiktoken
 
-def save_token_usage(user_id, chapter_id, provider, model, input_tokens, output_tokens, total_tokens, translation_type='content'):
+def _rollup_token_usage(session, user_id, provider, model, input_tokens, output_tokens, total_tokens, translation_type, cache_hit=False, cached_tokens=0):
+
+    stmt = pg_insert(TokenUsageDaily).values(
+        day=func.current_date(),
+        user_id=user_id,
+        provider=provider or '',
+        model=model or '',
+        translation_type=translation_type or 'content',
+        input_tokens=input_tokens or 0,
+        output_tokens=output_tokens or 0,
+        total_tokens=total_tokens or 0,
+        record_count=1,
+        cache_hits=1 if cache_hit else 0,
+        cached_tokens=cached_tokens or 0
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['day', 'user_id', 'provider', 'model', 'translation_type'],
+        set_={
+            'input_tokens': TokenUsageDaily.input_tokens + stmt.excluded.input_tokens,
+            'output_tokens': TokenUsageDaily.output_tokens + stmt.excluded.output_tokens,
+            'total_tokens': TokenUsageDaily.total_tokens + stmt.excluded.total_tokens,
+            'record_count': TokenUsageDaily.record_count + 1,
+            'cache_hits': TokenUsageDaily.cache_hits + stmt.excluded.cache_hits,
+            'cached_tokens': TokenUsageDaily.cached_tokens + stmt.excluded.cached_tokens,
+            'updated_at': func.now()
+        }
+    )
+    session.execute(stmt)
+
+def save_token_usage(user_id, chapter_id, provider, model, input_tokens, output_tokens, total_tokens, translation_type='content', cache_hit=False, cached_tokens=0):
 
     try:
         with db_session_scope() as session:
@@ -17,14 +48,62 @@ def save_token_usage(user_id, chapter_id, provider, model, input_tokens, output_
                 input_tokens=input_tokens,
                 output_tokens=output_tokens,
                 total_tokens=total_tokens,
-                translation_type=translation_type
+                translation_type=translation_type,
+                cache_hit=cache_hit,
+                cached_tokens=cached_tokens or 0
             )
             session.add(token_usage)
             session.flush()
+            _rollup_token_usage(
+                session, user_id, provider, model,
+                input_tokens, output_tokens, total_tokens, translation_type, cache_hit, cached_tokens
+            )
             return token_usage
     except Exception as e:
         return None
 
+# Only run from scripts/seed_token_usage_daily.py; a full-table aggregate does not belong in startup upgrades.
+# The NOT EXISTS guard keeps it a one-time seed: the rollup outlives raw rows that cascade with deleted chapters.
+TOKEN_USAGE_DAILY_BACKFILL = """
+INSERT INTO token_usage_daily
+    (day, user_id, provider, model, translation_type,
+     input_tokens, output_tokens, total_tokens, record_count, cache_hits, cached_tokens)
+SELECT CAST(created_at AS DATE), user_id, COALESCE(provider, ''), COALESCE(model, ''),
+       COALESCE(translation_type, 'content'),
+       SUM(input_tokens), SUM(output_tokens), SUM(total_tokens), COUNT(*),
+       COUNT(*) FILTER (WHERE cache_hit), SUM(cached_tokens)
+FROM translation_token_usage
+WHERE NOT EXISTS (SELECT 1 FROM token_usage_daily)
+GROUP BY CAST(created_at AS DATE), user_id, COALESCE(provider, ''), COALESCE(model, ''),
+         COALESCE(translation_type, 'content')
+"""
+
+def seed_token_usage_daily():
+
+    with db_session_scope() as session:
+        result = session.execute(text(TOKEN_USAGE_DAILY_BACKFILL))
+        return result.rowcount
+
+def _usage_totals(query):
+
+    row = query.with_entities(
+        func.coalesce(func.sum(TranslationTokenUsage.input_tokens), 0),
+        func.coalesce(func.sum(TranslationTokenUsage.output_tokens), 0),
+        func.coalesce(func.sum(TranslationTokenUsage.total_tokens), 0),
+        func.count(TranslationTokenUsage.id),
+        func.count(TranslationTokenUsage.id).filter(TranslationTokenUsage.cache_hit.is_(True)),
+        func.coalesce(func.sum(TranslationTokenUsage.cached_tokens), 0)
+    ).one()
+    
+    return {
+        'total_input_tokens': int(row[0]),
+        'total_output_tokens': int(row[1]),
+        'total_tokens': int(row[2]),
+        'record_count': row[3],
+        'cache_hits': row[4],
+        'total_cached_tokens': int(row[5])
+    }
+
 def get_chapter_token_usage(chapter_id):
 
     try:
@@ -40,41 +119,21 @@ def get_novel_token_usage(novel_id, user_id):
 
     try:
         with db_session_scope() as session:
-            chapters = session.query(Chapter).filter(
-                Chapter.novel_id == novel_id
-            ).all()
-            
-            chapter_ids = [ch.id for ch in chapters]
-            
-            if not chapter_ids:
-                return {
-                    'total_input_tokens': 0,
-                    'total_output_tokens': 0,
-                    'total_tokens': 0,
-                    'record_count': 0
-                }
-            
-            records = session.query(TranslationTokenUsage).filter(
-                TranslationTokenUsage.chapter_id.in_(chapter_ids),
+            query = session.query(TranslationTokenUsage).join(
+                Chapter, Chapter.id == TranslationTokenUsage.chapter_id
+            ).filter(
+                Chapter.novel_id == novel_id,
                 TranslationTokenUsage.user_id == user_id
-            ).all()
-            
-            total_input = sum(r.input_tokens for r in records)
-            total_output = sum(r.output_tokens for r in records)
-            total = sum(r.total_tokens for r in records)
-            
-            return {
-                'total_input_tokens': total_input,
-                'total_output_tokens': total_output,
-                'total_tokens': total,
-                'record_count': len(records)
-            }
+            )
+            return _usage_totals(query)
     except Exception as e:
         return {
             'total_input_tokens': 0,
             'total_output_tokens': 0,
             'total_tokens': 0,
-            'record_count': 0
+            'record_count': 0,
+            'cache_hits': 0,
+            'total_cached_tokens': 0
         }
 
 def get_user_token_usage(user_id, start_date=None, end_date=None):
@@ -90,24 +149,15 @@ def get_user_token_usage(user_id, start_date=None, end_date=None):
             if end_date:
                 query = query.filter(TranslationTokenUsage.created_at <= end_date)
             
-            records = query.all()
-            
-            total_input = sum(r.input_tokens for r in records)
-            total_output = sum(r.output_tokens for r in records)
-            total = sum(r.total_tokens for r in records)
-            
-            return {
-                'total_input_tokens': total_input,
-                'total_output_tokens': total_output,
-                'total_tokens': total,
-                'record_count': len(records)
-            }
+            return _usage_totals(query)
     except Exception as e:
         return {
             'total_input_tokens': 0,
             'total_output_tokens': 0,
             'total_tokens': 0,
-            'record_count': 0
+            'record_count': 0,
+            'cache_hits': 0,
+            'total_cached_tokens': 0
         }
 
 def clear_user_token_usage(user_id):
@@ -117,111 +167,101 @@ def clear_user_token_usage(user_id):
             session.query(TranslationTokenUsage).filter(
                 TranslationTokenUsage.user_id == user_id
             ).delete()
+            session.query(TokenUsageDaily).filter(
+                TokenUsageDaily.user_id == user_id
+            ).delete()
             return True
     except Exception as e:
         return False
 
+def _grouped_usage(user_id, group_columns, start_date=None, end_date=None):
+
+    with db_session_scope() as session:
+        query = session.query(
+            *group_columns,
+            func.sum(TranslationTokenUsage.input_tokens),
+            func.sum(TranslationTokenUsage.output_tokens),
+            func.sum(TranslationTokenUsage.total_tokens),
+            func.count(TranslationTokenUsage.id)
+        ).filter(TranslationTokenUsage.user_id == user_id)
+        
+        if start_date:
+            query = query.filter(TranslationTokenUsage.created_at >= start_date)
+        if end_date:
+            query = query.filter(TranslationTokenUsage.created_at <= end_date)
+        
+        return query.group_by(*group_columns).all()
+
 def get_token_usage_by_provider(user_id, start_date=None, end_date=None):
 
     try:
-        with db_session_scope() as session:
-            query = session.query(TranslationTokenUsage).filter(
-                TranslationTokenUsage.user_id == user_id
-            )
-            
-            if start_date:
-                query = query.filter(TranslationTokenUsage.created_at >= start_date)
-            if end_date:
-                query = query.filter(TranslationTokenUsage.created_at <= end_date)
-            
-            records = query.all()
-            
-            provider_stats = {}
-            for record in records:
-                provider = record.provider
-                if provider not in provider_stats:
-                    provider_stats[provider] = {
-                        'input_tokens': 0,
-                        'output_tokens': 0,
-                        'total_tokens': 0,
-                        'count': 0
-                    }
-                
-                provider_stats[provider]['input_tokens'] += record.input_tokens
-                provider_stats[provider]['output_tokens'] += record.output_tokens
-                provider_stats[provider]['total_tokens'] += record.total_tokens
-                provider_stats[provider]['count'] += 1
-            
-            return provider_stats
+        rows = _grouped_usage(user_id, [TranslationTokenUsage.provider], start_date, end_date)
+        
+        return {
+            provider: {
+                'input_tokens': int(input_tokens or 0),
+                'output_tokens': int(output_tokens or 0),
+                'total_tokens': int(total_tokens or 0),
+                'count': count
+            }
+            for provider, input_tokens, output_tokens, total_tokens, count in rows
+        }
     except Exception as e:
         return {}
 
 def get_token_usage_by_model(user_id, start_date=None, end_date=None):
 
     try:
-        with db_session_scope() as session:
-            query = session.query(TranslationTokenUsage).filter(
-                TranslationTokenUsage.user_id == user_id
-            )
-            
-            if start_date:
-                query = query.filter(TranslationTokenUsage.created_at >= start_date)
-            if end_date:
-                query = query.filter(TranslationTokenUsage.created_at <= end_date)
-            
-            records = query.all()
-            
-            model_stats = {}
-            for record in records:
-                model = record.model
-                if model not in model_stats:
-                    model_stats[model] = {
-                        'input_tokens': 0,
-                        'output_tokens': 0,
-                        'total_tokens': 0,
-                        'count': 0,
-                        'provider': record.provider
-                    }
-                
-                model_stats[model]['input_tokens'] += record.input_tokens
-                model_stats[model]['output_tokens'] += record.output_tokens
-                model_stats[model]['total_tokens'] += record.total_tokens
-                model_stats[model]['count'] += 1
+        rows = _grouped_usage(
+            user_id, [TranslationTokenUsage.model, TranslationTokenUsage.provider], start_date, end_date
+        )
+        
+        model_stats = {}
+        for model, provider, input_tokens, output_tokens, total_tokens, count in rows:
+            if model not in model_stats:
+                model_stats[model] = {
+                    'input_tokens': 0,
+                    'output_tokens': 0,
+                    'total_tokens': 0,
+                    'count': 0,
+                    'provider': provider
+                }
             
-            return model_stats
+            model_stats[model]['input_tokens'] += int(input_tokens or 0)
+            model_stats[model]['output_tokens'] += int(output_tokens or 0)
+            model_stats[model]['total_tokens'] += int(total_tokens or 0)
+            model_stats[model]['count'] += count
+        
+        return model_stats
     except Exception as e:
         return {}
 
 def get_recent_token_usage(user_id, days=30):
 
     try:
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
+        start_day = (datetime.now() - timedelta(days=days)).date()
         
         with db_session_scope() as session:
-            records = session.query(TranslationTokenUsage).filter(
-                TranslationTokenUsage.user_id == user_id,
-                TranslationTokenUsage.created_at >= start_date,
-                TranslationTokenUsage.created_at <= end_date
-            ).order_by(TranslationTokenUsage.created_at).all()
-            
-            daily_stats = {}
-            for record in records:
-                date_key = record.created_at.date().isoformat()
-                if date_key not in daily_stats:
-                    daily_stats[date_key] = {
-                        'input_tokens': 0,
-                        'output_tokens': 0,
-                        'total_tokens': 0,
-                        'count': 0
-                    }
-                
-                daily_stats[date_key]['input_tokens'] += record.input_tokens
-                daily_stats[date_key]['output_tokens'] += record.output_tokens
-                daily_stats[date_key]['total_tokens'] += record.total_tokens
-                daily_stats[date_key]['count'] += 1
+            rows = session.query(
+                TokenUsageDaily.day,
+                func.sum(TokenUsageDaily.input_tokens),
+                func.sum(TokenUsageDaily.output_tokens),
+                func.sum(TokenUsageDaily.total_tokens),
+                func.sum(TokenUsageDaily.record_count)
+            ).filter(
+                TokenUsageDaily.user_id == user_id,
+                TokenUsageDaily.day >= start_day
+            ).group_by(TokenUsageDaily.day).order_by(TokenUsageDaily.day).all()
             
-            return daily_stats
+            return {
+                day.isoformat(): {
+                    'input_tokens': int(input_tokens or 0),
+                    'output_tokens': int(output_tokens or 0),
+                    'total_tokens': int(total_tokens or 0),
+                    'count': int(count or 0)
+                }
+                for day, input_tokens, output_tokens, total_tokens, count in rows
+            }
     except Exception as e:
         return {}
 
@@ -315,6 +355,9 @@ OUTPUT RULES
 - Maintain all formatting rules exactly.
 """
 
+    from services.glossary_service import prune_glossary
+    glossary = prune_glossary(glossary, text)
+    
     glossary_instructions = ""
     if glossary and len(glossary) > 0:
         glossary_instructions = "\n\nCHARACTER GLOSSARY - Use these EXACT translations:\n"
@@ -0,0 +1,143 @@
+import os
+import json
+import random
+import hashlib
+from datetime import datetime
+from database.database import db_session_scope
+from database.db_models import TranslationCacheEntry
+from services.cache_service import cache_get_json, cache_set_json
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+CACHE_VERSION = 2
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv('TRANSLATION_CACHE_MAX_ENTRIES', '50000'))
+TRANSLATION_CACHE_REDIS_TTL = int(os.getenv('TRANSLATION_CACHE_REDIS_TTL', '86400'))
+PRUNE_PROBABILITY = 0.01
+TRANSLATION_CACHE_TOUCH_RATE = float(os.getenv('TRANSLATION_CACHE_TOUCH_RATE', '0.1'))
+
+def glossary_fingerprint(glossary):
+
+    if not glossary:
+        return ''
+    return hashlib.sha256(json.dumps(glossary, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def build_cache_key(text, provider, model, glossary=None, images=None, custom_prompt_suffix=None,
+                    is_thinking_mode=False, source_language=None, context_text=None):
+
+    parts = {
+        'v': CACHE_VERSION,
+        'text': text,
+        'provider': provider,
+        'model': model or '',
+        'glossary': glossary_fingerprint(glossary),
+        'images': [[img.get('index', 0), img.get('alt', '')] for img in (images or []) if isinstance(img, dict)],
+        'suffix': custom_prompt_suffix or '',
+        'thinking': bool(is_thinking_mode),
+        'source_language': source_language or '',
+        'context': context_text or ''
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def _redis_key(cache_key):
+
+    return f"tcache:{cache_key}"
+
+def get_cached_translation(cache_key):
+
+    cached = cache_get_json(_redis_key(cache_key))
+    if cached:
+        # Redis hits only sample the Postgres touch; each sampled touch stands in for 1/rate hits
+        if TRANSLATION_CACHE_TOUCH_RATE > 0 and random.random() < TRANSLATION_CACHE_TOUCH_RATE:
+            _touch_entry(cache_key, max(1, int(round(1 / min(TRANSLATION_CACHE_TOUCH_RATE, 1.0)))))
+        return cached
+
+    try:
+        with db_session_scope() as session:
+            entry = session.query(TranslationCacheEntry).filter(
+                TranslationCacheEntry.cache_key == cache_key
+            ).first()
+            if not entry:
+                return None
+
+            entry.hit_count = (entry.hit_count or 0) + 1
+            entry.last_used_at = datetime.utcnow()
+            cached = {
+                'translated_text': entry.translated_text,
+                'provider': entry.provider,
+                'model': entry.model,
+                'input_tokens': entry.input_tokens,
+                'output_tokens': entry.output_tokens
+            }
+    except Exception:
+        return None
+
+    cache_set_json(_redis_key(cache_key), cached, TRANSLATION_CACHE_REDIS_TTL)
+    return cached
+
+def _touch_entry(cache_key, hits=1):
+
+    try:
+        with db_session_scope() as session:
+            session.query(TranslationCacheEntry).filter(
+                TranslationCacheEntry.cache_key == cache_key
+            ).update({
+                'hit_count': TranslationCacheEntry.hit_count + hits,
+                'last_used_at': datetime.utcnow()
+            }, synchronize_session=False)
+    except Exception:
+        pass
+
+def store_translation(cache_key, provider, model, translated_text, token_usage=None):
+
+    if not translated_text:
+        return
+
+    token_usage = token_usage or {}
+    cached = {
+        'translated_text': translated_text,
+        'provider': provider,
+        'model': model or '',
+        'input_tokens': token_usage.get('input_tokens', 0) or 0,
+        'output_tokens': token_usage.get('output_tokens', 0) or 0
+    }
+
+    try:
+        with db_session_scope() as session:
+            stmt = pg_insert(TranslationCacheEntry).values(cache_key=cache_key, hit_count=0, **cached)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['cache_key'],
+                set_={
+                    'translated_text': stmt.excluded.translated_text,
+                    'input_tokens': stmt.excluded.input_tokens,
+                    'output_tokens': stmt.excluded.output_tokens,
+                    'last_used_at': func.now()
+                }
+            )
+            session.execute(stmt)
+    except Exception:
+        return
+
+    cache_set_json(_redis_key(cache_key), cached, TRANSLATION_CACHE_REDIS_TTL)
+
+    if random.random() < PRUNE_PROBABILITY:
+        prune_translation_cache()
+
+def prune_translation_cache(max_entries=None):
+
+    max_entries = max_entries or TRANSLATION_CACHE_MAX_ENTRIES
+    try:
+        with db_session_scope() as session:
+            cutoff = session.execute(
+                select(TranslationCacheEntry.last_used_at)
+                .order_by(TranslationCacheEntry.last_used_at.desc())
+                .offset(max_entries)
+                .limit(1)
+            ).scalar()
+            if cutoff is None:
+                return 0
+
+            return session.query(TranslationCacheEntry).filter(
+                TranslationCacheEntry.last_used_at <= cutoff
+            ).delete(synchronize_session=False)
+    except Exception:
+        return 0
@@ -0,0 +1,75 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+TRANSLATION_EXECUTOR_CONCURRENCY = int(os.getenv('TRANSLATION_EXECUTOR_CONCURRENCY', '24'))
+
+class TranslationExecutor:
+
+    def __init__(self, concurrency=TRANSLATION_EXECUTOR_CONCURRENCY):
+
+        self.concurrency = concurrency
+        self.loop = asyncio.new_event_loop()
+        self.loop.set_default_executor(ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix='translation'
+        ))
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='translation-executor', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+
+        asyncio.set_event_loop(self.loop)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self.loop.call_soon(self._ready.set)
+        self.loop.run_forever()
+
+    async def _call(self, fn, args, kwargs):
+
+        async with self._semaphore:
+            return await self.loop.run_in_executor(None, lambda: fn(*args, **kwargs))
+
+    def submit(self, fn, *args, **kwargs):
+
+        return asyncio.run_coroutine_threadsafe(self._call(fn, args, kwargs), self.loop)
+
+    def run_all(self, calls, on_result=None, timeout=None):
+
+        async def gather():
+            async def run_one(index, fn, args, kwargs):
+                try:
+                    result = await self._call(fn, args, kwargs)
+                except Exception as e:
+                    result = {'error': str(e)}
+                if on_result:
+                    await self.loop.run_in_executor(None, on_result, index, result)
+                return result
+            return await asyncio.gather(*[
+                run_one(index, fn, args, kwargs) for index, (fn, args, kwargs) in enumerate(calls)
+            ])
+
+        future = asyncio.run_coroutine_threadsafe(gather(), self.loop)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Calls already running on executor threads finish in the background, but their
+            # on_result callbacks are dropped with the cancelled gather
+            future.cancel()
+            raise
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+def get_translation_executor():
+
+    global _executor, _executor_pid
+    # Celery prefork children inherit the parent's objects but not its threads
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = TranslationExecutor()
+                _executor_pid = os.getpid()
+    return _executor
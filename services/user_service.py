@@ -51,6 +51,9 @@ def delete_user_account(username):
 
         session.delete(user)
 
+    from models.settings import invalidate_settings_cache
+    invalidate_settings_cache(user_id)
+
     user_data_dir = get_user_data_dir(user_id)
     if os.path.exists(user_data_dir):
         try:
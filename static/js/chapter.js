@@ -333,6 +333,87 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     }
 
+    function parseSSEFrame(frame) {
+        let event = 'message';
+        const dataLines = [];
+        frame.split('\n').forEach(line => {
+            if (line.startsWith('event:')) {
+                event = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                dataLines.push(line.slice(5).trimStart());
+            }
+        });
+        if (dataLines.length === 0) return null;
+        try {
+            return { event, data: JSON.parse(dataLines.join('\n')) };
+        } catch (e) {
+            return null;
+        }
+    }
+
+    async function streamTranslation(payload, onDelta) {
+        const response = await window.fetchWithCSRF('/api/translate/stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'text/event-stream'
+            },
+            body: JSON.stringify(payload)
+        });
+
+        if (!response.ok) {
+            const errorData = await response.json().catch(() => ({}));
+            return { success: false, error: errorData.error || `Translation failed (${response.status})` };
+        }
+
+        const contentType = response.headers.get('Content-Type') || '';
+        if (!response.body || !contentType.includes('text/event-stream')) {
+            // Fall back to the buffered endpoint when streaming isn't available
+            const fallback = await window.fetchWithCSRF('/api/translate', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify(payload)
+            });
+            return fallback.json();
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let partialText = '';
+        let modelUsed = null;
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true }).replace(/\r\n/g, '\n');
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const parsed = parseSSEFrame(buffer.slice(0, boundary));
+                buffer = buffer.slice(boundary + 2);
+                if (!parsed) continue;
+
+                if (parsed.event === 'start') {
+                    modelUsed = parsed.data.model_used;
+                } else if (parsed.event === 'delta') {
+                    partialText += parsed.data.text;
+                    onDelta(partialText);
+                } else if (parsed.event === 'done') {
+                    reader.cancel();
+                    return parsed.data;
+                } else if (parsed.event === 'error') {
+                    reader.cancel();
+                    return { success: false, error: parsed.data.error };
+                }
+            }
+        }
+
+        return { success: false, error: 'Translation stream ended unexpectedly', model_used: modelUsed };
+    }
+
     async function performTranslation(useThinkingMode = false) {
         const activeBtn = useThinkingMode ? thinkBtn : translateBtn;
         const otherBtn = useThinkingMode ? thinkBtn : translateBtn;
@@ -355,28 +436,33 @@ document.addEventListener('DOMContentLoaded', function () {
         }
 
         const statusDiv = document.getElementById('translation-status');
+        // Re-translating must skip the cached copy and replace it
+        const retranslate = Boolean(isTranslated);
 
         try {
 
-            const response = await window.fetchWithCSRF('/api/translate', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    text: koreanText,
-                    novel_id: window.chapterData.novelId,
-                    chapter_id: window.chapterData.chapterId,
-                    images: [],
-                    use_thinking_mode: useThinkingMode
-                })
+            const data = await streamTranslation({
+                text: koreanText,
+                novel_id: window.chapterData.novelId,
+                chapter_id: window.chapterData.chapterId,
+                images: [],
+                use_thinking_mode: useThinkingMode,
+                retranslate: retranslate
+            }, (partialText) => {
+                if (singleView) singleView.classList.remove('hidden');
+                if (editArea) editArea.classList.add('hidden');
+                if (textDisplay) {
+                    textDisplay.classList.remove('hidden');
+                    textDisplay.textContent = partialText;
+                }
             });
 
-            const data = await response.json();
-
             if (data.success) {
                 translatedText = data.translated_text;
                 translationModel = data.model_used;
+                if (data.saved) {
+                    window.chapterData.translatedText = translatedText;
+                }
 
                 if (data.token_usage) {
 
@@ -412,7 +498,8 @@ document.addEventListener('DOMContentLoaded', function () {
                                 novel_id: window.chapterData.novelId,
                                 chapter_id: window.chapterData.chapterId,
                                 images: [],
-                                use_thinking_mode: useThinkingMode
+                                use_thinking_mode: useThinkingMode,
+                                retranslate: retranslate
                             })
                         });
 
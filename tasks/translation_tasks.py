@@ -2,13 +2,20 @@
 Background tasks for AI translation processing
 """
 from celery_app import celery
-from models.novel import load_novels, save_novels
+from models.novel import save_novel_changes
+from database.db_novel import get_novel_db
 from models.settings import load_settings
 from services.ai_service import translate_text
 from services.token_usage_service import save_token_usage
+import os
 import re
+import threading
 from datetime import datetime
 
+# Chapters of a group run concurrently, so the group needs roughly one slow chapter's budget, not eight
+BATCH_GROUP_SOFT_TIME_LIMIT = int(os.getenv('BATCH_GROUP_SOFT_TIME_LIMIT', '1500'))
+BATCH_GROUP_TIME_LIMIT = BATCH_GROUP_SOFT_TIME_LIMIT + 60
+
 def slugify_english(text):
                                        
     if not text:
@@ -28,12 +35,11 @@ def translate_novel_title_task(self, user_id, novel_id):
         self.update_state(state='PROGRESS', meta={'status': 'Loading novel data...'})
         
         settings = load_settings(user_id)
-        novels = load_novels(user_id)
+        novel = get_novel_db(user_id, novel_id)
         
-        if novel_id not in novels:
+        if not novel:
             return {'error': 'Novel not found'}
         
-        novel = novels[novel_id]
         korean_title = novel.get('title', '')
         
         provider = settings.get('selected_provider', 'openrouter')
@@ -77,16 +83,14 @@ def translate_novel_title_task(self, user_id, novel_id):
             if not author_result.startswith("Error"):
                 translated_author = author_result
         
-        novels[novel_id]['translated_title'] = translated_title
+        changes = {
+            'translated_title': translated_title,
+            'slug': slugify_english(translated_title)
+        }
         if translated_author:
-            novels[novel_id]['translated_author'] = translated_author
+            changes['translated_author'] = translated_author
         
-        new_id = slugify_english(translated_title)
-        if new_id != novel_id and new_id not in novels:
-            novels[new_id] = novels.pop(novel_id)
-            novel_id = new_id
-        
-        save_novels(user_id, novels)
+        novel_id = save_novel_changes(user_id, novel_id, changes)
         
         return {
             'status': 'complete',
@@ -99,19 +103,118 @@ def translate_novel_title_task(self, user_id, novel_id):
         return {'error': str(e)}
 
 @celery.task(bind=True, name='tasks.translate_chapter')
-def translate_chapter_task(self, user_id, novel_id, chapter_index=None, chapter_id=None, translate_content=True, translate_title=True):
+def translate_chapter_task(self, user_id, novel_id, chapter_index=None, chapter_id=None, translate_content=True, translate_title=True, batch_job_id=None):
+
+    result = _translate_chapter(self, user_id, novel_id, chapter_index, chapter_id, translate_content, translate_title)
+    
+    if batch_job_id:
+        from services.batch_translation_service import record_chapter_result
+        try:
+            record_chapter_result(
+                batch_job_id,
+                chapter_id or result.get('chapter_id'),
+                result.get('status') == 'complete' and result.get('translated', False),
+                error=result.get('error')
+            )
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+    
+    return result
+
+@celery.task(bind=True, name='tasks.translate_chapter_group',
+             soft_time_limit=BATCH_GROUP_SOFT_TIME_LIMIT, time_limit=BATCH_GROUP_TIME_LIMIT)
+def translate_chapter_group_task(self, user_id, novel_id, chapter_ids, translate_content=True, translate_title=True, batch_job_id=None, retranslate=False):
+
+    from concurrent.futures import TimeoutError as FutureTimeoutError
+    from celery.exceptions import SoftTimeLimitExceeded
+    from services.translation_executor import get_translation_executor
+    
+    # Celery keeps the current request on a thread-local stack, so executor threads
+    # cannot read self.request.id themselves
+    task_id = self.request.id
+    recorded = set()
+    recorded_lock = threading.Lock()
+    
+    def on_result(index, result):
+        with recorded_lock:
+            if index in recorded:
+                return
+            recorded.add(index)
+        if not batch_job_id:
+            return
+        from services.batch_translation_service import record_chapter_result
+        try:
+            record_chapter_result(
+                batch_job_id,
+                chapter_ids[index],
+                result.get('status') == 'complete' and result.get('translated', False),
+                error=result.get('error')
+            )
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+    
+    try:
+        results = get_translation_executor().run_all([
+            (_translate_chapter, (self, user_id, novel_id), {
+                'chapter_id': chapter_id,
+                'translate_content': translate_content,
+                'translate_title': translate_title,
+                'task_id': task_id,
+                'report_progress': False,
+                'retranslate': retranslate
+            })
+            for chapter_id in chapter_ids
+        ], on_result=on_result, timeout=BATCH_GROUP_SOFT_TIME_LIMIT)
+    except (SoftTimeLimitExceeded, FutureTimeoutError):
+        # Celery's threads pool ignores time limits, so the executor wait bounds the group on any pool.
+        # Settle every chapter still running so the batch job does not wait on them;
+        # a chapter finishing later still saves its translation but is not counted twice
+        from database.db_novel import update_chapter_db
+        error = 'Translation timed out'
+        for index, chapter_id in enumerate(chapter_ids):
+            with recorded_lock:
+                pending = index not in recorded
+            if not pending:
+                continue
+            try:
+                update_chapter_db(chapter_id, {'translation_status': 'failed'})
+            except Exception:
+                pass
+            on_result(index, {'error': error})
+        return {'error': error, 'novel_id': novel_id}
+    
+    return {
+        'status': 'complete',
+        'novel_id': novel_id,
+        'translated': sum(1 for result in results if result.get('translated')),
+        'failed': sum(1 for result in results if not result.get('translated'))
+    }
+
+def _translate_chapter(self, user_id, novel_id, chapter_index=None, chapter_id=None, translate_content=True, translate_title=True, task_id=None, report_progress=True, retranslate=False):
            
+    task_id = task_id or self.request.id
+    
+    def progress(status):
+        if report_progress:
+            self.update_state(task_id=task_id, state='PROGRESS', meta={'status': status})
+    
     try:
         from database.db_novel import get_novel_with_chapters_db, update_chapter_db, get_chapter_db
         from models.settings import load_settings
         from database.database import db_session_scope
         from database.db_models import Chapter
+        from sqlalchemy.orm import undefer_group
         
-        self.update_state(state='PROGRESS', meta={'status': 'Loading chapter data...'})
+        progress('Loading chapter data...')
         
         settings = load_settings(user_id)
         
-        novel = get_novel_with_chapters_db(user_id, novel_id)
+        if chapter_id:
+            novel = get_novel_db(user_id, novel_id)
+        else:
+            novel = get_novel_with_chapters_db(user_id, novel_id)
         if not novel:
             return {'error': 'Novel not found'}
             
@@ -122,7 +225,7 @@ def translate_chapter_task(self, user_id, novel_id, chapter_index=None, chapter_
         
         if chapter_id:
             with db_session_scope() as session:
-                chapter_obj = session.query(Chapter).filter_by(id=chapter_id).first()
+                chapter_obj = session.query(Chapter).options(undefer_group('body')).filter_by(id=chapter_id).first()
                 if not chapter_obj:
                     return {'error': 'Chapter not found'}
                 
@@ -144,7 +247,7 @@ def translate_chapter_task(self, user_id, novel_id, chapter_index=None, chapter_
         if chapter_id:
             update_chapter_db(chapter_id, {
                 'translation_status': 'in_progress',
-                'translation_task_id': self.request.id,
+                'translation_task_id': task_id,
                 'translation_started_at': datetime.utcnow()
             })
         
@@ -160,14 +263,15 @@ def translate_chapter_task(self, user_id, novel_id, chapter_index=None, chapter_
         updates = {}
         
         if translate_title:
-            self.update_state(state='PROGRESS', meta={'status': 'Translating title...'})
+            progress('Translating title...')
             title_result = translate_text(
                 chapter.get('title', ''),
                 provider,
                 api_key,
                 selected_model,
                 glossary=novel.get('glossary'),
-                custom_prompt_suffix=custom_prompt
+                custom_prompt_suffix=custom_prompt,
+                use_cache=not retranslate
             )
             
             if isinstance(title_result, dict):
@@ -186,7 +290,9 @@ def translate_chapter_task(self, user_id, novel_id, chapter_index=None, chapter_
                                 input_tokens=token_usage.get('input_tokens', 0),
                                 output_tokens=token_usage.get('output_tokens', 0),
                                 total_tokens=token_usage.get('total_tokens', 0),
-                                translation_type='title'
+                                translation_type='title',
+                                cache_hit=token_usage.get('cache_hit', False),
+                                cached_tokens=token_usage.get('cached_tokens', 0)
                             )
                         except Exception as e:
                             pass
@@ -194,7 +300,7 @@ def translate_chapter_task(self, user_id, novel_id, chapter_index=None, chapter_
                 updates['translated_title'] = title_result
         
         if translate_content:
-            self.update_state(state='PROGRESS', meta={'status': 'Translating content...'})
+            progress('Translating content...')
             content_result = translate_text(
                 chapter.get('content', ''),
                 provider,
@@ -202,7 +308,8 @@ def translate_chapter_task(self, user_id, novel_id, chapter_index=None, chapter_
                 selected_model,
                 glossary=novel.get('glossary'),
                 images=chapter.get('images'),
-                custom_prompt_suffix=custom_prompt
+                custom_prompt_suffix=custom_prompt,
+                use_cache=not retranslate
             )
             
             if isinstance(content_result, dict):
@@ -221,7 +328,9 @@ def translate_chapter_task(self, user_id, novel_id, chapter_index=None, chapter_
                                 input_tokens=token_usage.get('input_tokens', 0),
                                 output_tokens=token_usage.get('output_tokens', 0),
                                 total_tokens=token_usage.get('total_tokens', 0),
-                                translation_type='content'
+                                translation_type='content',
+                                cache_hit=token_usage.get('cache_hit', False),
+                                cached_tokens=token_usage.get('cached_tokens', 0)
                             )
                         except Exception as e:
                             pass
@@ -239,7 +348,8 @@ def translate_chapter_task(self, user_id, novel_id, chapter_index=None, chapter_
             'status': 'complete',
             'chapter_id': chapter.get('id'),
             'chapter_index': chapter_index,
-            'novel_id': novel_id
+            'novel_id': novel_id,
+            'translated': bool(updates)
         }
         
     except Exception as e:
@@ -314,7 +424,9 @@ def translate_chapter_title_task(self, user_id, novel_id, chapter_id):
                             input_tokens=token_usage.get('input_tokens', 0),
                             output_tokens=token_usage.get('output_tokens', 0),
                             total_tokens=token_usage.get('total_tokens', 0),
-                            translation_type='title'
+                            translation_type='title',
+                            cache_hit=token_usage.get('cache_hit', False),
+                            cached_tokens=token_usage.get('cached_tokens', 0)
                         )
                     except Exception as e:
                         pass                                     
@@ -330,3 +442,9 @@ def translate_chapter_title_task(self, user_id, novel_id, chapter_id):
         
     except Exception as e:
         return {'error': str(e)}
+
+@celery.task(bind=True, name='tasks.reclaim_batch_leases')
+def reclaim_batch_leases_task(self):
+
+    from services.batch_translation_service import reclaim_stale_leases
+    return {'status': 'complete', 'users': reclaim_stale_leases()}
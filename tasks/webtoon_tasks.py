@@ -10,31 +10,27 @@ from database.database import db_session_scope
 from services.ocr_service import ocr_service
 from services.image_processing_service import image_processing_service
 from services.nanobananapro_service import nanobananapro_service
-from services.ai_service import translate_text
+from services.ai_service import translate_segments
 from services.encryption_service import decrypt_value
 from models.settings import load_settings
 from services.image_service import get_user_images_dir
+from services.page_context import PageContext
 import os
 import json
 import time
 from datetime import datetime
 
-def translate_webtoon_text(text: str, source_language: str, provider: str, api_key: str, selected_model: str, glossary=None):
-           
-                                                       
-                                                                    
-                                                                                                       
-    result = translate_text(
-        text,
+def translate_webtoon_texts(texts, source_language: str, provider: str, api_key: str, selected_model: str, glossary=None):
+
+    # One structured request per page instead of one full translation request per bubble
+    return translate_segments(
+        texts,
         provider=provider,
         api_key=api_key,
         selected_model=selected_model,
         glossary=glossary,
-        images=None,
-        is_thinking_mode=False
+        source_language=source_language
     )
-    
-    return result
 
 def glossary_list_to_dict(glossary_list):
            
@@ -402,14 +398,16 @@ def process_webtoon_image(self, image_id: int, ocr_method: str, user_id: str, so
             else:
                 print(f"   ⚠️ OCR method {ocr_method_str} not properly configured")
             
-                                                                                       
+            # Decoded once here and shared by bubble/panel detection, inpainting and rendering
+            page = PageContext(original_abs_path)
             ocr_data = ocr_service.detect_text_with_grouping(
                 original_abs_path,
                 ocr_method_str,                     
                 source_language,
                 api_key,
                 endpoint,
-                enable_bubble_detection=True
+                enable_bubble_detection=True,
+                page=page
             )
             
                                                    
@@ -524,15 +522,14 @@ def process_webtoon_image(self, image_id: int, ocr_method: str, user_id: str, so
                                                                     
                         translation_sources = ocr_results
 
-                    for region in translation_sources:
-                        source_text = region['text']
-                        
-                        if not source_text or not source_text.strip():
-                            continue                           
-                        
-                                                                
-                        translation_result = translate_webtoon_text(
-                            source_text,
+                    translation_sources = [
+                        region for region in translation_sources
+                        if region.get('text') and region['text'].strip()
+                    ]
+                    
+                    if translation_sources:
+                        translation_result = translate_webtoon_texts(
+                            [region['text'] for region in translation_sources],
                             source_language,
                             provider=provider,
                             api_key=api_key_translation,
@@ -543,14 +540,13 @@ def process_webtoon_image(self, image_id: int, ocr_method: str, user_id: str, so
                         if translation_result.get('error'):
                             raise Exception(f"Translation failed: {translation_result['error']}")
                         
-                        english_text = translation_result.get('translated_text', source_text)
-                        
-                        if english_text and english_text.strip():
-                            translated_regions.append({
-                                'text': english_text,
-                                'bbox': region['bbox'],
-                                'confidence': region.get('confidence', 1.0)
-                            })
+                        for region, english_text in zip(translation_sources, translation_result['translations']):
+                            if english_text and english_text.strip():
+                                translated_regions.append({
+                                    'text': english_text,
+                                    'bbox': region['bbox'],
+                                    'confidence': region.get('confidence', 1.0)
+                                })
                     
                                           
                     image.translated_text = json.dumps(translated_regions)
@@ -573,7 +569,8 @@ def process_webtoon_image(self, image_id: int, ocr_method: str, user_id: str, so
                             ocr_results,                                                    
                             translated_regions,                                            
                             output_path,
-                            overwrite_text=overwrite_text
+                            overwrite_text=overwrite_text,
+                            page=page
                         )
                     else:
                                                                   
@@ -582,6 +579,7 @@ def process_webtoon_image(self, image_id: int, ocr_method: str, user_id: str, so
                         final_path = output_path
             
                                                        
+            page.release()
             relative_path = os.path.relpath(final_path, get_user_images_dir(user_id))
             
                                                                             
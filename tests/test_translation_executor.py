@@ -0,0 +1,33 @@
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pytest
+
+from services.translation_executor import TranslationExecutor
+
+def test_run_all_times_out_and_drops_late_results():
+
+    executor = TranslationExecutor(concurrency=2)
+    release = threading.Event()
+    reported = []
+
+    def slow(index):
+        release.wait(5)
+        return {'index': index}
+
+    with pytest.raises(FutureTimeoutError):
+        executor.run_all(
+            [(slow, (index,), {}) for index in range(2)],
+            on_result=lambda index, result: reported.append(index),
+            timeout=0.2
+        )
+
+    release.set()
+    executor.run_all([(lambda: None, (), {})])
+    assert reported == []
+
+def test_run_all_returns_results_in_call_order():
+
+    executor = TranslationExecutor(concurrency=4)
+    results = executor.run_all([(lambda value: value * 2, (value,), {}) for value in range(5)], timeout=5)
+    assert results == [0, 2, 4, 6, 8]
@@ -0,0 +1,118 @@
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+pytest.importorskip('celery')
+pytest.importorskip('sqlalchemy')
+
+from celery.app.task import Task
+
+import database.database
+import database.db_novel
+import models.settings
+import services.batch_translation_service
+from tasks import translation_tasks
+
+class FakeChapter:
+
+    def __init__(self, chapter_id):
+        self.id = chapter_id
+
+    def to_dict(self, include_content=False):
+        return {'id': self.id, 'title': f'제목 {self.id}', 'content': f'본문 {self.id}', 'images': []}
+
+class FakeQuery:
+
+    def __init__(self):
+        self.chapter_id = None
+
+    def options(self, *args):
+        return self
+
+    def filter_by(self, id=None, **kwargs):
+        self.chapter_id = id
+        return self
+
+    def first(self):
+        return FakeChapter(self.chapter_id)
+
+class FakeSession:
+
+    def query(self, *args):
+        return FakeQuery()
+
+@pytest.fixture
+def group_env(monkeypatch):
+
+    calls = {'chapter_updates': [], 'recorded': [], 'progress': [], 'threads': set()}
+    lock = threading.Lock()
+
+    @contextmanager
+    def fake_session_scope():
+        yield FakeSession()
+
+    def fake_update_chapter_db(chapter_id, updates):
+        with lock:
+            calls['chapter_updates'].append((chapter_id, updates))
+
+    def fake_translate_text(text, provider, api_key, selected_model, **kwargs):
+        with lock:
+            calls['threads'].add(threading.current_thread().name)
+        return {'translated_text': f'EN {text}', 'token_usage': None, 'error': None}
+
+    def fake_record_chapter_result(job_id, chapter_id, success, error=None, dispatch=True):
+        with lock:
+            calls['recorded'].append((job_id, chapter_id, success, error))
+
+    # Mirrors Celery: without an explicit id the request id is read from a thread-local stack
+    def fake_update_state(self, task_id=None, state=None, meta=None, **kwargs):
+        task_id = task_id or self.request.id
+        if not task_id:
+            raise ValueError('task_id must not be empty. Got None instead.')
+        with lock:
+            calls['progress'].append((task_id, state, meta))
+
+    settings = {'selected_provider': 'openai', 'api_keys': {'openai': 'sk-test'}, 'provider_models': {'openai': 'gpt-test'}}
+    monkeypatch.setattr(database.database, 'db_session_scope', fake_session_scope)
+    monkeypatch.setattr(database.db_novel, 'update_chapter_db', fake_update_chapter_db)
+    monkeypatch.setattr(models.settings, 'load_settings', lambda user_id: settings)
+    monkeypatch.setattr(translation_tasks, 'load_settings', lambda user_id: settings)
+    monkeypatch.setattr(translation_tasks, 'get_novel_db', lambda user_id, novel_id: {'glossary': None})
+    monkeypatch.setattr(translation_tasks, 'translate_text', fake_translate_text)
+    monkeypatch.setattr(translation_tasks, 'save_token_usage', lambda **kwargs: None)
+    monkeypatch.setattr(services.batch_translation_service, 'record_chapter_result', fake_record_chapter_result)
+    monkeypatch.setattr(Task, 'update_state', fake_update_state)
+    return calls
+
+def test_group_task_translates_every_chapter_on_executor_threads(group_env):
+
+    chapter_ids = [11, 12, 13]
+    result = translation_tasks.translate_chapter_group_task.apply(
+        task_id='group-task-id',
+        kwargs={
+            'user_id': 'user-1',
+            'novel_id': 'novel-slug',
+            'chapter_ids': chapter_ids,
+            'batch_job_id': 'job-1'
+        }
+    ).get()
+
+    assert result == {'status': 'complete', 'novel_id': 'novel-slug', 'translated': 3, 'failed': 0}
+    assert sorted(group_env['recorded']) == [('job-1', chapter_id, True, None) for chapter_id in chapter_ids]
+    assert group_env['threads'] and threading.current_thread().name not in group_env['threads']
+
+    started = [updates for _, updates in group_env['chapter_updates'] if updates.get('translation_status') == 'in_progress']
+    assert [updates['translation_task_id'] for updates in started] == ['group-task-id'] * 3
+    completed = {chapter_id: updates for chapter_id, updates in group_env['chapter_updates'] if updates.get('translation_status') == 'completed'}
+    assert set(completed) == set(chapter_ids)
+    assert completed[11]['translated_content'] == 'EN 본문 11'
+
+def test_single_chapter_task_still_reports_progress(group_env):
+
+    translation_tasks.translate_chapter_task.apply(
+        task_id='chapter-task-id',
+        kwargs={'user_id': 'user-1', 'novel_id': 'novel-slug', 'chapter_id': 21}
+    ).get()
+
+    assert ('chapter-task-id', 'PROGRESS', {'status': 'Translating content...'}) in group_env['progress']